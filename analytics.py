@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+from d_time import BASE_DATE, MINUTES_PER_DAY, WEEK_MINUTES
+from schedule_frame import is_compact, to_minutes
+from optimizer import split_route
+
+# 지상 대기(Idle) 시간 구간 (시간 단위 경계, 음수 = 같은 기재 스케줄 겹침)
+GAP_BINS = [-np.inf, 0, 1, 3, 6, 12, np.inf]
+GAP_LABELS = ['겹침', '~1h', '1~3h', '3~6h', '6~12h', '12h~']
+
+# --- 기재 운영 분석 (Utilization) ---
+def _minutes(df, base_date):
+    """ 압축 스케줄이면 Start_Min/End_Min, 아니면 Start/End -> 분 오프셋 (float, 결측 NaN) """
+    if is_compact(df):
+        starts, ends = df['Start_Min'], df['End_Min']
+    else:
+        starts, ends = to_minutes(df['Start'], base_date), to_minutes(df['End'], base_date)
+    return starts.to_numpy(dtype='float64', na_value=np.nan), ends.to_numpy(dtype='float64', na_value=np.nan)
+
+def fleet_utilization(df, horizon=WEEK_MINUTES, cyclic=True, base_date=BASE_DATE):
+    """
+    기재별 운영 지표를 한 번의 정렬(기재, 출발)과 배열 연산으로 계산.
+    horizon: 계획 기간(분, 기본 1주) - 가동률 = 블록 시간 / horizon
+    cyclic: 주간 반복 스케줄로 보고 마지막 도착 -> 다음 주기 첫 출발 사이도 지상 시간에 포함
+    반환 dict:
+      'resources': 기재별 편수, 블록 시간(h), 가동률(%), 지상 시간 최소/평균/최대(h)
+      'gaps'     : 지상 시간 구간별 횟수 (GAP_LABELS, '겹침' = 같은 기재 스케줄 겹침)
+      'overnight': 기재 x 날짜별 자정 위치 (도착 공항, 비행 중이면 '✈ 출발-도착', 아직 출발 전이면 빈 값)
+    """
+    starts, ends = _minutes(df, base_date)
+    valid = ~(np.isnan(starts) | np.isnan(ends))
+    # 문자열은 범주(Categorical) 코드로만 다룸 (압축 스케줄이면 변환 없음)
+    resource = pd.Categorical(df['Resource'].astype('category'))
+    label = pd.Categorical(df['Label'].astype('category'))
+    codes, names = resource.codes[valid].astype('int64'), resource.categories
+    s, e, label_codes = starts[valid], ends[valid], label.codes[valid]
+    if cyclic:
+        # 주기 끝을 넘는 스케줄(D7 2300 -> D1 0500)은 도착을 다음 주기로
+        e = np.where(e < s, e + horizon, e)
+    n_res = len(names)
+
+    order = np.lexsort((s, codes))
+    r, s, e, label_codes = codes[order], s[order], e[order], label_codes[order]
+    block = e - s
+
+    # 1. 기재별 편수/블록 시간
+    legs = np.bincount(r, minlength=n_res)
+    block_min = np.bincount(r, weights=block, minlength=n_res)
+
+    # 2. 지상 시간: 같은 기재의 (다음 출발 - 이전 도착), cyclic이면 주기 경계를 넘는 간격 추가
+    same = r[1:] == r[:-1]
+    gap_res, gaps = r[1:][same], (s[1:] - e[:-1])[same]
+    if cyclic and len(r):
+        last = np.r_[~same, True]
+        first = np.r_[True, ~same]
+        wrap = s[first] + horizon - e[last]
+        gap_res, gaps = np.r_[gap_res, r[first]], np.r_[gaps, wrap]
+    gap_count = np.bincount(gap_res, minlength=n_res)
+    gap_sum = np.bincount(gap_res, weights=gaps, minlength=n_res)
+    gap_min = np.full(n_res, np.nan)
+    gap_max = np.full(n_res, np.nan)
+    np.fmin.at(gap_min, gap_res, gaps)
+    np.fmax.at(gap_max, gap_res, gaps)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        resources = pd.DataFrame({
+            'Resource': names,
+            '편수': legs,
+            '블록(h)': np.round(block_min / 60, 1),
+            '가동률(%)': np.round(block_min / horizon * 100, 1),
+            '최소 지상(h)': np.round(gap_min / 60, 1),
+            '평균 지상(h)': np.round(gap_sum / gap_count / 60, 1),
+            '최대 지상(h)': np.round(gap_max / 60, 1),
+        })
+    gap_hist = pd.Series(np.histogram(gaps / 60, bins=GAP_BINS)[0], index=GAP_LABELS, name='횟수')
+
+    # 3. 자정 위치: 날짜 경계마다 (기재, 출발) 정렬 키에서 경계 직전 출발 스케줄을 이분 탐색
+    days = int(np.ceil(horizon / MINUTES_PER_DAY))
+    bounds = np.arange(1, days + 1) * MINUTES_PER_DAY
+    lo = min(s.min(), 0) if len(s) else 0
+    span = max(s.max() - lo if len(s) else 0, bounds[-1] - lo) + 1
+    key = r * span + (s - lo)                           # 기재별 구간이 겹치지 않는 1차원 정렬 키
+    probe = (np.arange(n_res)[:, None] * span + (bounds - lo)[None, :]).ravel()
+    idx = np.searchsorted(key, probe, side='left') - 1
+    res_of_probe = np.repeat(np.arange(n_res), days)
+    k = np.clip(idx, 0, max(len(r) - 1, 0))
+    found = (idx >= 0) & (r[k] == res_of_probe) if len(r) else np.zeros(len(idx), dtype=bool)
+    # Label 종류별로 한 번만 도착 공항 계산 ('-'가 없으면 Label 그대로), 결측 Label(코드 -1)은 빈 값
+    label_names = np.r_[label.categories.astype(str).to_numpy(dtype=object), ['']]
+    _, destinations = split_route(label_names)
+    destinations = np.where(pd.isna(destinations), label_names, destinations)
+    leg_label = label_codes[k] if len(r) else np.full(len(k), -1)
+    airborne = found & (e[k] > np.tile(bounds, n_res)) if len(r) else found
+    where = np.where(found, np.where(airborne, '✈ ' + label_names[leg_label], destinations[leg_label]), '')
+    overnight = pd.DataFrame(where.reshape(n_res, days), index=pd.Index(names, name='Resource'),
+                             columns=[f"D{d} 밤" for d in range(1, days + 1)])
+
+    # 스케줄이 없는 기재(범주에만 남은 이름)는 제외
+    used = legs > 0
+    return {'resources': resources[used].reset_index(drop=True), 'gaps': gap_hist, 'overnight': overnight[used]}
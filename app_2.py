@@ -1,10 +1,14 @@
 import streamlit as st
 import pandas as pd
 import json
-from datetime import datetime, timedelta, time
+from datetime import datetime, time
 import streamlit.components.v1 as components
 from io import BytesIO
 import re
+from timeline import build_timeline_payload, parse_pasted_schedule, TIMELINE_JS_HELPERS, TIMELINE_ASSET_TAGS, missing_vendor_assets
+from schedule_io import load_schedule_excel, normalize_schedule, write_schedule_excel
+from schedule_frame import expand_schedule, recurring_rows
+from conflicts import find_conflicts
 
 # --- 1. 페이지 설정 및 세션 초기화 ---
 st.set_page_config(layout="wide", page_title="B787-9 Rotation (Final)")
@@ -13,30 +17,27 @@ st.title("✈️ A/C Rotation Table")
 # 기준일
 BASE_DATE = datetime(2024, 1, 1)
 
-if 'new_tasks_list' not in st.session_state:
-    st.session_state.new_tasks_list = []
+# 폼으로 추가한 스케줄 (DataFrame, 제출할 때마다 한 번에 이어 붙임)
+if 'new_tasks' not in st.session_state:
+    st.session_state.new_tasks = None
 if 'custom_resources' not in st.session_state:
     st.session_state.custom_resources = []
 
 # --- 2. 헬퍼 함수 ---
-def parse_d_time(d_str):
-    try:
-        if pd.isna(d_str): return BASE_DATE
-        d_str = str(d_str).strip()
-        parts = d_str.split()
-        if len(parts) < 2: return BASE_DATE
-        day_match = re.search(r'\d+', parts[0])
-        day_offset = int(day_match.group()) - 1 if day_match else 0
-        time_part = parts[1].replace(":", "")
-        return BASE_DATE + timedelta(days=day_offset, hours=int(time_part[:2]), minutes=int(time_part[2:]))
-    except:
-        return BASE_DATE
-
-def format_d_time(dt):
-    if pd.isna(dt): return ""
-    diff = dt - BASE_DATE
-    day_num = (diff.days % 7) + 1
-    return f"D{day_num} {dt.hour:02d}{dt.minute:02d}"
+def warn_invalid_d_time(df, invalid):
+    """ 시간 형식 오류 행을 숨기지 않고 경고로 표시 """
+    if invalid.any():
+        rows = ", ".join(str(i) for i in df.index[invalid][:10])
+        st.warning(f"⚠️ 시간 형식 오류 {int(invalid.sum())}건 (예: D1 1320) - 행: {rows}")
+
+def warn_conflicts(df):
+    """ 같은 기재에서 시간이 겹치는 스케줄 쌍을 경고로 표시 (추가/편집/붙여넣기 후 확인) """
+    conflicts = find_conflicts(df)
+    if not conflicts.empty:
+        labels = df['Label'].astype(str)
+        pairs = ", ".join(f"{res} {labels[a]}↔{labels[b]}" for res, a, b in
+                          conflicts[['Resource', 'id', 'other_id']].head(10).itertuples(index=False))
+        st.warning(f"⚠️ 같은 기재에서 시간이 겹치는 스케줄 {len(conflicts)}건 - {pairs}")
 
 # --- 3. 데이터 로드 ---
 def create_sample_data():
@@ -47,19 +48,12 @@ def create_sample_data():
 
 st.sidebar.header("1. 데이터 파일 (엑셀)")
 uploaded_file = st.sidebar.file_uploader("업로드 (.xlsx)", type=["xlsx"])
+# 같은 파일(내용 해시 기준)은 매 rerun마다 다시 읽지 않고 캐시에서 로드
 if uploaded_file:
-    df_original = pd.read_excel(uploaded_file)
+    df_original, invalid = load_schedule_excel(uploaded_file.getvalue(), BASE_DATE)
 else:
-    df_original = create_sample_data()
-
-# 안전장치
-if 'Color' not in df_original.columns: df_original['Color'] = '#ADD8E6'
-if 'Resource' not in df_original.columns: df_original['Resource'] = 'Unassigned'
-if 'Label' not in df_original.columns: df_original['Label'] = 'Flight'
-
-if 'Start_D' in df_original.columns:
-    df_original['Start'] = df_original['Start_D'].apply(parse_d_time)
-    df_original['End'] = df_original['End_D'].apply(parse_d_time)
+    df_original, invalid = normalize_schedule(create_sample_data(), BASE_DATE)
+warn_invalid_d_time(df_original, invalid)
 
 # --- 4. 기재(Row) 관리 및 정렬 ---
 st.sidebar.markdown("---")
@@ -94,28 +88,31 @@ with st.sidebar.form("add_task"):
         n_lbl = st.text_input("목적지", "ICN-LAX")
         n_col = st.color_picker("색상", "#90EE90")
     with c2:
-        n_day = st.selectbox("출발일", [f"D{i}" for i in range(1,8)])
+        n_days = st.multiselect("운항 요일", [f"D{i}" for i in range(1,8)], ["D1"])
         n_time = st.time_input("출발시간", time(10,0))
         dur_h = st.number_input("시간(H)", 0, 24, 10)
         dur_m = st.number_input("분(M)", 0, 59, 0, 10)
     
     if st.form_submit_button("➕ 추가"):
-        day_off = int(n_day[1:]) - 1
-        s_dt = BASE_DATE + timedelta(days=day_off, hours=n_time.hour, minutes=n_time.minute)
-        e_dt = s_dt + timedelta(hours=dur_h, minutes=dur_m)
-        st.session_state.new_tasks_list.append({
-            "Resource": n_res, "Label": n_lbl, "Color": n_col,
-            "Start": s_dt, "End": e_dt,
-            "Start_D": format_d_time(s_dt), "End_D": format_d_time(e_dt)
-        })
-        st.success("추가됨!")
+        # 선택한 운항 요일 전체를 한 번에 생성 (schedule_frame.recurring_rows)
+        flight = pd.DataFrame({"Resource": [n_res], "Label": [n_lbl], "Color": [n_col], "Days": [",".join(n_days)],
+                               "Time": [n_time.strftime('%H%M')], "Duration": [f"{dur_h:02d}{dur_m:02d}"]})
+        rows, invalid = recurring_rows(flight)
+        if invalid.any():
+            st.error("운항 요일과 비행 시간을 확인해 주세요.")
+        else:
+            new = expand_schedule(rows, BASE_DATE, d_time=True)
+            prev = st.session_state.new_tasks
+            st.session_state.new_tasks = new if prev is None else pd.concat([prev, new], ignore_index=True)
+            st.success(f"{len(new)}건 추가됨!")
 
 # --- 6. 데이터 병합 ---
-if st.session_state.new_tasks_list:
-    df_new = pd.DataFrame(st.session_state.new_tasks_list)
-    df_combined = pd.concat([df_original, df_new], ignore_index=True)
+if st.session_state.new_tasks is not None:
+    df_combined = pd.concat([df_original, st.session_state.new_tasks], ignore_index=True)
 else:
     df_combined = df_original.copy()
+# 추가한 스케줄 포함, 같은 기재 겹침 확인
+warn_conflicts(df_combined)
 
 with st.expander("📊 데이터 테이블 보기"):
     cols = [c for c in ['Resource', 'Start_D', 'End_D', 'Label', 'Color'] if c in df_combined.columns]
@@ -129,23 +126,20 @@ with st.expander("📊 데이터 테이블 보기"):
 # [핵심 2] groups 데이터에 'order' 필드를 추가하여 Python 정렬 순서(Index)를 주입함
 groups = [{"id": res, "content": f"<b>{res}</b>", "order": i} for i, res in enumerate(all_resources)]
 
-items = []
-for i, row in df_combined.iterrows():
-    c_val = row['Color'] if not pd.isna(row['Color']) else '#ADD8E6'
-    items.append({
-        "id": i, "group": row['Resource'], "content": row['Label'],
-        "start": row['Start'].isoformat(), "end": row['End'].isoformat(),
-        "style": f"background-color: {c_val}; border-color: black;"
-    })
+# 컬럼 단위 Payload (epoch ms + 색상 class)
+payload_json, color_css = build_timeline_payload(df_combined, all_resources)
 
 # --- 8. HTML/JS ---
+if missing_vendor_assets():
+    st.warning(f"⚠️ 타임라인 라이브러리 파일 없음 (static/vendor/: {', '.join(missing_vendor_assets())}) - "
+               "CDN에서 대신 읽으므로 인터넷이 안 되는 서버에서는 차트가 표시되지 않습니다. fetch_assets.py로 받아 두세요.")
 html_code = f"""
 <!DOCTYPE html>
 <html>
 <head>
-  <script type="text/javascript" src="https://cdnjs.cloudflare.com/ajax/libs/vis-timeline/7.7.2/vis-timeline-graph2d.min.js"></script>
-  <link href="https://cdnjs.cloudflare.com/ajax/libs/vis-timeline/7.7.2/vis-timeline-graph2d.min.css" rel="stylesheet" type="text/css" />
+  {TIMELINE_ASSET_TAGS}
   <style>
+{color_css}
     body {{ font-family: 'Segoe UI', sans-serif; background-color: white; margin: 0; }}
     #visualization {{ border: 1px solid #ddd; height: 600px; }}
     .vis-time-axis .vis-text {{ font-weight: bold; color: #333; }}
@@ -159,9 +153,11 @@ html_code = f"""
 <button class="btn-copy" onclick="exportData()">💾 결과 복사</button>
 <span id="msg" style="color: green; margin-left: 10px;"></span>
 <script>
+{TIMELINE_JS_HELPERS}
   try {{
       var groups = new vis.DataSet({json.dumps(groups)});
-      var items = new vis.DataSet({json.dumps(items)});
+      var payload = {payload_json};
+      var items = new vis.DataSet(decodeItems(payload));
       var container = document.getElementById('visualization');
       
       var options = {{
@@ -169,12 +165,13 @@ html_code = f"""
         groupOrder: 'order', 
         
         editable: true, stack: false, margin: {{ item: 5, axis: 5 }}, orientation: 'top',
-        min: '2024-01-01 00:00:00', max: '2024-01-08 00:00:00',
-        start: '2024-01-01 00:00:00', end: '2024-01-08 00:00:00',
+        min: '2024-01-01T00:00:00Z', max: '2024-01-08T00:00:00Z',
+        start: '2024-01-01T00:00:00Z', end: '2024-01-08T00:00:00Z',
+        moment: function(date) {{ return vis.moment(date).utc(); }},
         zoomMin: 1000 * 60 * 60 * 6, zoomMax: 1000 * 60 * 60 * 24 * 7,
         format: {{
-          minorLabels: function(date, scale, step) {{ return new Date(date).getHours() + 'h'; }},
-          majorLabels: function(date, scale, step) {{ return 'D' + new Date(date).getDate(); }}
+          minorLabels: function(date, scale, step) {{ return new Date(date).getUTCHours() + 'h'; }},
+          majorLabels: function(date, scale, step) {{ return 'D' + new Date(date).getUTCDate(); }}
         }},
         snap: function (date, scale, step) {{ var m = 10 * 60 * 1000; return Math.round(date / m) * m; }}
       }};
@@ -184,8 +181,8 @@ html_code = f"""
       function exportData() {{
         var data = items.get();
         var simpl = data.map(function(item) {{
-            return {{ "Resource": item.group, "Start_ISO": item.start, "End_ISO": item.end, "Label": item.content, 
-                      "Color": item.style ? item.style.split(';')[0].split(':')[1].trim() : '#ADD8E6' }};
+            return {{ "Resource": item.group, "Start_ISO": toNaiveIso(item.start), "End_ISO": toNaiveIso(item.end), "Label": item.content, 
+                      "Color": itemColor(payload, item) }};
         }});
         navigator.clipboard.writeText(JSON.stringify(simpl)).then(function() {{
             document.getElementById('msg').innerText = "복사 완료!";
@@ -209,22 +206,11 @@ json_input = st.text_area("복사한 데이터 붙여넣기", height=100)
 
 if json_input:
     try:
-        new_data = json.loads(json_input)
-        processed_rows = []
-        for row in new_data:
-            s_dt = pd.to_datetime(row['Start_ISO'])
-            e_dt = pd.to_datetime(row['End_ISO'])
-            processed_rows.append({
-                "Resource": row['Resource'],
-                "Start_D": format_d_time(s_dt), "End_D": format_d_time(e_dt),
-                "Label": row['Label'], "Color": row['Color']
-            })
-        new_df = pd.DataFrame(processed_rows)
-        def to_excel(df):
-            output = BytesIO()
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                df.to_excel(writer, index=False)
-            return output.getvalue()
-        st.download_button("📥 엑셀 다운로드", to_excel(new_df), 'schedule_final.xlsx')
+        new_df = parse_pasted_schedule(json_input, BASE_DATE)
+        # 붙여넣은 (차트에서 이동한) 스케줄도 저장 전에 겹침 확인
+        warn_conflicts(normalize_schedule(new_df.copy(), BASE_DATE)[0])
+        output = BytesIO()
+        write_schedule_excel(new_df, output)
+        st.download_button("📥 엑셀 다운로드", output.getvalue(), 'schedule_final.xlsx')
     except Exception as e:
         st.error(f"오류: {e}")
\ No newline at end of file
@@ -1,10 +1,15 @@
 import streamlit as st
 import pandas as pd
 import json
-from datetime import datetime, timedelta, time
-import streamlit.components.v1 as components
+import copy
+from datetime import datetime
 from io import BytesIO
 import re
+from timeline import build_timeline_payload, apply_timeline_delta, missing_vendor_assets
+from timeline_component import timeline_editor, pending_deltas
+from d_time import parse_d_time_series
+from schedule_io import file_digest, load_schedule_excel, normalize_schedule, write_schedule_excel
+from conflicts import find_conflicts
 
 # --- 1. 페이지 설정 및 초기화 ---
 st.set_page_config(layout="wide", page_title="B787-9 Rotation (Final Editor)")
@@ -17,26 +22,105 @@ if 'schedule_df' not in st.session_state:
     st.session_state.schedule_df = None
 if 'custom_resources' not in st.session_state:
     st.session_state.custom_resources = []
+if 'upload_digest' not in st.session_state:
+    st.session_state.upload_digest = None
+# 표 에디터 기준 상태: 에디터에 넘긴 DataFrame(기준), 에디터 key 번호, 이미 반영한 변경분, 추가 행 id
+# 차트 기준 상태: 기본 Payload (기재 목록, JSON, CSS, 색상표), 이후 바뀐/삭제된 행 id, 누적 변경분(patch)
+if 'editor_gen' not in st.session_state:
+    st.session_state.editor_gen = 0
+if 'timeline_ack' not in st.session_state:
+    st.session_state.timeline_ack = 0
+if 'timeline_ids' not in st.session_state:
+    st.session_state.timeline_ids = {}
+if 'patch_seq' not in st.session_state:
+    st.session_state.patch_seq = 0
+
+EDITOR_COLUMNS = ['Resource', 'Start_D', 'End_D', 'Label', 'Color']
+# 기본 Payload 이후 바뀐 행이 이만큼(전체 대비 비율)을 넘으면 차트 Payload를 새로 만듦
+PATCH_REBASE_RATIO = 0.25
 
 # --- 2. 헬퍼 함수 ---
-def parse_d_time(d_str):
-    try:
-        if pd.isna(d_str): return BASE_DATE
-        d_str = str(d_str).strip()
-        parts = d_str.split()
-        if len(parts) < 2: return BASE_DATE
-        day_match = re.search(r'\d+', parts[0])
-        day_offset = int(day_match.group()) - 1 if day_match else 0
-        time_part = parts[1].replace(":", "")
-        return BASE_DATE + timedelta(days=day_offset, hours=int(time_part[:2]), minutes=int(time_part[2:]))
-    except:
-        return BASE_DATE
-
-def format_d_time(dt):
-    if pd.isna(dt): return ""
-    diff = dt - BASE_DATE
-    day_num = (diff.days % 7) + 1
-    return f"D{day_num} {dt.hour:02d}{dt.minute:02d}"
+def warn_invalid_d_time(df, invalid):
+    """ 시간 형식 오류 행을 숨기지 않고 경고로 표시 """
+    if invalid.any():
+        rows = ", ".join(str(i) for i in df.index[invalid][:10])
+        st.warning(f"⚠️ 시간 형식 오류 {int(invalid.sum())}건 (예: D1 1320) - 행: {rows}")
+
+def warn_conflicts(df):
+    """ 같은 기재에서 시간이 겹치는 스케줄 쌍을 경고로 표시 (추가/편집/붙여넣기 후 확인) """
+    conflicts = find_conflicts(df)
+    if not conflicts.empty:
+        labels = df['Label'].astype(str)
+        pairs = ", ".join(f"{res} {labels[a]}↔{labels[b]}" for res, a, b in
+                          conflicts[['Resource', 'id', 'other_id']].head(10).itertuples(index=False))
+        st.warning(f"⚠️ 같은 기재에서 시간이 겹치는 스케줄 {len(conflicts)}건 - {pairs}")
+
+def rebase():
+    """ 현재 스케줄을 표 에디터/차트의 새 기준으로 (파일 로드, 차트 편집 반영 후 호출) """
+    st.session_state.editor_base = st.session_state.schedule_df[EDITOR_COLUMNS]
+    st.session_state.editor_gen += 1
+    st.session_state.editor_applied = {"edited_rows": {}, "added_rows": [], "deleted_rows": []}
+    st.session_state.editor_added_ids = []
+    rebase_timeline()
+
+def rebase_timeline():
+    """ 다음 차트 그리기에서 기본 Payload를 전체 스케줄로 다시 생성 """
+    st.session_state.timeline_base = None
+    st.session_state.timeline_touched = set()
+    st.session_state.timeline_removed = set()
+    st.session_state.timeline_patch = None
+
+def apply_editor_changes(state):
+    """
+    data_editor 변경분(기준 DataFrame의 행 위치 기준 누적값) 중 이전 실행 이후 바뀐 행만 schedule_df에 반영.
+    바뀐 행만 D-Time을 다시 파싱하고, 반환: (바뀐 행 id, 삭제된 행 id)
+    """
+    base, applied = st.session_state.editor_base, st.session_state.editor_applied
+    df = st.session_state.schedule_df
+    added_ids = st.session_state.editor_added_ids
+
+    # 1. 삭제 (기준 행 위치)
+    deleted = base.index[sorted(set(state['deleted_rows']) - set(applied['deleted_rows']))].tolist()
+    # 2. 기존 행 수정: 셀 변경분이 달라진 행만 (기준 값 + 변경 셀)
+    positions = [pos for pos in set(state['edited_rows']) | set(applied['edited_rows'])
+                 if state['edited_rows'].get(pos) != applied['edited_rows'].get(pos)]
+    positions = [pos for pos in positions if pos not in state['deleted_rows']]
+    rows = base.iloc[positions].copy()
+    for pos, row_id in zip(positions, rows.index):
+        for col, value in state['edited_rows'].get(pos, {}).items():
+            rows.at[row_id, col] = value
+    # 3. 추가 행: 중간 행이 지워지면 위치가 밀리므로 추가 행 전체를 다시 반영
+    added = state['added_rows']
+    if len(added) < len(added_ids):
+        deleted += added_ids[len(added):]
+        del added_ids[len(added):]
+        changed = range(len(added))
+    else:
+        changed = [i for i in range(len(added)) if i >= len(applied['added_rows']) or added[i] != applied['added_rows'][i]]
+    next_id = int(max(df.index.max() if len(df) else -1, max(added_ids, default=-1))) + 1
+    for i in changed:
+        if i >= len(added_ids):
+            added_ids.append(next_id)
+            next_id += 1
+    if changed:
+        new = pd.DataFrame([added[i] for i in changed], index=[added_ids[i] for i in changed], columns=EDITOR_COLUMNS)
+        rows = pd.concat([rows, new]) if len(rows) else new
+
+    if len(rows):
+        rows['Start'], _ = parse_d_time_series(rows['Start_D'], BASE_DATE)
+        rows['End'], _ = parse_d_time_series(rows['End_D'], BASE_DATE)
+        rows.index = rows.index.astype(df.index.dtype)
+        existing = rows.index.isin(df.index)
+        if existing.any():
+            df.loc[rows.index[existing], rows.columns] = rows[existing]
+        if (~existing).any():
+            df = pd.concat([df, rows[~existing]])
+    deleted = [i for i in deleted if i in df.index]
+    if deleted:
+        df = df.drop(index=deleted)
+    st.session_state.schedule_df = df
+    st.session_state.editor_applied = copy.deepcopy(dict(state))
+    return rows.index.tolist(), deleted
 
 # Natural Sort (숫자 인식 정렬)
 def natural_sort_key(s):
@@ -44,33 +128,33 @@ def natural_sort_key(s):
 
 # --- 3. 데이터 로드 및 전처리 ---
 def load_data(uploaded_file):
+    # 같은 파일(내용 해시 기준)은 캐시에서 바로 로드
     if uploaded_file:
-        df = pd.read_excel(uploaded_file)
+        df, invalid = load_schedule_excel(uploaded_file.getvalue(), BASE_DATE)
     else:
         # 샘플 데이터
         df = pd.DataFrame([
             {"Resource": "#1", "Start_D": "D1 1320", "End_D": "D2 1620", "Label": "LAX", "Color": "#FFB6C1"},
             {"Resource": "#2", "Start_D": "D1 2155", "End_D": "D2 0540", "Label": "EWR", "Color": "#ADD8E6"},
         ])
-    
-    # 필수 컬럼 보정
-    if 'Color' not in df.columns: df['Color'] = '#ADD8E6'
-    if 'Resource' not in df.columns: df['Resource'] = 'Unassigned'
-    if 'Label' not in df.columns: df['Label'] = 'Flight'
-    
+        # 필수 컬럼 보정 + Start/End 계산
+        df, invalid = normalize_schedule(df, BASE_DATE)
     return df
 
 # --- 4. 사이드바: 파일 로드 & 기재 관리 ---
 st.sidebar.header("1. 데이터 관리")
 uploaded_file = st.sidebar.file_uploader("엑셀 업로드", type=["xlsx"])
 
-# 파일이 업로드되거나 초기 상태일 때 데이터 로드 (한 번만)
-if st.session_state.schedule_df is None or uploaded_file is not None:
-    # 업로드 파일이 바뀌면 리셋
-    if uploaded_file:
+# 초기 상태이거나 업로드 파일(내용 해시 기준)이 바뀐 경우에만 로드 + 리셋 (rerun마다 리셋하면 표/차트 편집이 사라짐)
+if uploaded_file is not None:
+    digest = file_digest(uploaded_file.getvalue())
+    if digest != st.session_state.upload_digest:
         st.session_state.schedule_df = load_data(uploaded_file)
-    elif st.session_state.schedule_df is None:
-        st.session_state.schedule_df = load_data(None)
+        st.session_state.upload_digest = digest
+        rebase()
+elif st.session_state.schedule_df is None:
+    st.session_state.schedule_df = load_data(None)
+    rebase()
 
 st.sidebar.markdown("---")
 st.sidebar.header("2. 기재(Row) 추가")
@@ -92,9 +176,10 @@ all_resources = sorted(list(set(base_resources + existing + custom)), key=natura
 st.subheader("📊 스케줄 데이터 편집 (직접 수정/추가/삭제)")
 st.info("💡 아래 표에서 직접 내용을 수정하거나, 맨 아래행을 클릭해 추가, 왼쪽 체크박스로 삭제하세요. (Start_D/End_D 형식: D1 1300)")
 
-# 에디터 설정
-edited_df = st.data_editor(
-    st.session_state.schedule_df,
+# 에디터 설정 (기준 DataFrame은 고정, 편집 내용은 에디터 상태의 변경분으로만 받음)
+editor_key = f"editor_{st.session_state.editor_gen}"
+st.data_editor(
+    st.session_state.editor_base,
     num_rows="dynamic", # 행 추가/삭제 허용
     column_config={
         "Resource": st.column_config.SelectboxColumn(
@@ -108,142 +193,83 @@ edited_df = st.data_editor(
         "End_D": st.column_config.TextColumn("도착 (예: D2 0540)", required=True),
         "Label": st.column_config.TextColumn("목적지/편명", required=True),
         "Color": st.column_config.ColorPickerColumn("색상"),
-        # 내부 계산용 컬럼 숨기기
-        "Start": None, "End": None 
     },
     use_container_width=True,
-    key="editor", # 키를 지정하여 변경사항 추적
+    key=editor_key, # 키를 지정하여 변경사항 추적
     hide_index=True
 )
 
-# 데이터가 수정되었으면 세션에 업데이트
-if not edited_df.equals(st.session_state.schedule_df):
-    st.session_state.schedule_df = edited_df
-    # 날짜 계산 다시 수행 (Start_D -> Start datetime)
-    st.session_state.schedule_df['Start'] = st.session_state.schedule_df['Start_D'].apply(parse_d_time)
-    st.session_state.schedule_df['End'] = st.session_state.schedule_df['End_D'].apply(parse_d_time)
-    st.rerun() # 차트 갱신을 위해 새로고침
+# 이전 실행 이후 바뀐 행만 세션에 반영 (전체 비교/재파싱/rerun 없이 같은 실행에서 차트까지 갱신)
+if st.session_state[editor_key] != st.session_state.editor_applied:
+    changed_ids, deleted_ids = apply_editor_changes(st.session_state[editor_key])
+    st.session_state.timeline_touched.update(changed_ids)
+    st.session_state.timeline_touched.difference_update(deleted_ids)
+    st.session_state.timeline_removed.update(deleted_ids)
+    st.session_state.timeline_patch = None
 
 # 현재 데이터프레임 확정
-final_df = st.session_state.schedule_df.copy()
-# Start/End 컬럼이 없을 경우를 대비해 한번 더 계산
-if 'Start' not in final_df.columns:
-    final_df['Start'] = final_df['Start_D'].apply(parse_d_time)
-    final_df['End'] = final_df['End_D'].apply(parse_d_time)
+final_df = st.session_state.schedule_df
+# 시간 형식 오류 행은 차트에서 빠지므로 경고로 알림
+warn_invalid_d_time(final_df, (final_df['Start'].isna() | final_df['End'].isna()).to_numpy())
+# 추가/표 편집/차트 이동 후 같은 기재 겹침 확인
+warn_conflicts(final_df)
 
 
 # --- 6. JSON 변환 (차트용) ---
 # 그룹(Row) 정의 (순서 고정)
 groups = [{"id": res, "content": f"<b>{res}</b>", "order": i} for i, res in enumerate(all_resources)]
 
-items = []
-for i, row in final_df.iterrows():
-    # 유효하지 않은 날짜 데이터 제외
-    if pd.isna(row['Start']) or pd.isna(row['End']): continue
-    
-    c_val = row['Color'] if not pd.isna(row['Color']) else '#ADD8E6'
-    items.append({
-        "id": i, 
-        "group": row['Resource'], 
-        "content": str(row['Label']),
-        "start": row['Start'].isoformat(), 
-        "end": row['End'].isoformat(),
-        "style": f"background-color: {c_val}; border-color: black;"
-    })
-
-# --- 7. HTML/JS (Vis.js Timeline) ---
-html_code = f"""
-<!DOCTYPE html>
-<html>
-<head>
-  <script type="text/javascript" src="https://cdnjs.cloudflare.com/ajax/libs/vis-timeline/7.7.2/vis-timeline-graph2d.min.js"></script>
-  <link href="https://cdnjs.cloudflare.com/ajax/libs/vis-timeline/7.7.2/vis-timeline-graph2d.min.css" rel="stylesheet" type="text/css" />
-  <style>
-    body {{ font-family: 'Segoe UI', sans-serif; background-color: white; margin: 0; }}
-    #visualization {{ border: 1px solid #ddd; height: 600px; }}
-    .vis-time-axis .vis-text {{ font-weight: bold; color: #333; }}
-    .vis-time-axis .vis-text.vis-major {{ color: #000; font-size: 14px; }}
-    .vis-item {{ border-width: 1px; font-weight: bold; font-size: 12px; display: flex; align-items: center; justify-content: center; }}
-    .btn-copy {{ margin-top: 10px; padding: 10px 20px; background-color: #ff4b4b; color: white; border: none; border-radius: 5px; cursor: pointer; }}
-  </style>
-</head>
-<body>
-<div id="visualization"></div>
-<button class="btn-copy" onclick="exportData()">💾 차트 위치 저장 (복사)</button>
-<span id="msg" style="color: green; margin-left: 10px;"></span>
-<script>
-  try {{
-      var groups = new vis.DataSet({json.dumps(groups)});
-      var items = new vis.DataSet({json.dumps(items)});
-      var container = document.getElementById('visualization');
-      
-      var options = {{
-        groupOrder: 'order', // 순번대로 정렬
-        editable: true, stack: false, margin: {{ item: 5, axis: 5 }}, orientation: 'top',
-        min: '2024-01-01 00:00:00', max: '2024-01-08 00:00:00',
-        start: '2024-01-01 00:00:00', end: '2024-01-08 00:00:00',
-        zoomMin: 1000 * 60 * 60 * 6, zoomMax: 1000 * 60 * 60 * 24 * 7,
-        format: {{
-          minorLabels: function(date, scale, step) {{ return new Date(date).getHours() + 'h'; }},
-          majorLabels: function(date, scale, step) {{ return 'D' + new Date(date).getDate(); }}
-        }},
-        snap: function (date, scale, step) {{ var m = 10 * 60 * 1000; return Math.round(date / m) * m; }}
-      }};
-
-      var timeline = new vis.Timeline(container, items, groups, options);
-      
-      function exportData() {{
-        var data = items.get();
-        var simpl = data.map(function(item) {{
-            return {{ "Resource": item.group, "Start_ISO": item.start, "End_ISO": item.end, "Label": item.content, 
-                      "Color": item.style ? item.style.split(';')[0].split(':')[1].trim() : '#ADD8E6' }};
-        }});
-        navigator.clipboard.writeText(JSON.stringify(simpl)).then(function() {{
-            document.getElementById('msg').innerText = "복사 완료! 하단에 붙여넣으세요.";
-        }});
-      }}
-  }} catch (err) {{
-      document.getElementById('visualization').innerHTML = "ERROR: " + err.message;
-  }}
-</script>
-</body>
-</html>
-"""
+# 기본 Payload(컬럼 단위, epoch ms + 색상 class)는 기준 시점에 한 번만 만들고, 이후에는 바뀐 행만 patch로 전송
+touched, removed = st.session_state.timeline_touched, st.session_state.timeline_removed
+if len(touched) + len(removed) > PATCH_REBASE_RATIO * max(len(final_df), 1):
+    rebase_timeline()
+base = st.session_state.timeline_base
+if base is None or base[0] != all_resources:
+    rebase_timeline()
+    payload_json, color_css = build_timeline_payload(final_df, all_resources)
+    base = st.session_state.timeline_base = (all_resources, payload_json, color_css, json.loads(payload_json)['colors'])
+touched, removed = st.session_state.timeline_touched, st.session_state.timeline_removed
+if (touched or removed) and st.session_state.timeline_patch is None:
+    rows = final_df.loc[sorted(touched)]
+    patch_json, patch_css = build_timeline_payload(rows, all_resources, palette=base[3])
+    # 기재/시간이 비어 차트에서 빠지는 행도 삭제로 전송
+    hidden = rows.index[~(rows['Resource'].isin(all_resources) & rows['Start'].notna() & rows['End'].notna())]
+    st.session_state.patch_seq += 1
+    st.session_state.timeline_patch = {"seq": st.session_state.patch_seq, "payload": patch_json, "css": patch_css,
+                                       "removed": sorted(removed) + hidden.tolist()}
 
+# --- 7. Vis.js 타임라인 (양방향 컴포넌트: 표 편집은 patch로 일부 행만 갱신, 차트 편집은 표에 반영) ---
 st.markdown("---")
 st.subheader("📊 인터랙티브 스케줄러")
-components.html(html_code, height=650)
+if missing_vendor_assets():
+    st.warning(f"⚠️ 타임라인 라이브러리 파일 없음 (static/vendor/: {', '.join(missing_vendor_assets())}) - "
+               "CDN에서 대신 읽으므로 인터넷이 안 되는 서버에서는 차트가 표시되지 않습니다. fetch_assets.py로 받아 두세요.")
+timeline_result = timeline_editor(
+    base[1], json.dumps(groups), base[2], ack=st.session_state.timeline_ack, key="timeline",
+    patch=st.session_state.timeline_patch,
+)
+deltas = pending_deltas(timeline_result, st.session_state.timeline_ack)
+if deltas:
+    # 차트에서 이동/삭제/복제한 행을 스케줄에 반영한 뒤 표/차트 기준을 새로 잡음
+    for delta in deltas:
+        st.session_state.schedule_df = apply_timeline_delta(
+            st.session_state.schedule_df, delta, BASE_DATE, st.session_state.timeline_ids
+        )
+    st.session_state.timeline_ack = deltas[-1]['seq']
+    rebase()
+    st.rerun()
 
 
 # --- 8. 저장 ---
 st.markdown("---")
 st.subheader("📥 결과 저장")
-json_input = st.text_area("위의 '차트 위치 저장' 버튼으로 복사한 데이터를 여기에 붙여넣으세요 (Ctrl+V)", height=100)
-
-if json_input:
-    try:
-        new_data = json.loads(json_input)
-        processed_rows = []
-        for row in new_data:
-            s_dt = pd.to_datetime(row['Start_ISO'])
-            e_dt = pd.to_datetime(row['End_ISO'])
-            processed_rows.append({
-                "Resource": row['Resource'],
-                "Start_D": format_d_time(s_dt), "End_D": format_d_time(e_dt),
-                "Label": row['Label'], "Color": row['Color']
-            })
-        
-        export_df = pd.DataFrame(processed_rows)
-        # Resource 정렬 (Natural Sort)
-        export_df['Resource'] = pd.Categorical(export_df['Resource'], categories=all_resources, ordered=True)
-        export_df = export_df.sort_values('Resource')
-
-        def to_excel(df):
-            output = BytesIO()
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                df.to_excel(writer, index=False)
-            return output.getvalue()
-
-        st.download_button("📥 엑셀 파일 다운로드", to_excel(export_df), 'schedule_final.xlsx')
-    except Exception as e:
-        st.error(f"오류: {e}")
\ No newline at end of file
+# 버튼 클릭 시 Streamlit이 스크립트 밖(세션 상태 접근 불가)에서 호출하므로 저장할 데이터는 지금 꺼내 둠
+export_df = st.session_state.schedule_df[EDITOR_COLUMNS]
+def to_excel():
+    # Resource 정렬 (Natural Sort) 후 행 단위로 흘려 쓰기
+    output = BytesIO()
+    write_schedule_excel(export_df, output)
+    return output.getvalue()
+
+# 표/차트 편집 결과를 그대로 저장 (파일은 버튼을 누를 때 생성 - 셀을 고칠 때마다 다시 만들지 않음)
+st.download_button("📥 엑셀 파일 다운로드", to_excel, 'schedule_final.xlsx', disabled=final_df.empty)
@@ -5,6 +5,10 @@ from datetime import datetime, timedelta, time
 import streamlit.components.v1 as components
 from io import BytesIO
 import re
+from timeline import build_timeline_payload, parse_pasted_schedule, TIMELINE_JS_HELPERS, TIMELINE_ASSET_TAGS, missing_vendor_assets
+from d_time import parse_d_time_series
+from schedule_io import load_schedule_excel, normalize_schedule, write_schedule_excel
+from conflicts import find_conflicts
 
 # --- 1. 페이지 설정 및 초기화 ---
 st.set_page_config(layout="wide", page_title="A/C Rotation (Unified)")
@@ -19,19 +23,20 @@ if 'custom_resources' not in st.session_state:
     st.session_state.custom_resources = []
 
 # --- 2. 헬퍼 함수 ---
-def parse_d_time(d_str):
-    """ 'D1 1320' -> datetime 변환 """
-    try:
-        if pd.isna(d_str): return BASE_DATE
-        d_str = str(d_str).strip()
-        parts = d_str.split()
-        if len(parts) < 2: return BASE_DATE
-        day_match = re.search(r'\d+', parts[0])
-        day_offset = int(day_match.group()) - 1 if day_match else 0
-        time_part = parts[1].replace(":", "")
-        return BASE_DATE + timedelta(days=day_offset, hours=int(time_part[:2]), minutes=int(time_part[2:]))
-    except:
-        return BASE_DATE
+def warn_invalid_d_time(df, invalid):
+    """ 시간 형식 오류 행을 숨기지 않고 경고로 표시 """
+    if invalid.any():
+        rows = ", ".join(str(i) for i in df.index[invalid][:10])
+        st.warning(f"⚠️ 시간 형식 오류 {int(invalid.sum())}건 (예: D1 1320) - 행: {rows}")
+
+def warn_conflicts(df):
+    """ 같은 기재에서 시간이 겹치는 스케줄 쌍을 경고로 표시 (추가/편집/붙여넣기 후 확인) """
+    conflicts = find_conflicts(df)
+    if not conflicts.empty:
+        labels = df['Label'].astype(str)
+        pairs = ", ".join(f"{res} {labels[a]}↔{labels[b]}" for res, a, b in
+                          conflicts[['Resource', 'id', 'other_id']].head(10).itertuples(index=False))
+        st.warning(f"⚠️ 같은 기재에서 시간이 겹치는 스케줄 {len(conflicts)}건 - {pairs}")
 
 def format_d_time(dt):
     """ datetime -> 'D1 1320' 변환 """
@@ -45,24 +50,17 @@ def natural_sort_key(s):
 
 # --- 3. 데이터 로드 ---
 def load_data(uploaded_file):
+    # 같은 파일(내용 해시 기준)은 캐시에서 바로 로드
     if uploaded_file:
-        df = pd.read_excel(uploaded_file)
+        df, invalid = load_schedule_excel(uploaded_file.getvalue(), BASE_DATE)
     else:
         # 샘플 데이터
         df = pd.DataFrame([
             {"Resource": "#1", "Start_D": "D1 1320", "End_D": "D2 1620", "Label": "LAX", "Color": "#FFB6C1"},
             {"Resource": "#2", "Start_D": "D1 2155", "End_D": "D2 0540", "Label": "EWR", "Color": "#ADD8E6"},
         ])
-    
-    # 필수 컬럼 보정
-    for col, default in [('Color', '#ADD8E6'), ('Resource', 'Unassigned'), ('Label', 'Flight')]:
-        if col not in df.columns: df[col] = default
-            
-    # Start/End Datetime 계산
-    if 'Start_D' in df.columns:
-        df['Start'] = df['Start_D'].apply(parse_d_time)
-        df['End'] = df['End_D'].apply(parse_d_time)
-        
+        # 필수 컬럼 보정 + Start/End 계산
+        df, invalid = normalize_schedule(df, BASE_DATE)
     return df
 
 # --- 4. 사이드바: 기본 설정 ---
@@ -160,36 +158,33 @@ edited_df = st.data_editor(
 if not edited_df.equals(st.session_state.schedule_df):
     st.session_state.schedule_df = edited_df
     # 날짜 재계산 (직접 입력한 텍스트 -> Datetime 변환)
-    st.session_state.schedule_df['Start'] = st.session_state.schedule_df['Start_D'].apply(parse_d_time)
-    st.session_state.schedule_df['End'] = st.session_state.schedule_df['End_D'].apply(parse_d_time)
+    df = st.session_state.schedule_df
+    df['Start'], _ = parse_d_time_series(df['Start_D'], BASE_DATE)
+    df['End'], _ = parse_d_time_series(df['End_D'], BASE_DATE)
     st.rerun()
 
 # --- 7. 시각화 데이터 준비 ---
 final_df = st.session_state.schedule_df.copy()
+# 시간 형식 오류 행은 차트에서 빠지므로 경고로 알림
+warn_invalid_d_time(final_df, (final_df['Start'].isna() | final_df['End'].isna()).to_numpy())
+# 추가/표 편집 후 같은 기재 겹침 확인
+warn_conflicts(final_df)
 
 groups = [{"id": res, "content": f"<b>{res}</b>", "order": i} for i, res in enumerate(all_resources)]
-items = []
-
-for i, row in final_df.iterrows():
-    if pd.isna(row['Start']) or pd.isna(row['End']): continue
-    c_val = row['Color'] if not pd.isna(row['Color']) else '#ADD8E6'
-    items.append({
-        "id": i,
-        "group": row['Resource'],
-        "content": str(row['Label']),
-        "start": row['Start'].isoformat(),
-        "end": row['End'].isoformat(),
-        "style": f"background-color: {c_val}; border-color: black;"
-    })
+# 컬럼 단위 Payload (epoch ms + 색상 class)
+payload_json, color_css = build_timeline_payload(final_df, all_resources)
 
 # --- 8. Vis.js 타임라인 ---
+if missing_vendor_assets():
+    st.warning(f"⚠️ 타임라인 라이브러리 파일 없음 (static/vendor/: {', '.join(missing_vendor_assets())}) - "
+               "CDN에서 대신 읽으므로 인터넷이 안 되는 서버에서는 차트가 표시되지 않습니다. fetch_assets.py로 받아 두세요.")
 html_code = f"""
 <!DOCTYPE html>
 <html>
 <head>
-  <script type="text/javascript" src="https://cdnjs.cloudflare.com/ajax/libs/vis-timeline/7.7.2/vis-timeline-graph2d.min.js"></script>
-  <link href="https://cdnjs.cloudflare.com/ajax/libs/vis-timeline/7.7.2/vis-timeline-graph2d.min.css" rel="stylesheet" type="text/css" />
+  {TIMELINE_ASSET_TAGS}
   <style>
+{color_css}
     body {{ font-family: 'Segoe UI', sans-serif; background-color: white; margin: 0; }}
     #visualization {{ border: 1px solid #ddd; height: 600px; }}
     .vis-time-axis .vis-text {{ font-weight: bold; color: #333; }}
@@ -202,20 +197,23 @@ html_code = f"""
 <button class="btn-copy" onclick="exportData()">💾 차트 데이터 복사</button>
 <span id="msg" style="color: green; margin-left: 10px;"></span>
 <script>
+{TIMELINE_JS_HELPERS}
   try {{
       var groups = new vis.DataSet({json.dumps(groups)});
-      var items = new vis.DataSet({json.dumps(items)});
+      var payload = {payload_json};
+      var items = new vis.DataSet(decodeItems(payload));
       var container = document.getElementById('visualization');
       
       var options = {{
         groupOrder: 'order',
         editable: true, stack: false, margin: {{ item: 5, axis: 5 }}, orientation: 'top',
-        min: '2024-01-01 00:00:00', max: '2024-01-08 00:00:00',
-        start: '2024-01-01 00:00:00', end: '2024-01-08 00:00:00',
+        min: '2024-01-01T00:00:00Z', max: '2024-01-08T00:00:00Z',
+        start: '2024-01-01T00:00:00Z', end: '2024-01-08T00:00:00Z',
+        moment: function(date) {{ return vis.moment(date).utc(); }},
         zoomMin: 1000 * 60 * 60 * 6, zoomMax: 1000 * 60 * 60 * 24 * 7,
         format: {{
-          minorLabels: function(date, scale, step) {{ return new Date(date).getHours() + 'h'; }},
-          majorLabels: function(date, scale, step) {{ return 'D' + new Date(date).getDate(); }}
+          minorLabels: function(date, scale, step) {{ return new Date(date).getUTCHours() + 'h'; }},
+          majorLabels: function(date, scale, step) {{ return 'D' + new Date(date).getUTCDate(); }}
         }},
         snap: function (date, scale, step) {{ var m = 10 * 60 * 1000; return Math.round(date / m) * m; }}
       }};
@@ -225,8 +223,8 @@ html_code = f"""
       function exportData() {{
         var data = items.get();
         var simpl = data.map(function(item) {{
-            return {{ "Resource": item.group, "Start_ISO": item.start, "End_ISO": item.end, "Label": item.content, 
-                      "Color": item.style ? item.style.split(';')[0].split(':')[1].trim() : '#ADD8E6' }};
+            return {{ "Resource": item.group, "Start_ISO": toNaiveIso(item.start), "End_ISO": toNaiveIso(item.end), "Label": item.content, 
+                      "Color": itemColor(payload, item) }};
         }});
         navigator.clipboard.writeText(JSON.stringify(simpl)).then(function() {{
             document.getElementById('msg').innerText = "복사 완료! 아래에 붙여넣으세요.";
@@ -251,27 +249,11 @@ json_input = st.text_area("위의 '차트 데이터 복사' 버튼을 누른 후
 
 if json_input:
     try:
-        new_data = json.loads(json_input)
-        processed_rows = []
-        for row in new_data:
-            s_dt = pd.to_datetime(row['Start_ISO'])
-            e_dt = pd.to_datetime(row['End_ISO'])
-            processed_rows.append({
-                "Resource": row['Resource'],
-                "Start_D": format_d_time(s_dt), "End_D": format_d_time(e_dt),
-                "Label": row['Label'], "Color": row['Color']
-            })
-        
-        export_df = pd.DataFrame(processed_rows)
-        export_df['Resource'] = pd.Categorical(export_df['Resource'], categories=all_resources, ordered=True)
-        export_df = export_df.sort_values('Resource')
-
-        def to_excel(df):
-            output = BytesIO()
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                df.to_excel(writer, index=False)
-            return output.getvalue()
-
-        st.download_button("📥 엑셀 다운로드", to_excel(export_df), 'schedule_final.xlsx')
+        export_df = parse_pasted_schedule(json_input, BASE_DATE)
+        # 붙여넣은 (차트에서 이동한) 스케줄도 저장 전에 겹침 확인
+        warn_conflicts(normalize_schedule(export_df.copy(), BASE_DATE)[0])
+        output = BytesIO()
+        write_schedule_excel(export_df, output)
+        st.download_button("📥 엑셀 다운로드", output.getvalue(), 'schedule_final.xlsx')
     except Exception as e:
         st.error(f"오류: {e}")
\ No newline at end of file
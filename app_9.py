@@ -1,82 +1,190 @@
 import streamlit as st
 import pandas as pd
 import json
-from datetime import datetime, timedelta, time
-import streamlit.components.v1 as components
+from datetime import date, datetime, timedelta, time
 from io import BytesIO
 import re
+from collections import deque
+from optimizer import optimize_schedule, parse_turnaround_rules, turnaround_minutes
+from conflicts import ResourceIntervals, find_conflicts
+from schedule_io import file_digest, load_schedule_excel, normalize_schedule, write_schedule_excel
+from schedule_frame import compact_schedule, expand_schedule, append_rows, concat_rows, recurring_rows
+from schedule_history import ScheduleHistory, ScheduleSnapshot
+from schedule_store import ScheduleStore, SharedSchedule
+from d_time import format_d_time_series, WEEK_MINUTES
+from timeline import build_timeline_payload, apply_timeline_delta, TimelineWindowIndex, window_range, missing_vendor_assets
+from timeline_component import timeline_editor, pending_deltas, requested_view
+from profiler import Profiler, PROFILE_LOG, stage
+from analytics import fleet_utilization
 
 # --- 1. 페이지 설정 및 초기화 ---
 st.set_page_config(layout="wide", page_title="B787-9 Rotation (Final)")
 st.title("✈️ AC Rotation Scheduler")
+# 이번 rerun의 단계별 실행 시간 측정 (optimizer 등 다른 모듈의 stage()도 함께 기록)
+profiler = Profiler().activate()
 
-BASE_DATE = datetime(2024, 1, 1)
+# 계획 기간: 1주(기본) ~ 시즌 전체. 스케줄은 시작일(D1 0000) 기준 분 오프셋으로 보관하므로 시작일은 날짜 표시에만 영향
+with st.sidebar.expander("📅 계획 기간", expanded=False):
+    horizon_weeks = st.number_input("기간(주)", 1, 30, 1, key='horizon_weeks', help="1주 반복 스케줄 ~ IATA 시즌(약 26~30주)")
+    season_start = st.date_input("시작일 (D1)", date(2024, 1, 1), key='season_start')
+BASE_DATE = datetime.combine(season_start, time())
+HORIZON_DAYS = 7 * horizon_weeks
+HORIZON_MINUTES = horizon_weeks * WEEK_MINUTES
 
+# 스케줄은 압축 표현(schedule_frame: 분 오프셋 + Categorical)으로 보관, datetime/D-Time 컬럼은 필요할 때 생성
 if 'schedule_df' not in st.session_state:
     st.session_state.schedule_df = None
 if 'custom_resources' not in st.session_state:
     st.session_state.custom_resources = []
 if 'deleted_resources' not in st.session_state:
     st.session_state.deleted_resources = []
+# 타임라인 컴포넌트 동기화 상태 (마지막으로 반영한 Delta 번호, 브라우저 임시 id -> index)
+if 'timeline_ack' not in st.session_state:
+    st.session_state.timeline_ack = 0
+if 'timeline_ids' not in st.session_state:
+    st.session_state.timeline_ids = {}
+# 대용량 모드 화면 구간 (epoch ms, 첫 기재 행 번호, 마지막으로 반영한 요청 번호)
+if 'timeline_view' not in st.session_state:
+    st.session_state.timeline_view = {"row": 0, "seq": 0}
+# 주간 순환 최적화 결과 (다음 주로 이어지는 Lane 순서 목록)
+if 'rotations' not in st.session_state:
+    st.session_state.rotations = []
+# 스케줄 버전 (스케줄이 바뀔 때마다 +1), 버전 기준으로 캐시한 산출물 (엑셀, 타임라인 Payload 등)
+if 'schedule_version' not in st.session_state:
+    st.session_state.schedule_version = 0
+if 'artifacts' not in st.session_state:
+    st.session_state.artifacts = {}
+# 마지막으로 불러온 업로드 파일 해시 (같은 파일이면 다시 불러와 편집 내용을 덮어쓰지 않음)
+if 'upload_digest' not in st.session_state:
+    st.session_state.upload_digest = None
+# 되돌리기/다시 실행 목록 (변경된 행만 기록, schedule_history 참고)
+if 'history' not in st.session_state:
+    st.session_state.history = ScheduleHistory()
+# 저장소(SQLite)에서 불러왔거나 저장한 스케줄 이름
+if 'store_name' not in st.session_state:
+    st.session_state.store_name = "default"
+# 공유 편집 중인 작업본 (SharedSchedule, 여러 세션이 행 단위로 병합)
+if 'shared' not in st.session_state:
+    st.session_state.shared = None
+# 최근 실행(rerun)별 단계 소요 시간 (사이드바 '단계별 실행 시간')
+if 'profiles' not in st.session_state:
+    st.session_state.profiles = deque(maxlen=10)
+# 계획 기간이 바뀌면 화면 구간을 첫 주로 되돌리고, 날짜/기간이 들어간 산출물(차트, 엑셀 등)은 다시 생성
+horizon_start = int(pd.Timestamp(BASE_DATE).value // 10**6)
+if st.session_state.get('horizon') != (horizon_start, horizon_weeks):
+    st.session_state.horizon = (horizon_start, horizon_weeks)
+    st.session_state.timeline_view.update(start=horizon_start, end=horizon_start + 7 * 24 * 3600 * 1000)
+    st.session_state.artifacts = {}
+# 스케줄과 함께 되돌릴 세션 값
+HISTORY_STATE_KEYS = ('custom_resources', 'deleted_resources', 'rotations')
 
 # --- 2. 헬퍼 함수 ---
-def parse_d_time(d_str):
-    try:
-        if pd.isna(d_str): return BASE_DATE
-        d_str = str(d_str).strip()
-        parts = d_str.split()
-        if len(parts) < 2: return BASE_DATE
-        day_match = re.search(r'\d+', parts[0])
-        day_offset = int(day_match.group()) - 1 if day_match else 0
-        time_part = parts[1].replace(":", "")
-        return BASE_DATE + timedelta(days=day_offset, hours=int(time_part[:2]), minutes=int(time_part[2:]))
-    except:
-        return BASE_DATE
-
-def format_d_time(dt):
-    if pd.isna(dt): return ""
-    if dt.tzinfo is not None: dt = dt.tz_localize(None)
-    diff = dt - BASE_DATE
-    day_num = (diff.days % 7) + 1
-    return f"D{day_num} {dt.hour:02d}{dt.minute:02d}"
+def finish_profile(note=""):
+    """ 이번 실행의 측정 결과 보관 (+ 로그 파일 기록을 켠 경우 한 줄 추가) """
+    st.session_state.profiles.append(profiler.finish(note))
+    if st.session_state.get('profile_log'):
+        df = st.session_state.schedule_df
+        profiler.append_log(PROFILE_LOG, legs=0 if df is None else len(df))
+
+def rerun():
+    """ st.rerun() 전에 이번 실행의 측정 결과 보관 (최적화/편집 직후 실행 시간도 볼 수 있도록) """
+    finish_profile("(→ rerun)")
+    st.rerun()
+
+def warn_invalid_d_time(df, invalid):
+    """ 시간 형식 오류 행을 숨기지 않고 경고로 표시 """
+    if invalid.any():
+        rows = ", ".join(str(i) for i in df.index[invalid][:10])
+        st.warning(f"⚠️ 시간 형식 오류 {int(invalid.sum())}건 (예: D1 1320) - 행: {rows}")
+
+def mark_schedule_changed():
+    """ schedule_df를 바꾼 뒤 호출 -> 버전이 바뀌어 캐시한 산출물을 다시 만듦 """
+    st.session_state.schedule_version += 1
+
+def take_snapshot(ids=None):
+    """ 변경 직전 상태 (ids: 제자리 변경할 행만 복사, 생략 시 새 DataFrame으로 바꾸는 작업) """
+    state = {k: st.session_state[k] for k in HISTORY_STATE_KEYS}
+    return ScheduleSnapshot(st.session_state.schedule_df, ids, state)
+
+def sync_shared(push=True, keep_local=None):
+    """ 공유 편집 중이면 로컬 변경 push + 다른 세션 변경 pull (keep_local 지정 시 충돌 행 해결 후 동기화) """
+    shared = st.session_state.shared
+    if shared is None:
+        return None
+    with stage('shared.sync'):
+        if keep_local is None:
+            st.session_state.schedule_df, result = shared.sync(st.session_state.schedule_df, push)
+        else:
+            st.session_state.schedule_df, result = shared.resolve(st.session_state.schedule_df, keep_local)
+    if result['id_map']:
+        # 저장소가 새 행 id를 다시 발급한 경우 되돌리기 기록/타임라인 임시 id도 함께 변경
+        st.session_state.history.rename(result['id_map'])
+        st.session_state.timeline_ids = {k: result['id_map'].get(v, v) for k, v in st.session_state.timeline_ids.items()}
+    if result['pulled'] or result['id_map'] or keep_local is not None:
+        mark_schedule_changed()
+    return result
+
+def commit_edit(snapshot, label):
+    """ schedule_df 변경 후 호출 -> 변경분을 되돌리기 목록에 기록하고 버전 갱신 (공유 편집 중이면 동기화) """
+    state = {k: st.session_state[k] for k in HISTORY_STATE_KEYS}
+    st.session_state.history.record(snapshot.diff(label, st.session_state.schedule_df, state))
+    mark_schedule_changed()
+    sync_shared()
+
+def restore_edit(action):
+    """ history.undo / history.redo 결과를 세션에 반영 """
+    df, state, label = action(st.session_state.schedule_df)
+    st.session_state.schedule_df = df
+    for k, v in state.items():
+        st.session_state[k] = v
+    mark_schedule_changed()
+    sync_shared()
+    return label
+
+def cached_artifact(name, key, build):
+    """ 스케줄 버전 + key(옵션)가 같으면 build()를 다시 호출하지 않고 이전 결과 반환 (이름별 최신 1개만 보관) """
+    full_key = (st.session_state.schedule_version,) + tuple(key)
+    cached = st.session_state.artifacts.get(name)
+    if cached is None or cached[0] != full_key:
+        with stage(name):
+            cached = (full_key, build())
+        st.session_state.artifacts[name] = cached
+    return cached[1]
+
+def schedule_view():
+    """ 압축 스케줄 + Start/End(datetime) 컬럼 = 겹침 검사/최적화/차트용 DataFrame (스케줄 버전별 1회 생성) """
+    return cached_artifact('view', (), lambda: expand_schedule(st.session_state.schedule_df, BASE_DATE))
+
+@st.cache_resource
+def get_store():
+    """ SQLite 스케줄 저장소 (경로: 환경 변수 SCHEDULE_DB, 기본 schedules.db) """
+    return ScheduleStore()
 
 def natural_sort_key(s):
     return [int(text) if text.isdigit() else text.lower() for text in re.split(r'(\d+)', str(s))]
 
 # --- 3. 최적화 알고리즘 함수 ---
-def run_optimization(df):
+def run_optimization(df, turnaround=None, mode="linear", balance=0, buffer=60):
+    """
+    turnaround: 스케줄별 최소 지상 시간(분), mode: linear / cyclic / station (optimizer.optimize_schedule 참고)
+    balance: 부하 균형 탐색 시간(초, linear만), buffer: 목표 지상 여유(분) - 진행 상황은 사이드바 진행 막대에 표시
+    """
     if df.empty: return df
-    df_opt = df.copy()
-    
-    # 1. 시작 시간(Start) 우선, 그 다음 종료 시간(End) 순으로 정렬
-    df_opt = df_opt.sort_values(by=['Start', 'End'])
-    
-    lanes_end_times = [] # 각 Lane의 마지막 스케줄 종료 시간 추적
+    st.session_state.balance_summary = None
+    bar = st.sidebar.progress(0.0, text="부하 균형 탐색 중...") if balance and mode == "linear" else None
+    def progress(balancer):
+        # 중간에 멈춰도 지금까지의 최선 배정이 결과 (LaneBalancer 참고)
+        bar.progress(min(balancer.elapsed / balance, 1.0),
+                     text=f"부하 균형: 비용 {balancer.cost / max(balancer.initial_cost, 1):.1%} ({balancer.iterations:,}회)")
+        st.session_state.balance_summary = balancer.summary()
+    with stage('optimize'):
+        df_opt, max_lane, st.session_state.rotations = optimize_schedule(
+            expand_schedule(df, BASE_DATE), turnaround, mode, period=HORIZON_MINUTES, origin=BASE_DATE,
+            balance=balance, buffer=buffer, progress=progress
+        )
     
-    for idx, row in df_opt.iterrows():
-        start = row['Start']
-        end = row['End']
-        assigned_lane_index = -1
-        
-        # 2. 기존 Lane들을 순회하며 들어갈 수 있는(겹치지 않는) 첫 번째 공간 탐색
-        for i, last_end in enumerate(lanes_end_times):
-            if start >= last_end: 
-                assigned_lane_index = i
-                lanes_end_times[i] = end 
-                break
-        
-        # 3. 들어갈 공간이 없으면 새로운 Lane 추가
-        if assigned_lane_index == -1:
-            lanes_end_times.append(end)
-            assigned_lane_index = len(lanes_end_times) - 1
-        
-        # 4. Resource 이름 재할당 (#1, #2, ...)
-        res_name = f"#{assigned_lane_index + 1}"
-        df_opt.at[idx, 'Resource'] = res_name
-        
-    # 5. 세션 상태 업데이트: 필요한 Lane 수에 맞춰 Custom Resources 정리
+    # 세션 상태 업데이트: 필요한 Lane 수에 맞춰 Custom Resources 정리
     # 기본 8개(#1~#8)를 초과하는 Lane만 custom_resources에 등록
-    max_lane = len(lanes_end_times)
     new_custom = []
     if max_lane > 8:
         for i in range(9, max_lane + 1):
@@ -87,51 +195,167 @@ def run_optimization(df):
     # 최적화 후에는 모든 Lane이 보여야 하므로 삭제 목록 초기화
     st.session_state.deleted_resources = []
     
-    return df_opt
+    with stage('optimize.compact'):
+        return compact_schedule(df_opt, BASE_DATE)
 
 # --- 4. 데이터 로드 ---
 def load_data(uploaded_file):
+    # 같은 파일(내용 해시 기준)은 캐시에서 바로 로드
     if uploaded_file:
-        df = pd.read_excel(uploaded_file)
+        df, invalid = load_schedule_excel(uploaded_file.getvalue(), BASE_DATE)
     else:
         df = pd.DataFrame([
             {"Resource": "#1", "Start_D": "D1 1320", "End_D": "D2 1620", "Label": "LAX", "Color": "#FFB6C1"},
             {"Resource": "#2", "Start_D": "D1 2155", "End_D": "D2 0540", "Label": "EWR", "Color": "#ADD8E6"},
         ])
-    for col, default in [('Color', '#ADD8E6'), ('Resource', 'Unassigned'), ('Label', 'Flight')]:
-        if col not in df.columns: df[col] = default
-    if 'Start_D' in df.columns:
-        df['Start'] = df['Start_D'].apply(parse_d_time)
-        df['End'] = df['End_D'].apply(parse_d_time)
-    return df
+        # 필수 컬럼 보정 + Start/End 계산
+        df, invalid = normalize_schedule(df, BASE_DATE)
+    warn_invalid_d_time(df, invalid)
+    return compact_schedule(df, BASE_DATE)
 
 # --- 5. 사이드바 설정 ---
 st.sidebar.header("1. 데이터 파일")
 uploaded_file = st.sidebar.file_uploader("엑셀 업로드", type=["xlsx"])
-if st.session_state.schedule_df is None or uploaded_file is not None:
-    if uploaded_file:
-        st.session_state.schedule_df = load_data(uploaded_file)
-    elif st.session_state.schedule_df is None:
-        st.session_state.schedule_df = load_data(None)
+if uploaded_file is not None:
+    digest = file_digest(uploaded_file.getvalue())
+    if digest != st.session_state.upload_digest:
+        with stage('load.excel'):
+            st.session_state.schedule_df = load_data(uploaded_file)
+        st.session_state.upload_digest = digest
+        st.session_state.history.clear()
+        st.session_state.shared = None
+        mark_schedule_changed()
+elif st.session_state.schedule_df is None:
+    st.session_state.schedule_df = load_data(None)
+    mark_schedule_changed()
+
+with st.sidebar.expander("💾 저장소 (저장/불러오기/버전)", expanded=False):
+    store = get_store()
+    store_name = st.text_input("스케줄 이름", st.session_state.store_name)
+    if st.button("💾 작업본 저장") and store_name:
+        # 저장된 작업본과 비교해 바뀐 행만 기록
+        with stage('store.save'):
+            result = store.save(store_name, st.session_state.schedule_df, BASE_DATE)
+        st.session_state.store_name = store_name
+        st.toast(f"저장 (rev {result['revision']}): 추가 {result['added']} / 변경 {result['updated']} / 삭제 {result['deleted']}", icon="💾")
+    version_name = st.text_input("버전 이름 (예: 2024S 확정안)")
+    if st.button("🏷️ 버전 저장") and store_name and version_name:
+        store.save(store_name, st.session_state.schedule_df, BASE_DATE)
+        rows = store.save_version(store_name, version_name)
+        st.session_state.store_name = store_name
+        st.toast(f"버전 '{version_name}' 저장 ({rows}행)", icon="🏷️")
+
+    saved = store.list_schedules()
+    if not saved.empty:
+        st.caption("저장된 스케줄")
+        load_name = st.selectbox("불러올 스케줄", saved['name'].tolist(),
+                                 format_func=lambda n: f"{n} ({int(saved.set_index('name').at[n, 'legs'])}행)")
+        versions = store.list_versions(load_name)['name'].tolist()
+        load_version = st.selectbox("버전", ["(작업본)"] + versions)
+        if st.button("📂 불러오기"):
+            with stage('load.store'):
+                st.session_state.schedule_df = store.load(load_name, None if load_version == "(작업본)" else load_version)
+            st.session_state.store_name = load_name
+            st.session_state.history.clear()
+            st.session_state.shared = None
+            mark_schedule_changed()
+            rerun()
+
+with st.sidebar.expander("👥 공유 편집 (여러 세션 동시 편집)", expanded=st.session_state.shared is not None):
+    shared = st.session_state.shared
+    if shared is None:
+        st.caption("저장된 스케줄을 여러 사람이 함께 편집 (변경한 행만 주고받고, 같은 행을 동시에 바꾼 경우만 충돌로 표시)")
+        if not saved.empty and st.button("🔗 공유 편집 시작"):
+            shared = SharedSchedule(store, load_name)
+            st.session_state.schedule_df = shared.checkout()
+            st.session_state.shared = shared
+            st.session_state.store_name = load_name
+            st.session_state.history.clear()
+            mark_schedule_changed()
+            rerun()
+    else:
+        st.caption(f"공유 중: **{shared.name}** (rev {shared.revision})")
+        c1, c2 = st.columns(2)
+        if c1.button("🔄 동기화"):
+            result = sync_shared()
+            st.toast(f"보냄 {result['pushed']} / 받음 {result['pulled']} / 충돌 {result['conflicts']}", icon="🔄")
+        if c2.button("공유 종료"):
+            st.session_state.shared = None
+            rerun()
+
+# 다른 세션이 저장한 변경분 반영 (revision 이후 바뀐 행만)
+if st.session_state.shared is not None and st.session_state.shared.has_remote_changes():
+    sync_shared(push=False)
+if st.session_state.shared is not None and st.session_state.shared.conflicts:
+    shared = st.session_state.shared
+    st.sidebar.warning(f"⚠️ 다른 세션과 같은 스케줄을 동시에 변경 {len(shared.conflicts)}건 (행: {', '.join(map(str, shared.conflicts[:10]))})")
+    c1, c2 = st.sidebar.columns(2)
+    if c1.button("다른 세션 값 사용"):
+        sync_shared(keep_local=False)
+        rerun()
+    if c2.button("내 값으로 덮어쓰기"):
+        sync_shared(keep_local=True)
+        rerun()
+
+history = st.session_state.history
+c1, c2 = st.sidebar.columns(2)
+if c1.button("↩️ 되돌리기", disabled=not history.undo_stack,
+             help=history.undo_stack[-1].label if history.undo_stack else None):
+    st.toast(f"되돌림: {restore_edit(history.undo)}", icon="↩️")
+    rerun()
+if c2.button("↪️ 다시 실행", disabled=not history.redo_stack,
+             help=history.redo_stack[-1].label if history.redo_stack else None):
+    st.toast(f"다시 실행: {restore_edit(history.redo)}", icon="↪️")
+    rerun()
 
 st.sidebar.markdown("---")
 st.sidebar.header("2. 기재(Row) 관리")
+with st.sidebar.expander("⏱️ 최소 지상 시간 (Turnaround)", expanded=False):
+    min_ground = st.number_input("기본 지상 시간(분)", 0, 720, 0, 5)
+    ground_rules = st.text_area("공항/Label별 예외 (예: LAX=90, ICN-LAX=120)", height=80)
+with st.sidebar.expander("⚖️ 부하 균형 (기재별 블록 시간 / 지상 여유)", expanded=False):
+    balance_s = st.slider("탐색 시간(초, 0 = 사용 안 함)", 0, 60, 0,
+                          help="최소 기재 수로 배정한 뒤 남은 시간 동안 기재 사이 스케줄 이동/교환 (1주 직선 방식만)")
+    buffer_min = st.number_input("목표 지상 여유(분)", 0, 600, 60, 15, help="최소 지상 시간 외에 이만큼 여유가 있도록")
+OPT_MODES = {"1주 (직선)": "linear", f"주기 순환 (D{HORIZON_DAYS}→D1 연결)": "cyclic", "공항 연결 (ICN-LAX → LAX-…)": "station"}
+opt_mode = st.sidebar.radio("최적화 방식", list(OPT_MODES))
 if st.sidebar.button("🚀 Optimizer", type="primary"):
     if st.session_state.schedule_df is not None and not st.session_state.schedule_df.empty:
-        optimized_df = run_optimization(st.session_state.schedule_df)
-        st.session_state.schedule_df = optimized_df
-        st.toast("최적화 완료!", icon="✅")
-        st.rerun()
+        try:
+            by_station, by_label = parse_turnaround_rules(ground_rules)
+            turnaround = turnaround_minutes(st.session_state.schedule_df['Label'], min_ground, by_station, by_label)
+        except ValueError as e:
+            st.sidebar.error(str(e))
+        else:
+            snapshot = take_snapshot()
+            optimized_df = run_optimization(st.session_state.schedule_df, turnaround, OPT_MODES[opt_mode],
+                                            balance_s, buffer_min)
+            st.session_state.schedule_df = optimized_df
+            commit_edit(snapshot, f"최적화 ({opt_mode})")
+            summary = st.session_state.get('balance_summary')
+            if summary:
+                st.toast(f"최적화 완료! 기재별 블록 시간 {summary['block_min_h']:.1f}~{summary['block_max_h']:.1f}h "
+                         f"(편차 {summary['block_std_h']:.1f}h, {summary['iterations']:,}회 탐색)", icon="✅")
+            else:
+                st.toast("최적화 완료!", icon="✅")
+            rerun()
+
+if st.session_state.rotations:
+    with st.sidebar.expander(f"🔁 주간 순환 로테이션 ({len(st.session_state.rotations)}개)", expanded=False):
+        for cycle in st.session_state.rotations:
+            st.write(" → ".join(cycle + cycle[:1]) + f"  ({len(cycle)}주 주기)")
 
 with st.sidebar.expander("➕ 기재(Row) 추가", expanded=False):
     new_row_name = st.text_input("추가할 기재 이름")
     if st.button("추가 확인"):
         if new_row_name:
+            snapshot = take_snapshot(ids=[])
             if new_row_name not in st.session_state.custom_resources:
                 st.session_state.custom_resources.append(new_row_name)
             if new_row_name in st.session_state.deleted_resources:
                 st.session_state.deleted_resources.remove(new_row_name)
-            st.rerun()
+            commit_edit(snapshot, f"기재 추가 ({new_row_name})")
+            rerun()
 
 base_resources = [f"#{i}" for i in range(1, 9)]
 existing = st.session_state.schedule_df['Resource'].unique().tolist()
@@ -146,13 +370,15 @@ with st.sidebar.expander("➖ 기재(Row) 제거", expanded=False):
     del_target = st.selectbox("제거할 기재 선택", options=all_resources)
     if st.button("제거 확인"):
         if del_target:
+            snapshot = take_snapshot()
             st.session_state.deleted_resources.append(del_target)
             if del_target in st.session_state.custom_resources:
                 st.session_state.custom_resources.remove(del_target)
             st.session_state.schedule_df = st.session_state.schedule_df[
                 st.session_state.schedule_df['Resource'] != del_target
             ]
-            st.rerun()
+            commit_edit(snapshot, f"기재 제거 ({del_target})")
+            rerun()
 
 st.sidebar.markdown("---")
 st.sidebar.header("3. 스케줄 추가")
@@ -163,7 +389,7 @@ with st.sidebar.form("add_task_form", clear_on_submit=True):
         f_lbl = st.text_input("목적지", "ICN-LAX")
         f_col = st.color_picker("색상", "#90EE90")
     with c2:
-        f_day = st.selectbox("출발일", [f"D{i}" for i in range(1,8)])
+        f_day = st.selectbox("출발일", [f"D{i}" for i in range(1, HORIZON_DAYS + 1)])
         f_time = st.time_input("출발시간", time(10,0))
         dur_h = st.number_input("시간(H)", 0, 24, 10)
         dur_m = st.number_input("분(M)", 0, 59, 0, 10)
@@ -171,224 +397,185 @@ with st.sidebar.form("add_task_form", clear_on_submit=True):
         day_off = int(f_day[1:]) - 1
         s_dt = BASE_DATE + timedelta(days=day_off, hours=f_time.hour, minutes=f_time.minute)
         e_dt = s_dt + timedelta(hours=dur_h, minutes=dur_m)
-        new_row = pd.DataFrame([{
-            "Resource": f_res, "Label": f_lbl, "Color": f_col,
-            "Start_D": format_d_time(s_dt), "End_D": format_d_time(e_dt),
-            "Start": s_dt, "End": e_dt
-        }])
-        st.session_state.schedule_df = pd.concat([st.session_state.schedule_df, new_row], ignore_index=True)
-        st.rerun()
+        # 추가 전에 같은 기재의 기존 스케줄과 겹치는지 확인 (O(log n) 조회)
+        intervals = cached_artifact('intervals', (), lambda: ResourceIntervals.from_frame(schedule_view()))
+        clash = intervals.conflicts(f_res, s_dt, e_dt)
+        if clash:
+            st.toast(f"{f_res} 기재의 기존 스케줄 {len(clash)}건과 시간이 겹칩니다.", icon="⚠️")
+        new_id = int(st.session_state.schedule_df.index.max()) + 1 if len(st.session_state.schedule_df) else 0
+        new_row = pd.DataFrame([{"Resource": f_res, "Label": f_lbl, "Color": f_col, "Start": s_dt, "End": e_dt}], index=[new_id])
+        snapshot = take_snapshot(ids=[])
+        version = st.session_state.schedule_version
+        st.session_state.schedule_df = append_rows(st.session_state.schedule_df, new_row, BASE_DATE)
+        commit_edit(snapshot, f"스케줄 추가 ({f_res} {f_lbl})")
+        if st.session_state.schedule_version == version + 1:
+            # 다른 세션 변경을 받지 않았으면 인덱스를 다시 만들지 않고 새 행만 삽입해 다음 추가에 재사용
+            intervals.insert(f_res, s_dt, e_dt, new_id)
+            st.session_state.artifacts['intervals'] = ((st.session_state.schedule_version,), intervals)
+        rerun()
+
+with st.sidebar.expander("🔁 반복 스케줄 일괄 추가 (운항 요일)", expanded=False):
+    st.caption("편마다 한 줄 (엑셀에서 붙여넣기 가능): 운항 요일 1357 = D1·D3·D5·D7 / 매일, "
+               f"출발·비행 시간 HHMM, 주기 1 = 매주 · 2 = 격주 → 계획 기간(D1~D{HORIZON_DAYS}) 전체에 생성")
+    flights = st.data_editor(
+        pd.DataFrame({"Resource": ["#1"], "Label": ["ICN-LAX"], "Color": ["#90EE90"], "Days": ["1357"],
+                      "Time": ["1000"], "Duration": ["1100"], "Every": [1]}),
+        num_rows="dynamic", hide_index=True, key="recurring_flights",
+        column_config={
+            "Resource": st.column_config.SelectboxColumn("기재", options=all_resources, required=True),
+            "Label": st.column_config.TextColumn("목적지", required=True),
+            "Color": st.column_config.TextColumn("색상"),
+            "Days": st.column_config.TextColumn("운항 요일", required=True),
+            "Time": st.column_config.TextColumn("출발", required=True),
+            "Duration": st.column_config.TextColumn("비행", required=True),
+            "Every": st.column_config.NumberColumn("주기(주)", min_value=1, max_value=30, step=1),
+        },
+    )
+    if st.button("🔁 일괄 생성", disabled=flights.empty):
+        flights = flights.assign(Color=flights['Color'].fillna("#90EE90"))
+        # 모든 편 x 운항일을 한 번에 만들어 스케줄에 한 번만 추가
+        new_id = int(st.session_state.schedule_df.index.max()) + 1 if len(st.session_state.schedule_df) else 0
+        with stage('recurring_rows'):
+            rows, invalid = recurring_rows(flights, HORIZON_DAYS, new_id)
+        if invalid.any():
+            st.error(f"운항 요일/시간 형식 오류 {int(invalid.sum())}행: "
+                     + ", ".join(flights['Label'].astype(str).to_numpy()[invalid][:10]))
+        elif len(rows):
+            snapshot = take_snapshot(ids=[])
+            st.session_state.schedule_df = concat_rows(st.session_state.schedule_df, rows)
+            commit_edit(snapshot, f"반복 스케줄 추가 ({len(flights)}편 → {len(rows)}건)")
+            st.toast(f"반복 스케줄 {len(rows)}건 추가", icon="🔁")
+            rerun()
 
 # --- 6. 메인 화면 ---
-st.subheader("📊 클릭하여 선택 → 삭제/복제 → Save)")
+st.subheader("📊 드래그로 이동, 클릭하여 선택 → 삭제/복제 (자동 반영)")
 
 # --- 7. 시각화 데이터 준비 ---
-final_df = st.session_state.schedule_df.copy()
-final_df = final_df[final_df['Resource'].isin(all_resources)]
-
-groups = [{"id": res, "content": f"<b>{res}</b>", "order": i} for i, res in enumerate(all_resources)]
-items = []
-for i, row in final_df.iterrows():
-    if pd.isna(row['Start']) or pd.isna(row['End']): continue
-    c_val = row['Color'] if not pd.isna(row['Color']) else '#ADD8E6'
-    items.append({
-        "id": i, "group": row['Resource'], "content": str(row['Label']),
-        "start": row['Start'].isoformat(), "end": row['End'].isoformat(),
-        "style": f"background-color: {c_val}; border-color: black;"
-    })
-
-# --- 8. Vis.js 타임라인 (삭제/복제 JS 로직 추가) ---
-html_code = f"""
-<!DOCTYPE html>
-<html>
-<head>
-  <script type="text/javascript" src="https://cdnjs.cloudflare.com/ajax/libs/vis-timeline/7.7.2/vis-timeline-graph2d.min.js"></script>
-  <link href="https://cdnjs.cloudflare.com/ajax/libs/vis-timeline/7.7.2/vis-timeline-graph2d.min.css" rel="stylesheet" type="text/css" />
-  <script src="https://cdnjs.cloudflare.com/ajax/libs/html2canvas/1.4.1/html2canvas.min.js"></script>
-  <style>
-    body {{ font-family: 'Segoe UI', sans-serif; background-color: white; margin: 0; }}
-    #visualization {{ border: 1px solid #ddd; height: 600px; width: 100%; }}
-    .vis-time-axis .vis-text {{ font-weight: bold; color: #333; }}
-    .vis-item.vis-selected {{ border-color: red; border-width: 2px; box-shadow: 0 0 10px rgba(0,0,0,0.5); }} /* 선택 시 강조 */
-    
-    .btn-group {{ margin-top: 10px; display: flex; gap: 10px; }}
-    .btn {{ padding: 10px 15px; color: white; border: none; border-radius: 5px; cursor: pointer; font-weight: bold; }}
-    
-    .btn-save {{ background-color: #008CBA; }}
-    .btn-img {{ background-color: #4CAF50; }}
-    .btn-del {{ background-color: #f44336; }} /* 빨강 */
-    .btn-dup {{ background-color: #FF9800; }} /* 주황 */
-    .btn:hover {{ opacity: 0.9; }}
-  </style>
-</head>
-<body>
-<div id="visualization"></div>
-
-<div class="btn-group">
-    <button class="btn btn-del" onclick="deleteSelected()">🗑️ 선택 삭제 (Delete)</button>
-    <button class="btn btn-dup" onclick="duplicateSelected()">📑 선택 복제 (Duplicate)</button>
-    <button class="btn btn-save" onclick="saveData()">💾 Save Position</button>
-    <button class="btn btn-img" onclick="captureImage()">📸 이미지 저장</button>
-</div>
-<div id="msg" style="color: blue; margin-top: 5px; font-weight: bold; height: 20px;"></div>
-
-<script>
-  var timeline, items, container = document.getElementById('visualization');
-
-  function toLocalIsoString(date) {{
-      var dt = new Date(date);
-      var localDt = new Date(dt.getTime() - (dt.getTimezoneOffset() * 60000));
-      return localDt.toISOString().slice(0, 19); 
-  }}
-
-  // [NEW] 선택 항목 삭제 함수
-  function deleteSelected() {{
-    var selection = timeline.getSelection();
-    if (selection.length === 0) {{
-        alert("먼저 삭제할 Bar를 클릭해서 선택해주세요.");
-        return;
-    }}
-    if (confirm("선택한 스케줄을 삭제하시겠습니까?")) {{
-        items.remove(selection);
-        document.getElementById('msg').innerText = "🗑️ 삭제되었습니다. 'Save Position'을 눌러 확정하세요.";
-    }}
-  }}
-
-  // [NEW] 선택 항목 복제 함수
-  function duplicateSelected() {{
-    var selection = timeline.getSelection();
-    if (selection.length === 0) {{
-        alert("복제할 Bar를 클릭해서 선택해주세요.");
-        return;
-    }}
-    
-    var id = selection[0];
-    var item = items.get(id);
-    
-    // 복제본 생성
-    var newItem = JSON.parse(JSON.stringify(item)); // Deep Copy
-    newItem.id = new Date().getTime(); // 유니크 ID 생성 (현재시간 밀리초)
-    newItem.content = item.content + " (Copy)";
-    
-    // 약간 뒤로 이동시켜서 겹침 방지 (1시간 뒤)
-    var startDt = new Date(item.start);
-    var endDt = new Date(item.end);
-    startDt.setHours(startDt.getHours() + 1);
-    endDt.setHours(endDt.getHours() + 1);
-    
-    newItem.start = startDt;
-    newItem.end = endDt;
-    
-    items.add(newItem);
-    timeline.setSelection(newItem.id); // 새로 생긴 것 선택
-    document.getElementById('msg').innerText = "📑 복제되었습니다. 'Save Position'을 눌러 확정하세요.";
-  }}
-
-  function saveData() {{
-    if (!items) return;
-    var data = items.get();
-    var simpl = data.map(function(item) {{
-        return {{ 
-            "Resource": item.group, 
-            "Start_ISO": toLocalIsoString(item.start), 
-            "End_ISO": toLocalIsoString(item.end), 
-            "Label": item.content, 
-            "Color": item.style ? item.style.split(';')[0].split(':')[1].trim() : '#ADD8E6' 
-        }};
-    }});
-    navigator.clipboard.writeText(JSON.stringify(simpl)).then(function() {{
-        document.getElementById('msg').innerHTML = "✅ <b>데이터 복사 완료!</b> 하단에 붙여넣고 업데이트 하세요.";
-    }}).catch(function(err) {{
-        alert("복사 실패: " + err);
-    }});
-  }}
-
-  async function captureImage() {{
-    var msg = document.getElementById('msg');
-    msg.innerText = "⏳ 1000px 전체 캡처 중...";
-    var originalWidth = container.style.width;
-    try {{
-        container.style.width = "1000px";
-        timeline.setOptions({{ width: '1000px' }});
-        timeline.setWindow('2024-01-01 00:00:00', '2024-01-08 00:00:00', {{animation: false}});
-        timeline.redraw();
-        await new Promise(r => setTimeout(r, 1000));
-        const canvas = await html2canvas(container, {{ scale: 2, backgroundColor: "#ffffff", width: 1000, windowWidth: 1000, useCORS: true }});
-        var link = document.createElement('a');
-        link.download = 'Rotation_Schedule.png';
-        link.href = canvas.toDataURL("image/png");
-        document.body.appendChild(link); link.click(); document.body.removeChild(link);
-        msg.innerText = "✅ 이미지 저장 완료!";
-    }} catch(err) {{ alert("오류: " + err.message); }} 
-    finally {{
-        container.style.width = originalWidth;
-        timeline.setOptions({{ width: '100%' }});
-        timeline.setWindow('2024-01-01 00:00:00', '2024-01-08 00:00:00', {{animation: false}});
-        setTimeout(() => {{ msg.innerText = ""; }}, 3000);
-    }}
-  }}
-
-  try {{
-      var groups = new vis.DataSet({json.dumps(groups)});
-      items = new vis.DataSet({json.dumps(items)});
-      var options = {{
-        groupOrder: 'order', editable: true, stack: false, margin: {{ item: 5, axis: 5 }}, orientation: 'top',
-        min: '2024-01-01 00:00:00', max: '2024-01-08 00:00:00',
-        start: '2024-01-01 00:00:00', end: '2024-01-08 00:00:00',
-        zoomMin: 1000 * 60 * 60 * 6, zoomMax: 1000 * 60 * 60 * 24 * 7,
-        format: {{
-          minorLabels: function(date, scale, step) {{ return new Date(date).getHours() + 'h'; }},
-          majorLabels: function(date, scale, step) {{ return 'D' + new Date(date).getDate(); }}
-        }},
-        snap: function (date, scale, step) {{ var m = 10 * 60 * 1000; return Math.round(date / m) * m; }}
-      }};
-      timeline = new vis.Timeline(container, items, groups, options);
-  }} catch (err) {{ container.innerHTML = "Error: " + err.message; }}
-</script>
-</body>
-</html>
-"""
-components.html(html_code, height=730)
-
-# --- 9. 데이터 업데이트 ---
-st.markdown("---")
-st.subheader("📥 변경사항 확정 (Update)")
-with st.form("save_form"):
-    st.info("차트 변경사항(이동/삭제/복제)이 있다면 **'💾 Save Position'** 버튼을 누른 뒤, 이곳에 **Ctrl+V**로 붙여넣으세요.")
-    json_input = st.text_area("데이터 붙여넣기", height=100, label_visibility="collapsed")
-    submitted = st.form_submit_button("✅ 스케줄 업데이트 및 고정")
-    if submitted and json_input:
-        try:
-            new_data = json.loads(json_input)
-            processed_rows = []
-            for row in new_data:
-                s_dt = pd.to_datetime(row['Start_ISO'])
-                e_dt = pd.to_datetime(row['End_ISO'])
-                if s_dt.tzinfo is not None: s_dt = s_dt.tz_localize(None)
-                if e_dt.tzinfo is not None: e_dt = e_dt.tz_localize(None)
-                processed_rows.append({
-                    "Resource": row['Resource'],
-                    "Start_D": format_d_time(s_dt), "End_D": format_d_time(e_dt),
-                    "Label": row['Label'], "Color": row['Color'],
-                    "Start": s_dt, "End": e_dt
-                })
-            updated_df = pd.DataFrame(processed_rows)
-            updated_df = updated_df[updated_df['Resource'].isin(all_resources)]
-            st.session_state.schedule_df = updated_df
-            st.success("스케줄이 성공적으로 업데이트되었습니다!")
-            st.rerun()
-        except Exception as e:
-            st.error(f"데이터 형식이 올바르지 않습니다: {e}")
+def build_view():
+    """ 표시 대상 스케줄과 겹침 목록 """
+    view = schedule_view()
+    final_df = view[view['Resource'].isin(all_resources)]
+    # 기재별 겹침 검사 (추가/이동/삭제/최적화 후 한 번의 sweep)
+    conflict_df = find_conflicts(final_df)
+    conflict_ids = set(conflict_df['id']) | set(conflict_df['other_id'])
+    return final_df, conflict_df, conflict_ids
+
+# 스케줄/기재 목록이 그대로면 이전 rerun의 결과 재사용
+final_df, conflict_df, conflict_ids = cached_artifact('timeline', all_resources, build_view)
+
+# 대용량 모드: 화면 구간(시간 범위 + 기재 페이지)에 걸치는 스케줄만 전송
+c1, c2 = st.columns([3, 1])
+windowed = c1.toggle("대용량 모드 (화면에 보이는 구간만 전송)", value=len(final_df) > 2000 or len(all_resources) > 40)
+page_rows = c2.number_input("페이지당 기재 수", 5, 200, 30, 5, disabled=not windowed)
+window = None
+if windowed:
+    tv = st.session_state.timeline_view
+    row = min(tv['row'], max(len(all_resources) - 1, 0))
+    page_resources = all_resources[row:row + page_rows]
+    loaded = window_range(tv)
+    def build_window():
+        index = cached_artifact('window_index', all_resources, lambda: TimelineWindowIndex(final_df))
+        ids = index.query(loaded[0], loaded[1], page_resources)
+        return build_timeline_payload(final_df.loc[ids], page_resources, conflict_ids)
+    payload_json, color_css = cached_artifact('window_payload', (tuple(all_resources), row, page_rows, loaded), build_window)
+    groups = [{"id": res, "content": f"<b>{res}</b>", "order": row + i} for i, res in enumerate(page_resources)]
+    window = {"start": tv['start'], "end": tv['end'], "row": row, "rows": page_rows,
+              "total_rows": len(all_resources), "loaded": list(loaded)}
+else:
+    # 컬럼 단위 Payload (epoch ms + 색상 class + 겹침 표시)
+    payload_json, color_css = cached_artifact(
+        'payload', all_resources, lambda: build_timeline_payload(final_df, all_resources, conflict_ids)
+    )
+    groups = [{"id": res, "content": f"<b>{res}</b>", "order": i} for i, res in enumerate(all_resources)]
+outside = int(((final_df['Start'] < BASE_DATE) | (final_df['Start'] >= BASE_DATE + timedelta(days=HORIZON_DAYS))).sum())
+if outside:
+    st.warning(f"⚠️ 계획 기간(D1~D{HORIZON_DAYS}) 밖의 스케줄 {outside}건은 차트에 표시되지 않습니다. 사이드바 '📅 계획 기간'에서 기간을 늘려 주세요.")
+if not conflict_df.empty:
+    st.warning(f"⚠️ 같은 기재에서 시간이 겹치는 스케줄 {len(conflict_df)}건 (차트에 빨간 점선으로 표시)")
+    with st.expander("겹침 상세 보기"):
+        def describe(ids):
+            rows = final_df.loc[ids]
+            start_d, end_d = (format_d_time_series(rows['Start'], BASE_DATE, HORIZON_DAYS),
+                              format_d_time_series(rows['End'], BASE_DATE, HORIZON_DAYS))
+            return (rows['Label'].astype(str).to_numpy() + " (" + start_d.to_numpy() + " ~ " + end_d.to_numpy() + ")")
+        st.dataframe(pd.DataFrame({
+            "기재": conflict_df['Resource'],
+            "스케줄": describe(conflict_df['id']),
+            "겹치는 스케줄": describe(conflict_df['other_id']),
+        }), hide_index=True, use_container_width=True)
+
+# --- 8. Vis.js 타임라인 (양방향 컴포넌트: 이동/삭제/복제 변경분만 Python으로 전송) ---
+if missing_vendor_assets():
+    st.warning(f"⚠️ 타임라인 라이브러리 파일 없음 (static/vendor/: {', '.join(missing_vendor_assets())}) - "
+               "CDN에서 대신 읽으므로 인터넷이 안 되는 서버에서는 차트가 표시되지 않습니다. fetch_assets.py로 받아 두세요.")
+with stage('render.timeline'):
+    timeline_result = timeline_editor(
+        payload_json, json.dumps(groups), color_css, ack=st.session_state.timeline_ack, key="timeline", window=window,
+        horizon={"start": horizon_start, "end": horizon_start + HORIZON_MINUTES * 60 * 1000, "dated": horizon_weeks > 1},
+    )
+deltas = pending_deltas(timeline_result, st.session_state.timeline_ack)
+if deltas:
+    # 이동/삭제 대상 행만 변경 전 값을 복사해 두고 기록
+    id_map = st.session_state.timeline_ids
+    touched = [id_map.get(i, i) for d in deltas for i in d.get('removed', [])]
+    touched += [id_map.get(u['id'], u['id']) for d in deltas for u in d.get('updated', [])]
+    snapshot = take_snapshot(ids=touched)
+    with stage('apply_deltas'):
+        for delta in deltas:
+            st.session_state.schedule_df = apply_timeline_delta(
+                st.session_state.schedule_df, delta, BASE_DATE, st.session_state.timeline_ids
+            )
+    st.session_state.timeline_ack = deltas[-1]['seq']
+    commit_edit(snapshot, f"타임라인 편집 ({len(deltas)}건)")
+view_request = requested_view(timeline_result)
+new_view = windowed and view_request and view_request.get('seq', 0) > st.session_state.timeline_view['seq']
+if new_view:
+    st.session_state.timeline_view = {k: int(view_request[k]) for k in ('start', 'end', 'row', 'seq')}
+if deltas or new_view:
+    rerun()
+
+# --- 9. 기재 운영 분석 ---
+with st.expander("📈 기재 운영 분석 (블록 시간 / 가동률 / 지상 시간 / 자정 위치)", expanded=False):
+    # 압축 스케줄(분 오프셋 + 범주 코드)로 한 번에 계산, 스케줄 버전별 1회
+    stats = cached_artifact('analytics', all_resources, lambda: fleet_utilization(
+        st.session_state.schedule_df[st.session_state.schedule_df['Resource'].isin(all_resources)],
+        horizon=HORIZON_MINUTES, base_date=BASE_DATE
+    ))
+    util = stats['resources']
+    if util.empty:
+        st.info("분석할 스케줄이 없습니다.")
+    else:
+        util = util.iloc[sorted(range(len(util)), key=lambda i: natural_sort_key(util['Resource'].iat[i]))]
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric("운항 기재", f"{len(util)}대")
+        m2.metric("블록 시간" if horizon_weeks > 1 else "주간 블록 시간", f"{util['블록(h)'].sum():,.0f} h")
+        m3.metric("평균 가동률", f"{util['가동률(%)'].mean():.1f} %")
+        m4.metric("최소 지상 시간", f"{util['최소 지상(h)'].min():.1f} h")
+        st.dataframe(util, hide_index=True, use_container_width=True)
+        c1, c2 = st.columns([1, 2])
+        c1.caption("지상 대기 시간 분포 (횟수)")
+        c1.bar_chart(stats['gaps'])
+        c2.caption("날짜별 자정 위치 (✈ = 비행 중)")
+        c2.dataframe(stats['overnight'].loc[util['Resource']], use_container_width=True)
 
 # --- 10. 엑셀 다운로드 ---
 if not st.session_state.schedule_df.empty:
     with st.expander("📊 엑셀 파일 다운로드"):
-        export_df = st.session_state.schedule_df.copy()
-        export_df['Resource'] = pd.Categorical(export_df['Resource'], categories=all_resources, ordered=True)
-        export_df = export_df.sort_values('Resource')
-        def to_excel(df):
+        per_resource = st.checkbox("기재별 시트 + 요약(Summary) 시트 포함", value=False)
+        def to_excel():
             output = BytesIO()
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                df.to_excel(writer, index=False)
+            export_df = expand_schedule(st.session_state.schedule_df, BASE_DATE, d_time=True, days=HORIZON_DAYS)
+            write_schedule_excel(export_df, output, per_resource, st.session_state.rotations, period=HORIZON_MINUTES)
             return output.getvalue()
-        st.download_button("📥 전체 스케줄 엑셀 다운로드", to_excel(export_df), 'schedule_final.xlsx')
\ No newline at end of file
+        # 스케줄이 바뀌지 않은 rerun(expander 열기 등)에서는 이전에 만든 파일을 그대로 사용
+        xlsx = cached_artifact('xlsx', (per_resource,), to_excel)
+        st.download_button("📥 전체 스케줄 엑셀 다운로드", xlsx, 'schedule_final.xlsx')
+
+# --- 11. 단계별 실행 시간 (Profiler) ---
+finish_profile()
+with st.sidebar.expander("⏱️ 단계별 실행 시간", expanded=False):
+    st.checkbox(f"로그 파일에 기록 ({PROFILE_LOG})", key='profile_log',
+                help="다음 실행부터 rerun마다 단계별 시간을 JSON Lines로 추가")
+    runs = list(st.session_state.profiles)[::-1]
+    pick = st.selectbox("실행", range(len(runs)), format_func=lambda i: f"{runs[i].label}  {runs[i].elapsed() * 1000:.0f} ms")
+    st.dataframe(runs[pick].frame(), hide_index=True, use_container_width=True)
@@ -0,0 +1,115 @@
+"""
+스케줄 엑셀 일괄 최적화 (Streamlit 없이 실행)
+
+    python batch_optimize.py 입력폴더 [-o 출력폴더] [--mode linear|cyclic|station]
+                             [--ground 45] [--ground-rules "LAX=90, ICN-LAX=120"] [--workers 4] [--per-resource]
+                             [--balance 5] [--buffer 60]
+
+입력 폴더의 *.xlsx 파일을 프로세스 풀에서 병렬로 로드 -> 최적화 -> 저장하고,
+파일별 결과(기재 수, 겹침 수, 단계별 소요 시간)를 출력 폴더의 summary.csv 로 남김.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from d_time import BASE_DATE, WEEK_MINUTES
+from schedule_io import load_schedule_excel, write_schedule_excel
+from optimizer import optimize_schedule, parse_turnaround_rules, turnaround_minutes
+from conflicts import find_conflicts
+
+SUMMARY_COLUMNS = [
+    'file', 'output', 'legs', 'invalid_rows', 'resources_before', 'lanes', 'rotations',
+    'conflicts_before', 'conflicts_after', 'load_s', 'optimize_s', 'export_s', 'total_s', 'error',
+]
+
+def optimize_file(path, output_dir, mode="linear", ground=0, ground_rules="", per_resource=False, balance=0, buffer=60):
+    """ 엑셀 1개 처리 (프로세스 풀 작업 단위). 실패해도 예외 대신 error 컬럼에 기록 """
+    row = {'file': os.path.basename(path), 'error': ""}
+    t_start = time.perf_counter()
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        df, invalid = load_schedule_excel(data, BASE_DATE, cache_dir=None)
+        t_load = time.perf_counter()
+
+        by_station, by_label = parse_turnaround_rules(ground_rules)
+        turnaround = turnaround_minutes(df['Label'], ground, by_station, by_label)
+        # cyclic 모드는 D7 -> D1 경계를 넘는 스케줄(End < Start)까지 주 단위로 펼쳐서 겹침 검사
+        period = pd.Timedelta(minutes=WEEK_MINUTES) if mode == "cyclic" else None
+        conflicts_before = len(find_conflicts(df, period))
+        df_opt, lanes, rotations = optimize_schedule(df, turnaround, mode, WEEK_MINUTES, balance=balance, buffer=buffer)
+        # 경계를 넘은 꼬리는 로테이션상 다음 Lane(#1 -> #3 -> #1)의 주 초반에 놓임
+        next_resource = {a: b for cycle in rotations for a, b in zip(cycle, cycle[1:] + cycle[:1])}
+        conflicts_after = len(find_conflicts(df_opt, period, next_resource))
+        t_opt = time.perf_counter()
+
+        out_name = os.path.splitext(row['file'])[0] + "_optimized.xlsx"
+        write_schedule_excel(df_opt, os.path.join(output_dir, out_name), per_resource, rotations)
+        t_export = time.perf_counter()
+
+        row.update({
+            'output': out_name, 'legs': len(df), 'invalid_rows': int(invalid.sum()),
+            'resources_before': df['Resource'].nunique(), 'lanes': lanes, 'rotations': len(rotations),
+            'conflicts_before': conflicts_before, 'conflicts_after': conflicts_after,
+            'load_s': round(t_load - t_start, 3), 'optimize_s': round(t_opt - t_load, 3),
+            'export_s': round(t_export - t_opt, 3),
+        })
+    except Exception as e:
+        row['error'] = f"{type(e).__name__}: {e}"
+    row['total_s'] = round(time.perf_counter() - t_start, 3)
+    return row
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="스케줄 엑셀 일괄 최적화")
+    parser.add_argument("input_dir", help="스케줄 .xlsx 파일 폴더")
+    parser.add_argument("-o", "--output-dir", help="결과 폴더 (기본: 입력폴더/optimized)")
+    parser.add_argument("--mode", choices=["linear", "cyclic", "station"], default="linear", help="최적화 방식")
+    parser.add_argument("--ground", type=float, default=0, help="기본 최소 지상 시간(분)")
+    parser.add_argument("--ground-rules", default="", help="공항/Label별 지상 시간 (예: 'LAX=90, ICN-LAX=120')")
+    parser.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: CPU 수)")
+    parser.add_argument("--per-resource", action="store_true", help="기재별 시트 + 요약(Summary) 시트 추가")
+    parser.add_argument("--balance", type=float, default=0, help="파일별 부하 균형 탐색 시간(초, linear만, 기본 0 = 생략)")
+    parser.add_argument("--buffer", type=float, default=60, help="부하 균형 목표 지상 여유(분)")
+    args = parser.parse_args(argv)
+
+    try:
+        parse_turnaround_rules(args.ground_rules)
+    except ValueError as e:
+        parser.error(str(e))
+
+    output_dir = args.output_dir or os.path.join(args.input_dir, "optimized")
+    os.makedirs(output_dir, exist_ok=True)
+    files = sorted(
+        os.path.join(args.input_dir, name) for name in os.listdir(args.input_dir)
+        if name.lower().endswith(".xlsx") and not name.startswith("~$")
+    )
+    if not files:
+        print(f"처리할 .xlsx 파일이 없습니다: {args.input_dir}", file=sys.stderr)
+        return 1
+
+    rows = []
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [
+            pool.submit(optimize_file, path, output_dir, args.mode, args.ground, args.ground_rules, args.per_resource,
+                        args.balance, args.buffer)
+            for path in files
+        ]
+        for future in as_completed(futures):
+            row = future.result()
+            rows.append(row)
+            status = f"오류 - {row['error']}" if row['error'] else f"{row['legs']}편 -> 기재 {row['lanes']}대"
+            print(f"[{len(rows)}/{len(files)}] {row['file']}: {status} ({row['total_s']}s)")
+
+    summary = pd.DataFrame(rows, columns=SUMMARY_COLUMNS).sort_values('file')
+    # 실패한 파일은 건수 컬럼이 비므로 정수형(Int64)으로 맞춰 '300.0' 같은 표기 방지
+    count_cols = ['legs', 'invalid_rows', 'resources_before', 'lanes', 'rotations', 'conflicts_before', 'conflicts_after']
+    summary[count_cols] = summary[count_cols].apply(pd.to_numeric).astype('Int64')
+    summary_path = os.path.join(output_dir, "summary.csv")
+    summary.to_csv(summary_path, index=False, encoding='utf-8-sig')
+    print(f"요약 저장: {summary_path}")
+    return 1 if (summary['error'] != "").any() else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+"""
+스케줄 처리 성능 측정 (Synthetic 스케줄)
+
+    python benchmark.py [--sizes 100,10000,100000] [--resources legs/10,50] [--repeat 3] [--seed 0]
+                        [--skip excel] [-o benchmark_results.json] [--compare 이전결과.json]
+
+고정 seed로 1주 스케줄을 생성해 (스케줄 수 x 기재 수) 조합마다 단계별 소요 시간을 측정하고 JSON 파일로 저장.
+--resources 항목: '50' = 기재 50대, 'legs/10' = 기재 1대당 주 10편 (스케줄 수 // 10, 기본값)
+--compare 로 이전 결과 파일을 주면 같은 (스케줄 수, 기재 설정, 단계)끼리 비교해 느려진 항목을 표시.
+  parse     : D-Time 문자열 -> Start/End (normalize_schedule)
+  optimize_*: Lane 배정 (optimize_schedule, linear / cyclic / station)
+  conflicts : 기재별 겹침 검사 (find_conflicts)
+  items     : 타임라인 Payload 생성 (build_timeline_payload)
+  paste     : '차트 데이터 복사' JSON -> 저장용 DataFrame (parse_pasted_schedule)
+  excel     : 엑셀 저장 (write_schedule_excel)
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from io import BytesIO
+import numpy as np
+import pandas as pd
+from d_time import BASE_DATE, MINUTES_PER_DAY, WEEK_MINUTES
+from schedule_io import normalize_schedule, write_schedule_excel, natural_sort_key
+from optimizer import optimize_schedule
+from conflicts import find_conflicts
+from timeline import build_timeline_payload, parse_pasted_schedule
+
+HUB = 'ICN'
+STATIONS = ['NRT', 'HND', 'PVG', 'HKG', 'SIN', 'BKK', 'LAX', 'JFK', 'SFO', 'SEA', 'FRA', 'LHR', 'CDG', 'SYD']
+PALETTE = ['#ADD8E6', '#FFB6C1', '#90EE90', '#FFD700', '#FFA07A', '#D8BFD8']
+REGRESSION_RATIO = 1.2  # 이전 결과보다 20% 이상 느리면 표시
+DEFAULT_FLEET = 'legs/10'  # --resources 생략 시 (fleet 항목이 없는 이전 결과 파일도 이 설정으로 간주)
+
+# --- 1. Synthetic 스케줄 생성 ---
+def _d_time(minutes):
+    """ 분 오프셋 배열 -> 'D1 1320' (D7 이후는 D1로 순환) """
+    minutes = np.asarray(minutes) % WEEK_MINUTES
+    day, rest = minutes // MINUTES_PER_DAY + 1, minutes % MINUTES_PER_DAY
+    return pd.Series(day).map('D{}'.format) + ' ' + pd.Series(rest // 60 * 100 + rest % 60).map('{:04d}'.format)
+
+def generate_schedule(n_legs, n_resources=None, seed=0):
+    """
+    엑셀 업로드 형식(Resource, Start_D, End_D, Label, Color)의 1주 스케줄 생성.
+    - 허브(ICN) 출발 -> 취항지 -> 허브 복귀 왕복 위주, 구간마다 비행 시간(1~14시간)이 다름
+    - 출발 시각은 5분 단위, 일부는 D7 -> D1 주 경계를 넘음
+    - n_resources 생략 시 기재 1대당 주 10편 정도
+    """
+    rng = np.random.default_rng(seed)
+    n_resources = n_resources or max(1, n_legs // 10)
+    block = dict(zip(STATIONS, rng.integers(60, 14 * 60, len(STATIONS)) // 5 * 5))
+
+    dest = rng.choice(STATIONS, n_legs)
+    outbound = rng.random(n_legs) < 0.5
+    origins = np.where(outbound, HUB, dest)
+    destinations = np.where(outbound, dest, HUB)
+    durations = pd.Series(dest).map(block).to_numpy() + rng.integers(-3, 4, n_legs) * 5
+    starts = rng.integers(0, WEEK_MINUTES // 5, n_legs) * 5
+    return pd.DataFrame({
+        "Resource": '#' + pd.Series(rng.integers(1, n_resources + 1, n_legs)).astype(str),
+        "Start_D": _d_time(starts),
+        "End_D": _d_time(starts + durations),
+        "Label": pd.Series(origins) + '-' + pd.Series(destinations),
+        "Color": rng.choice(PALETTE, n_legs),
+    })
+
+def fleet_size(spec, n_legs):
+    """ --resources 항목 -> 기재 수. '50' = 50대, 'legs/10' = 스케줄 수 // 10 (최소 1대). 형식 오류는 ValueError """
+    spec = spec.strip().lower()
+    per_aircraft = spec.startswith('legs/')
+    value = spec[len('legs/'):] if per_aircraft else spec
+    if not value.isdigit() or int(value) <= 0:
+        raise ValueError(f"기재 설정 형식 오류: '{spec}' (예: 50, legs/10)")
+    return max(1, n_legs // int(value)) if per_aircraft else int(value)
+
+def _paste_json(payload_json):
+    """ 브라우저 exportData()가 클립보드에 복사하는 JSON을 Payload로부터 재현 """
+    p = json.loads(payload_json)
+    fmt = lambda ms: pd.to_datetime(np.asarray(ms, dtype='int64'), unit='ms').strftime('%Y-%m-%dT%H:%M:%S')
+    rows = pd.DataFrame({
+        "Resource": np.asarray(p['groups'], dtype=object)[p['group']] if p['id'] else [],
+        "Start_ISO": fmt(p['start']), "End_ISO": fmt(p['end']), "Label": p['content'],
+        "Color": np.asarray(p['colors'], dtype=object)[p['color']] if p['id'] else [],
+    })
+    return rows.to_json(orient='records')
+
+# --- 2. 측정 ---
+def _timeit(fn, repeat):
+    runs = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - t)
+    return runs
+
+def run_benchmark(n_legs, repeat=3, seed=0, skip=(), fleet=DEFAULT_FLEET):
+    """ 스케줄 수 x 기재 설정(fleet, --resources 항목) 1개 조합에 대해 단계별 측정. 반환: 결과 dict 목록 """
+    raw = generate_schedule(n_legs, fleet_size(fleet, n_legs), seed=seed)
+    df, _ = normalize_schedule(raw.copy(), BASE_DATE)
+    resources = sorted(df['Resource'].unique(), key=natural_sort_key)
+    conflict_ids = set(find_conflicts(df)['id'])
+    payload_json, _ = build_timeline_payload(df, resources, conflict_ids)
+    paste_text = _paste_json(payload_json)
+
+    stages = {
+        'parse': lambda: normalize_schedule(raw.copy(), BASE_DATE),
+        'optimize_linear': lambda: optimize_schedule(df, None, "linear"),
+        'optimize_cyclic': lambda: optimize_schedule(df, None, "cyclic"),
+        'optimize_station': lambda: optimize_schedule(df, None, "station"),
+        'conflicts': lambda: find_conflicts(df),
+        'items': lambda: build_timeline_payload(df, resources, conflict_ids),
+        'paste': lambda: parse_pasted_schedule(paste_text, BASE_DATE),
+        'excel': lambda: write_schedule_excel(df, BytesIO()),
+    }
+    results = []
+    for stage, fn in stages.items():
+        if stage in skip or stage.split('_')[0] in skip:
+            continue
+        runs = _timeit(fn, repeat)
+        results.append({
+            'legs': n_legs, 'fleet': fleet, 'resources': len(resources), 'stage': stage,
+            'best_s': round(min(runs), 6), 'median_s': round(float(np.median(runs)), 6),
+            'runs': [round(r, 6) for r in runs],
+        })
+        print(f"{n_legs:>8} legs  {len(resources):>6} A/C  {stage:<17} best {min(runs):9.4f}s  median {np.median(runs):9.4f}s", flush=True)
+    return results
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare_results(results, baseline):
+    """ 이전 결과와 (스케줄 수, 기재 설정, 단계)별 best_s 비교. 반환: 느려진 항목 목록 """
+    previous = {(r['legs'], r.get('fleet', DEFAULT_FLEET), r['stage']): r['best_s'] for r in baseline.get('results', [])}
+    slower = []
+    for r in results:
+        before = previous.get((r['legs'], r['fleet'], r['stage']))
+        if before:
+            ratio = r['best_s'] / before
+            mark = "  <-- 느려짐" if ratio >= REGRESSION_RATIO else ""
+            print(f"{r['legs']:>8} legs  {r['fleet']:>9}  {r['stage']:<17} {before:9.4f}s -> {r['best_s']:9.4f}s  (x{ratio:.2f}){mark}")
+            if mark:
+                slower.append(dict(r, baseline_s=before, ratio=round(ratio, 3)))
+    return slower
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="스케줄 처리 성능 측정")
+    parser.add_argument("--sizes", default="100,10000,100000", help="스케줄 개수 목록 (쉼표 구분)")
+    parser.add_argument("--resources", default=DEFAULT_FLEET,
+                        help="기재 수 목록 (쉼표 구분, 숫자 = 대수, legs/N = 기재 1대당 N편, 예: legs/10,50,500)")
+    parser.add_argument("--repeat", type=int, default=3, help="단계별 반복 횟수")
+    parser.add_argument("--seed", type=int, default=0, help="스케줄 생성 seed")
+    parser.add_argument("--skip", default="", help="건너뛸 단계 (쉼표 구분, 예: excel,optimize)")
+    parser.add_argument("-o", "--output", default="benchmark_results.json", help="결과 JSON 파일")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON 파일")
+    args = parser.parse_args(argv)
+
+    sizes = [int(x) for x in args.sizes.split(',') if x.strip()]
+    skip = {x.strip() for x in args.skip.split(',') if x.strip()}
+    fleets = [x.strip().lower() for x in args.resources.split(',') if x.strip()]
+    try:
+        for fleet in fleets:
+            fleet_size(fleet, 1)
+    except ValueError as e:
+        parser.error(f"--resources: {e}")
+    results = []
+    for n in sizes:
+        for fleet in fleets:
+            results.extend(run_benchmark(n, args.repeat, args.seed, skip, fleet))
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'), 'git': _git_revision(),
+            'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__,
+            'machine': platform.platform(), 'seed': args.seed, 'repeat': args.repeat, 'resources': fleets,
+        },
+        'results': results,
+    }
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            report['regressions'] = compare_results(results, json.load(f))
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"결과 저장: {args.output}")
+    return 1 if report.get('regressions') else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+
+# --- 기재(Resource)별 스케줄 겹침(Conflict) 검사 ---
+# 시간은 모두 int64(ns)로 비교, 앞 스케줄 종료 시각 == 다음 출발 시각은 겹침이 아님 (Optimizer와 동일 기준)
+
+def _ns(values):
+    return pd.to_datetime(pd.Series(values)).to_numpy().astype('datetime64[ns]').astype('int64')
+
+class ResourceIntervals:
+    """
+    기재별 정렬 구간 인덱스.
+    - 기재마다 Start 순으로 정렬된 NumPy 배열(starts, ends, ids)과 종료시각 누적 최대값(max_ends)을 보관
+    - overlaps(): 이분 탐색 1번 + 누적 최대값 비교로 O(log n) 겹침 여부 판단
+    - insert(): 이분 탐색으로 위치를 찾아 삽입 (해당 기재 배열만 갱신)
+    """
+    def __init__(self):
+        self._data = {}
+
+    @classmethod
+    def from_frame(cls, df):
+        index = cls()
+        valid = df['Start'].notna() & df['End'].notna()
+        sub = df[valid]
+        starts, ends = _ns(sub['Start']), _ns(sub['End'])
+        resources = sub['Resource'].to_numpy()
+        ids = sub.index.to_numpy()
+        for res, pos in pd.Series(np.arange(len(sub))).groupby(resources, sort=False):
+            p = pos.to_numpy()
+            order = p[np.argsort(starts[p], kind='stable')]
+            index._data[res] = (starts[order], ends[order], ids[order], np.maximum.accumulate(ends[order]))
+        return index
+
+    def _k(self, resource, start, end):
+        """ 이번 구간 종료 전에 출발하는 구간 개수 (이 범위 밖은 겹칠 수 없음) """
+        starts = self._data[resource][0]
+        return int(np.searchsorted(starts, pd.Timestamp(end).value, side='left'))
+
+    def overlaps(self, resource, start, end):
+        """ 해당 기재에 [start, end)와 겹치는 스케줄이 있는지 (O(log n)) """
+        if resource not in self._data:
+            return False
+        k = self._k(resource, start, end)
+        return k > 0 and self._data[resource][3][k - 1] > pd.Timestamp(start).value
+
+    def conflicts(self, resource, start, end):
+        """ 해당 기재에서 [start, end)와 겹치는 스케줄 id 목록 """
+        if not self.overlaps(resource, start, end):
+            return []
+        _, ends, ids, _ = self._data[resource]
+        k = self._k(resource, start, end)
+        return ids[:k][ends[:k] > pd.Timestamp(start).value].tolist()
+
+    def insert(self, resource, start, end, row_id):
+        s, e = pd.Timestamp(start).value, pd.Timestamp(end).value
+        if resource not in self._data:
+            self._data[resource] = (np.array([s]), np.array([e]), np.array([row_id], dtype=object), np.array([e]))
+            return
+        starts, ends, ids, max_ends = self._data[resource]
+        pos = int(np.searchsorted(starts, s, side='right'))
+        starts, ends = np.insert(starts, pos, s), np.insert(ends, pos, e)
+        ids = np.insert(ids.astype(object), pos, row_id)
+        # 삽입 위치 이후만 누적 최대값 다시 계산
+        prev = max_ends[pos - 1] if pos > 0 else np.iinfo(np.int64).min
+        max_ends = np.concatenate([max_ends[:pos], np.maximum.accumulate(np.maximum(ends[pos:], prev))])
+        self._data[resource] = (starts, ends, ids, max_ends)
+
+def find_conflicts(df, period=None, next_resource=None):
+    """
+    전체 스케줄을 한 번 훑어(sweep) 겹치는 스케줄 쌍을 모두 반환.
+    - 기재별 Start 순으로 정렬한 뒤, 앞쪽 스케줄들의 최대 종료시각보다 먼저 출발하는 행만 겹침 후보
+    - 후보 행마다 종료시각 누적 최대값을 이분 탐색해, 아직 끝나지 않은(종료 > 출발) 앞 스케줄 구간만 확인
+      -> O(n log n + 겹침 쌍 수)
+    - period: 반복 주기(Timedelta, cyclic 모드). 주 경계를 넘는 스케줄(End < Start)은 End + period로 펼치고
+      한 주 앞당긴 사본도 함께 검사해 D7 -> D1 경계 양쪽의 겹침까지 포함 (생략 시 End < Start 행은 검사 제외)
+    - next_resource: {기재: 다음 주에 이어서 맡는 기재} (cyclic 최적화 결과의 로테이션).
+      주 경계를 넘은 꼬리는 이 기재의 주 초반과 비교 (생략 시 같은 기재)
+    반환 컬럼: Resource, id, other_id(겹치는 앞 스케줄), Overlap_Start, Overlap_End (쌍마다 1행)
+    """
+    if period is None:
+        return _sweep_conflicts(df)
+    period = pd.Timedelta(period)
+    wrap = (df['End'] < df['Start']).to_numpy()
+    if not wrap.any():
+        return _sweep_conflicts(df)
+    unrolled = df[['Resource', 'Start', 'End']].copy()
+    unrolled.loc[wrap, 'End'] = unrolled.loc[wrap, 'End'] + period
+    unrolled['Resource'] = unrolled['Resource'].astype(object)
+    shifted = unrolled[wrap].assign(Start=lambda d: d['Start'] - period, End=lambda d: d['End'] - period)
+    if next_resource:
+        shifted['Resource'] = [next_resource.get(r, r) for r in shifted['Resource']]
+    # 사본은 원본 행 위치로 되돌려 id 매핑
+    row_pos = np.r_[np.arange(len(df)), np.nonzero(wrap)[0]]
+    conflicts = _sweep_conflicts(pd.concat([unrolled, shifted]).reset_index(drop=True))
+    a = row_pos[conflicts['id'].to_numpy(dtype=np.int64)]
+    b = row_pos[conflicts['other_id'].to_numpy(dtype=np.int64)]
+    # 경계를 넘는 두 스케줄은 원본끼리/사본끼리 두 번 겹치므로 같은 쌍은 1행만 남김
+    key = np.minimum(a, b) * len(df) + np.maximum(a, b)
+    keep = (a != b) & ~pd.Series(key).duplicated().to_numpy()
+    conflicts['id'], conflicts['other_id'] = df.index.to_numpy()[a], df.index.to_numpy()[b]
+    return conflicts[keep].reset_index(drop=True)
+
+def _sweep_conflicts(df):
+    cols = ['Resource', 'id', 'other_id', 'Overlap_Start', 'Overlap_End']
+    valid = (df['Start'].notna() & df['End'].notna()).to_numpy()
+    if not valid.any():
+        return pd.DataFrame(columns=cols)
+    sub = df[valid]
+    res_codes, res_names = pd.factorize(sub['Resource'])
+    starts, ends = _ns(sub['Start']), _ns(sub['End'])
+    order = np.lexsort((starts, res_codes))
+    r, s, e, ids = res_codes[order], starts[order], ends[order], sub.index.to_numpy()[order]
+
+    # 기재별 종료시각 누적 최대값 (정수 그대로 계산해 ns 정밀도 유지), 기재 첫 행 위치
+    first = np.r_[True, r[1:] != r[:-1]]
+    run_max = pd.Series(e).groupby(r).cummax().to_numpy()
+    pos = np.arange(len(e))
+    group_start = np.maximum.accumulate(np.where(first, pos, 0))
+    prev_max = np.r_[e[:1], run_max[:-1]]
+    hit_pos = np.nonzero(~first & (s < prev_max))[0]
+
+    # 후보 행 p: 누적 최대값이 처음으로 출발 시각을 넘는 위치(lo)부터 p 직전까지가 겹칠 수 있는 앞 스케줄
+    lo = np.empty(len(hit_pos), dtype=np.int64)
+    for code in np.unique(r[hit_pos]):
+        k = np.nonzero(r[hit_pos] == code)[0]
+        g0 = group_start[hit_pos[k[0]]]
+        lo[k] = g0 + np.searchsorted(run_max[g0:hit_pos[k[-1]]], s[hit_pos[k]], side='right')
+    spans = hit_pos - lo
+    p = np.repeat(hit_pos, spans)
+    j = np.repeat(lo - np.r_[0, np.cumsum(spans)[:-1]], spans) + np.arange(spans.sum())
+    overlap = e[j] > s[p]
+    p, j = p[overlap], j[overlap]
+    return pd.DataFrame({
+        'Resource': res_names[r[p]],
+        'id': ids[p],
+        'other_id': ids[j],
+        'Overlap_Start': pd.to_datetime(s[p]),
+        'Overlap_End': pd.to_datetime(np.minimum(e[p], e[j])),
+    }, columns=cols)
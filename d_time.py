@@ -0,0 +1,49 @@
+import pandas as pd
+from datetime import datetime
+
+BASE_DATE = datetime(2024, 1, 1)
+MINUTES_PER_DAY = 24 * 60
+WEEK_MINUTES = 7 * MINUTES_PER_DAY
+
+# 'D1 1320', 'D1 13:20', 'd2 0540' 형식 (일자 접두어 + 일자 번호 + 시각)
+D_TIME_PATTERN = r'^\s*[A-Za-z]*(\d+)\s+(\d{1,2}):?(\d{2})\s*$'
+
+# --- 벡터화 D-Time 파서 ---
+def parse_d_minutes(values):
+    """
+    'D1 1320' 컬럼 전체 -> BASE_DATE 기준 분(minute) 오프셋 (float, 오류 행은 NaN)
+    반환: (오프셋 Series, 오류 행 마스크 ndarray[bool])
+    """
+    s = pd.Series(values)
+    parts = s.astype('string').str.extract(D_TIME_PATTERN)
+    day = pd.to_numeric(parts[0]).astype('float64')
+    hour = pd.to_numeric(parts[1]).astype('float64')
+    minute = pd.to_numeric(parts[2]).astype('float64')
+
+    offsets = (day - 1) * MINUTES_PER_DAY + hour * 60 + minute
+    invalid = offsets.isna() | (day < 1) | (hour >= 24) | (minute >= 60)
+    offsets = offsets.mask(invalid)
+    return offsets, invalid.to_numpy(dtype=bool)
+
+def parse_d_time_series(values, base_date=BASE_DATE):
+    """
+    'D1 1320' 컬럼 전체 -> datetime64 Series (오류 행은 NaT)
+    반환: (datetime Series, 오류 행 마스크 ndarray[bool])
+    """
+    offsets, invalid = parse_d_minutes(values)
+    return pd.Timestamp(base_date) + pd.to_timedelta(offsets, unit='m'), invalid
+
+def format_d_minutes(minutes, days=7):
+    """ BASE_DATE 기준 분 오프셋 컬럼 -> 'D1 1320' 문자열 (days일 단위 반복 - 계획 기간, 결측은 빈 문자열) """
+    m = pd.Series(minutes).astype('Int64')
+    day = (m // MINUTES_PER_DAY) % days + 1
+    rest = m % MINUTES_PER_DAY
+    out = 'D' + day.astype(str) + ' ' + (rest // 60 * 100 + rest % 60).astype(str).str.zfill(4)
+    return out.where(m.notna(), "")
+
+def format_d_time_series(values, base_date=BASE_DATE, days=7):
+    """ datetime 컬럼 전체 -> 'D1 1320' 문자열 (days일 단위 반복 - 계획 기간, NaT는 빈 문자열) """
+    dt = pd.Series(pd.to_datetime(values))
+    day = (dt - pd.Timestamp(base_date)).dt.days % days + 1
+    out = 'D' + day.astype('Int64').astype(str) + ' ' + dt.dt.strftime('%H%M')
+    return out.where(dt.notna(), "")
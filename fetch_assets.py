@@ -0,0 +1,84 @@
+"""
+타임라인 프론트엔드 라이브러리 받기 (폐쇄망 배포용)
+
+    python fetch_assets.py                # CDN에서 받아 static/vendor/ 에 저장
+    python fetch_assets.py --from DIR     # 인터넷이 안 되는 서버: 미리 받아 둔 폴더에서 복사
+    python fetch_assets.py --check        # 저장된 파일을 manifest.json 해시와 비교
+
+받은 파일은 Streamlit 정적 파일(.streamlit/config.toml enableStaticServing)로 /app/static/vendor/ 에서 제공되고,
+타임라인 HTML은 이 주소를 먼저 읽음 (파일이 없을 때만 CDN 사용).
+manifest.json 에는 파일별 버전/SHA-256을 기록해 두어 다른 서버로 복사한 뒤에도 --check 로 확인 가능.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import urllib.request
+from timeline import VENDOR_DIR, VENDOR_ASSETS
+
+MANIFEST = 'manifest.json'
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def fetch_assets(source_dir=None, vendor_dir=VENDOR_DIR, timeout=30):
+    """ VENDOR_ASSETS 파일을 vendor_dir 에 저장하고 manifest 작성. 반환: manifest dict """
+    os.makedirs(vendor_dir, exist_ok=True)
+    manifest = {}
+    for name, (version, url) in VENDOR_ASSETS.items():
+        target = os.path.join(vendor_dir, name)
+        tmp = target + '.part'
+        if source_dir:
+            shutil.copyfile(os.path.join(source_dir, name), tmp)
+        else:
+            with urllib.request.urlopen(url, timeout=timeout) as resp, open(tmp, 'wb') as f:
+                shutil.copyfileobj(resp, f)
+        os.replace(tmp, target)
+        manifest[name] = {'version': version, 'source': url, 'sha256': _sha256(target)}
+        print(f"{name:<32} {version:<8} {manifest[name]['sha256'][:16]}...")
+    with open(os.path.join(vendor_dir, MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def check_assets(vendor_dir=VENDOR_DIR):
+    """ 저장된 파일을 manifest 와 비교. 반환: 문제 목록 (없으면 빈 list) """
+    path = os.path.join(vendor_dir, MANIFEST)
+    if not os.path.exists(path):
+        return [f"{path} 없음 (fetch_assets.py 실행 필요)"]
+    with open(path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    problems = []
+    for name, (version, _) in VENDOR_ASSETS.items():
+        entry, target = manifest.get(name), os.path.join(vendor_dir, name)
+        if entry is None or not os.path.exists(target):
+            problems.append(f"{name}: 파일 없음")
+        elif entry['version'] != version:
+            problems.append(f"{name}: 버전 {entry['version']} (필요 {version})")
+        elif _sha256(target) != entry['sha256']:
+            problems.append(f"{name}: 해시 불일치")
+    return problems
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="타임라인 프론트엔드 라이브러리 받기")
+    parser.add_argument("--from", dest="source_dir", help="미리 받아 둔 파일 폴더 (인터넷 없이 복사)")
+    parser.add_argument("--check", action="store_true", help="저장된 파일 확인만")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        problems = check_assets()
+        for p in problems:
+            print(p)
+        print("확인 완료" if not problems else f"문제 {len(problems)}건")
+        return 1 if problems else 0
+    fetch_assets(args.source_dir)
+    print(f"저장: {VENDOR_DIR}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
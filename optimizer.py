@@ -0,0 +1,468 @@
+import bisect
+import heapq
+import random
+from collections import deque
+from time import perf_counter
+import re
+import numpy as np
+import pandas as pd
+from d_time import BASE_DATE, WEEK_MINUTES
+from profiler import stage
+
+NS_PER_MINUTE = 60 * 10**9
+
+# --- Lane 배정 엔진 (Interval Partitioning) ---
+def _to_int64(values):
+    """ datetime64 / 정수 배열 -> int64 배열 (비교 연산용) """
+    arr = np.asarray(values)
+    if arr.dtype.kind == 'M':
+        arr = arr.astype('datetime64[ns]')
+    return arr.astype('int64')
+
+def assign_lanes(starts, ends, turnaround=None):
+    """
+    시작/종료 배열을 받아 각 스케줄의 Lane 번호(0부터)와 필요한 Lane 수를 반환.
+    - 시작 시간 순으로 훑으면서 '사용 중 Lane' 힙(사용 가능 시각, Lane)과 '빈 Lane' 힙(Lane 번호)을 관리
+    - 빈 Lane 중 가장 앞 번호를 사용하므로 기존 First-Fit과 같은 배정 결과를 O(n log n)에 계산
+    - turnaround: 스케줄 도착 후 다음 출발까지 필요한 최소 지상 시간(분, 스칼라 또는 스케줄별 배열).
+      Lane은 '종료 + 지상 시간' 이후에 다시 사용 가능 (시작/종료가 datetime64면 ns로 환산)
+    """
+    is_datetime = np.asarray(starts).dtype.kind == 'M'
+    s = _to_int64(starts)
+    e = _to_int64(ends)
+    if turnaround is not None:
+        ground = np.broadcast_to(np.asarray(turnaround, dtype='float64'), e.shape)
+        e = e + np.rint(ground * (NS_PER_MINUTE if is_datetime else 1)).astype('int64')
+    n = len(s)
+    lanes = np.empty(n, dtype=np.int64)
+    if n == 0:
+        return lanes, 0
+
+    order = np.lexsort((e, s))  # Start 우선, 그 다음 End
+    busy = []   # (종료시간, Lane)
+    free = []   # 비어 있는 Lane 번호
+    lane_count = 0
+    s_list, e_list = s[order].tolist(), e[order].tolist()
+    for pos, start, end in zip(order.tolist(), s_list, e_list):
+        # 이번 스케줄 시작 전에 사용 가능해진 Lane들을 빈 Lane으로 이동
+        while busy and busy[0][0] <= start:
+            heapq.heappush(free, heapq.heappop(busy)[1])
+        if free:
+            lane = heapq.heappop(free)
+        else:
+            lane = lane_count
+            lane_count += 1
+        heapq.heappush(busy, (end, lane))
+        lanes[pos] = lane
+    return lanes, lane_count
+
+# --- 주간 순환(Cyclic) Lane 배정 (Circular-Arc Interval Partitioning) ---
+def _min_load_point(s, ext, period):
+    """ 원형 시간축(0~period)에서 동시에 진행 중인 스케줄 수가 가장 적은 시각과 그 개수 """
+    times = np.concatenate([s, (s + ext) % period])
+    deltas = np.concatenate([np.ones(len(s), dtype=np.int64), -np.ones(len(s), dtype=np.int64)])
+    order = np.lexsort((deltas, times))  # 같은 시각이면 종료(-1) 먼저
+    load = int(np.count_nonzero(s + ext > period)) + np.cumsum(deltas[order])
+    i = int(np.argmin(load))
+    return int(times[order][i]), int(load[i])
+
+def assign_lanes_cyclic(starts, ends, period, turnaround=None, origin=None):
+    """
+    주 단위로 반복되는 스케줄의 Lane 배정. D7 2300 -> D1 0600 처럼 주 경계를 넘는 스케줄도 하나의 원형 구간으로 처리.
+    - period: 반복 주기(분). 소요 시간 = (종료 - 시작) mod period
+    - 동시 진행 스케줄 수가 가장 적은 시각 t0에서 원을 자르고, t0를 걸친 스케줄의 '꼬리'를 Lane 0..m-1에 먼저 배치한 뒤
+      나머지는 assign_lanes와 같은 힙 기반 First-Fit으로 배정 -> Lane 수 = 원형 최대 동시 진행 수 (최소값)
+    - origin: 주 시작 시각(D1 0000, starts와 같은 형식). Lane 번호는 주 단위(origin ~ origin+period)로 이어지도록 정리
+    - 반환: (Lane 배열, Lane 수, next_lane) / next_lane[j] = 이번 주 Lane j 기재가 다음 주에 이어서 맡는 Lane
+    """
+    is_datetime = np.asarray(starts).dtype.kind == 'M'
+    unit = NS_PER_MINUTE if is_datetime else 1
+    W = int(round(period * unit))
+    shift = 0 if origin is None else int(_to_int64(np.array([origin], dtype=np.asarray(starts).dtype))[0])
+    s = (_to_int64(starts) - shift) % W
+    dur = (_to_int64(ends) - _to_int64(starts)) % W
+    ext = dur
+    if turnaround is not None:
+        ground = np.broadcast_to(np.asarray(turnaround, dtype='float64'), dur.shape)
+        ext = dur + np.rint(ground * unit).astype('int64')
+    n = len(s)
+    lanes = np.empty(n, dtype=np.int64)
+    if n == 0:
+        return lanes, 0, []
+
+    t0, _ = _min_load_point(s, ext, W)
+    rel = (s - t0) % W
+    crossing = np.nonzero(rel + ext > W)[0]  # t0를 걸치는 스케줄 (주 경계에서 다음 주로 이어짐)
+
+    # t0 직후 구간: 걸친 스케줄의 꼬리가 Lane 0..m-1을 점유
+    busy = [(int(rel[k] + ext[k] - W), lane) for lane, k in enumerate(crossing.tolist())]
+    heapq.heapify(busy)
+    free = []
+    lane_count = len(busy)
+    tail_lane = {k: lane for lane, k in enumerate(crossing.tolist())}
+
+    order = np.lexsort((rel + ext, rel))
+    for pos, start, ready in zip(order.tolist(), rel[order].tolist(), (rel + ext)[order].tolist()):
+        while busy and busy[0][0] <= start:
+            heapq.heappush(free, heapq.heappop(busy)[1])
+        if free:
+            lane = heapq.heappop(free)
+        else:
+            lane = lane_count
+            lane_count += 1
+        heapq.heappush(busy, (ready, lane))
+        lanes[pos] = lane
+
+    # 주 경계 연결: 걸친 스케줄을 시작한 Lane -> 그 꼬리를 배치한 Lane, 나머지는 빈 Lane끼리 연결
+    next_lane = [None] * lane_count
+    for k, lane in tail_lane.items():
+        next_lane[int(lanes[k])] = lane
+    sources = [j for j in range(lane_count) if next_lane[j] is None]
+    targets = sorted(set(range(lane_count)) - set(tail_lane.values()))
+    for j in [j for j in sources if j in targets]:
+        next_lane[j] = j
+    rest_targets = [t for t in targets if t not in next_lane]
+    for j, t in zip([j for j in sources if next_lane[j] is None], rest_targets):
+        next_lane[j] = t
+
+    # 위 Lane 번호는 t0 ~ t0+period 기준이므로, 주 시작(0) ~ t0 사이에 출발하는 스케줄은
+    # 이어서 맡는 Lane 번호로 바꿔 한 주 안에서는 같은 번호 = 같은 기재가 되도록 맞춤
+    wrapped = s < t0
+    lanes[wrapped] = np.asarray(next_lane, dtype=np.int64)[lanes[wrapped]]
+    return lanes, lane_count, next_lane
+
+def rotation_cycles(next_lane):
+    """ next_lane 순열 -> 로테이션 목록 (예: [[0, 2], [1]] = #1->#3->#1 2주 주기, #2 1주 주기) """
+    seen, cycles = set(), []
+    for start in range(len(next_lane)):
+        if start in seen: continue
+        cycle, j = [], start
+        while j not in seen:
+            seen.add(j)
+            cycle.append(j)
+            j = next_lane[j]
+        cycles.append(cycle)
+    return cycles
+
+# --- 공항 연결(Station Continuity) 로테이션 ---
+def split_route(labels):
+    """ Label('ICN-LAX', 'ICN-NRT-LAX') -> (출발 공항, 도착 공항) 배열. '-'가 없으면 둘 다 None """
+    parts = pd.Series(labels).astype(str).str.upper().str.split('-')
+    has_route = parts.str.len() >= 2
+    origins = parts.str[0].str.strip().where(has_route, None)
+    destinations = parts.str[-1].str.strip().where(has_route, None)
+    return origins.to_numpy(dtype=object), destinations.to_numpy(dtype=object)
+
+def assign_chains(starts, ends, origins, destinations, turnaround=None, period=None):
+    """
+    각 스케줄이 직전 스케줄의 도착 공항에서 출발하도록 연결(로테이션)하여 최소 기재 수로 배정.
+    - 최소 경로 덮개(Minimum Path Cover) = 스케줄 수 - 최대 매칭 (도착 -> 같은 공항의 이후 출발)
+    - 한 공항에서 '도착(+지상 시간)'은 그 이후의 모든 출발과 연결 가능하므로, 공항별로 시간순으로 훑으며
+      출발마다 대기 중인 도착 하나를 매칭하는 탐욕법이 최대 매칭 (가장 오래 기다린 기재 우선, 지상 여유 최대)
+    - 공항 정보가 없는 스케줄(None)끼리는 공항 조건 없이 연결
+    - period: 반복 주기(분). D7 2300 -> D1 0600 처럼 주 경계를 넘는 스케줄(종료 < 시작)은 종료 + period에 도착한 것으로 처리
+    - 반환: (Lane 배열, Lane 수). Lane 번호는 로테이션 첫 출발 시각 순
+    """
+    is_datetime = np.asarray(starts).dtype.kind == 'M'
+    unit = NS_PER_MINUTE if is_datetime else 1
+    s = _to_int64(starts)
+    ready = _to_int64(ends)
+    if period is not None:
+        ready = np.where(ready < s, ready + int(round(period * unit)), ready)
+    if turnaround is not None:
+        ground = np.broadcast_to(np.asarray(turnaround, dtype='float64'), ready.shape)
+        ready = ready + np.rint(ground * unit).astype('int64')
+    # 다음 출발은 항상 이번 출발보다 뒤 (period 없이 종료 < 시작인 행이나 0분 스케줄이 순환 연결되지 않도록)
+    ready = np.maximum(ready, s + 1)
+    n = len(s)
+    lanes = np.empty(n, dtype=np.int64)
+    if n == 0:
+        return lanes, 0
+
+    # 공항 코드를 정수로 (None은 별도 코드)
+    codes, _ = pd.factorize(pd.Series(np.concatenate([destinations, origins]), dtype=object).fillna('\0'))
+    dest_code, orig_code = codes[:n], codes[n:]
+
+    # 이벤트: (공항, 시각, 종류 0=도착/1=출발, 스케줄) - 같은 시각이면 도착 먼저
+    station = np.concatenate([dest_code, orig_code])
+    time = np.concatenate([ready, s])
+    kind = np.concatenate([np.zeros(n, dtype=np.int64), np.ones(n, dtype=np.int64)])
+    leg = np.concatenate([np.arange(n), np.arange(n)])
+    order = np.lexsort((kind, time, station))
+
+    next_leg = np.full(n, -1, dtype=np.int64)
+    has_prev = np.zeros(n, dtype=bool)
+    waiting, current = deque(), None
+    for st_code, k, i in zip(station[order].tolist(), kind[order].tolist(), leg[order].tolist()):
+        if st_code != current:
+            waiting.clear()
+            current = st_code
+        if k == 0:
+            waiting.append(i)
+        elif waiting:
+            prev = waiting.popleft()
+            next_leg[prev] = i
+            has_prev[i] = True
+
+    # 로테이션 시작 스케줄부터 따라가며 Lane 번호 부여
+    heads = np.nonzero(~has_prev)[0]
+    heads = heads[np.argsort(s[heads], kind='stable')]
+    for lane, i in enumerate(heads.tolist()):
+        while i != -1:
+            lanes[i] = lane
+            i = int(next_leg[i])
+    return lanes, len(heads)
+
+# --- 부하 균형 (Local Search) ---
+class LaneBalancer:
+    """
+    Lane 수는 그대로 두고 Lane 사이 스케줄 이동/교환으로 기재별 블록 시간을 고르게 하고 짧은 지상 시간을 늘림.
+    - 비용 = Σ(Lane 블록 시간 - 평균)² + buffer_weight · Σ max(0, buffer - 여유 지상 시간)²  (분 단위)
+      여유 지상 시간 = 다음 출발 - (도착 + 최소 지상 시간)
+    - move: 스케줄 하나를 다른 Lane의 빈 자리로 / tail swap: 어느 시각 이후의 두 Lane 스케줄을 통째로 맞바꿈
+    - 비용이 늘지 않는 변경만 받아들이므로 언제 멈춰도 현재 배정(lanes)이 지금까지의 최선
+    - run()은 시간 예산(초)만큼 실행하고, 다시 호출하면 이어서 개선
+    """
+    def __init__(self, starts, ends, lanes, turnaround=None, buffer=60, buffer_weight=1.0, seed=0):
+        unit = NS_PER_MINUTE if np.asarray(starts).dtype.kind == 'M' else 1
+        self.s = (_to_int64(starts) / unit).tolist()
+        e = _to_int64(ends) / unit
+        ground = 0 if turnaround is None else np.broadcast_to(np.asarray(turnaround, dtype='float64'), e.shape)
+        self.ready = (e + ground).tolist()
+        self.dur = (e - np.asarray(self.s)).tolist()
+        self.buffer, self.weight = float(buffer), float(buffer_weight)
+        self.lanes = np.asarray(lanes, dtype=np.int64).copy()
+        self.lane_count = int(self.lanes.max()) + 1 if len(self.lanes) else 0
+
+        # Lane별 출발 순 스케줄 목록 + 출발 시각 목록(bisect용), Lane 블록 시간
+        order = np.lexsort((np.asarray(self.s), self.lanes))
+        bounds = np.searchsorted(self.lanes[order], np.arange(self.lane_count + 1))
+        self.members = [order[bounds[k]:bounds[k + 1]].tolist() for k in range(self.lane_count)]
+        self.keys = [[self.s[i] for i in m] for m in self.members]
+        self.block = [sum(self.dur[i] for i in m) for m in self.members]
+        self.mean = sum(self.block) / max(self.lane_count, 1)
+
+        self.initial_cost = self.cost = self._total_cost()
+        self.iterations = self.accepted = 0
+        self.elapsed = 0.0
+        self._rng = random.Random(seed)
+        self._since_improved = 0
+
+    # 비용 계산
+    def _gap(self, prev, nxt):
+        """ prev -> nxt 연결의 지상 여유 부족 비용 (한쪽이 없으면 0) """
+        if prev is None or nxt is None:
+            return 0.0
+        short = self.buffer - (self.s[nxt] - self.ready[prev])
+        return self.weight * short * short if short > 0 else 0.0
+
+    def _balance(self, block):
+        return (block - self.mean) ** 2
+
+    def _total_cost(self):
+        cost = sum(self._balance(b) for b in self.block)
+        for m in self.members:
+            cost += sum(self._gap(a, b) for a, b in zip(m, m[1:]))
+        return cost
+
+    @staticmethod
+    def _at(members, pos):
+        return members[pos] if 0 <= pos < len(members) else None
+
+    # 변경 후보
+    def _try_move(self, i, b):
+        """ 스케줄 i를 Lane b로 옮길 때 (비용 변화, 적용 함수), 들어갈 자리가 없으면 None """
+        a = int(self.lanes[i])
+        ma, mb = self.members[a], self.members[b]
+        if len(ma) == 1:
+            return None    # Lane을 비우지 않음
+        pa = bisect.bisect_left(self.keys[a], self.s[i])
+        while ma[pa] != i:
+            pa += 1
+        pb = bisect.bisect_left(self.keys[b], self.s[i])
+        prev_b, next_b = self._at(mb, pb - 1), self._at(mb, pb)
+        if (prev_b is not None and self.ready[prev_b] > self.s[i]) or (next_b is not None and self.ready[i] > self.s[next_b]):
+            return None
+        prev_a, next_a = self._at(ma, pa - 1), self._at(ma, pa + 1)
+        d = self.dur[i]
+        delta = (self._balance(self.block[a] - d) + self._balance(self.block[b] + d)
+                 - self._balance(self.block[a]) - self._balance(self.block[b])
+                 + self._gap(prev_a, next_a) - self._gap(prev_a, i) - self._gap(i, next_a)
+                 + self._gap(prev_b, i) + self._gap(i, next_b) - self._gap(prev_b, next_b))
+
+        def apply():
+            del ma[pa], self.keys[a][pa]
+            mb.insert(pb, i)
+            self.keys[b].insert(pb, self.s[i])
+            self.block[a] -= d
+            self.block[b] += d
+            self.lanes[i] = b
+        return delta, apply
+
+    def _try_tail_swap(self, i, b):
+        """ 스케줄 i의 출발 시각 이후 Lane a(i 포함)와 Lane b의 스케줄을 맞바꿀 때 (비용 변화, 적용 함수) """
+        a = int(self.lanes[i])
+        ma, mb = self.members[a], self.members[b]
+        pa = bisect.bisect_left(self.keys[a], self.s[i])
+        pb = bisect.bisect_left(self.keys[b], self.s[i])
+        if pa == 0 and pb in (0, len(mb)):
+            return None    # 두 Lane을 통째로 맞바꾸거나 Lane a를 비우는 경우 제외
+        prev_a, first_a = self._at(ma, pa - 1), self._at(ma, pa)
+        prev_b, first_b = self._at(mb, pb - 1), self._at(mb, pb)
+        if (prev_a is not None and first_b is not None and self.ready[prev_a] > self.s[first_b]) or \
+           (prev_b is not None and first_a is not None and self.ready[prev_b] > self.s[first_a]):
+            return None
+        tail_a, tail_b = sum(self.dur[k] for k in ma[pa:]), sum(self.dur[k] for k in mb[pb:])
+        delta = (self._balance(self.block[a] - tail_a + tail_b) + self._balance(self.block[b] - tail_b + tail_a)
+                 - self._balance(self.block[a]) - self._balance(self.block[b])
+                 + self._gap(prev_a, first_b) + self._gap(prev_b, first_a)
+                 - self._gap(prev_a, first_a) - self._gap(prev_b, first_b))
+
+        def apply():
+            new_a, new_b = ma[:pa] + mb[pb:], mb[:pb] + ma[pa:]
+            self.members[a], self.members[b] = new_a, new_b
+            self.keys[a], self.keys[b] = self.keys[a][:pa] + self.keys[b][pb:], self.keys[b][:pb] + self.keys[a][pa:]
+            self.block[a], self.block[b] = self.block[a] - tail_a + tail_b, self.block[b] - tail_b + tail_a
+            self.lanes[new_a[pa:]] = a
+            self.lanes[new_b[pb:]] = b
+        return delta, apply
+
+    def run(self, budget, progress=None, patience=None, report_every=0.2):
+        """
+        budget초 동안 무작위 move / tail swap 후보 중 비용이 늘지 않는 것만 적용.
+        - patience: 이만큼 연속으로 개선이 없으면 예산 전에 종료 (기본: max(20000, 스케줄 수 x 20))
+        - progress(balancer): report_every초마다 + 종료 시 호출 (iterations, cost, initial_cost, elapsed 참고)
+        """
+        n = len(self.s)
+        if n == 0 or self.lane_count < 2:
+            return self
+        patience = patience or max(20000, n * 20)
+        rng, started, last_report = self._rng, perf_counter(), 0.0
+        base_elapsed = self.elapsed
+        while True:
+            for _ in range(256):
+                i = rng.randrange(n)
+                b = rng.randrange(self.lane_count - 1)
+                if b >= self.lanes[i]:
+                    b += 1
+                candidate = self._try_move(i, b) if rng.random() < 0.5 else self._try_tail_swap(i, b)
+                self.iterations += 1
+                self._since_improved += 1
+                if candidate is None or candidate[0] > 1e-9:
+                    continue
+                candidate[1]()
+                self.cost += candidate[0]
+                self.accepted += 1
+                if candidate[0] < -1e-9:
+                    self._since_improved = 0
+            now = perf_counter() - started
+            self.elapsed = base_elapsed + now
+            done = now >= budget or self._since_improved >= patience
+            if progress is not None and (done or now - last_report >= report_every):
+                last_report = now
+                progress(self)
+            if done:
+                return self
+
+    def result(self):
+        """ Lane 배열 (Lane 번호는 첫 출발 시각 순으로 다시 매김) """
+        first = [self.s[m[0]] if m else np.inf for m in self.members]
+        rank = np.empty(self.lane_count, dtype=np.int64)
+        rank[np.argsort(first, kind='stable')] = np.arange(self.lane_count)
+        return rank[self.lanes]
+
+    def summary(self):
+        """ 기재별 블록 시간 표준편차/최소·최대(h), 최소 지상 여유(분), 비용 """
+        block = np.asarray(self.block) / 60
+        slack = [self.s[b] - self.ready[a] for m in self.members for a, b in zip(m, m[1:])]
+        return {
+            'lanes': self.lane_count, 'iterations': self.iterations, 'accepted': self.accepted,
+            'initial_cost': self.initial_cost, 'cost': self.cost, 'elapsed': self.elapsed,
+            'block_std_h': float(block.std()) if len(block) else 0.0,
+            'block_min_h': float(block.min()) if len(block) else 0.0,
+            'block_max_h': float(block.max()) if len(block) else 0.0,
+            'min_slack_min': float(min(slack)) if slack else None,
+        }
+
+# --- 스케줄 최적화 (Streamlit 없이 사용 가능) ---
+def optimize_schedule(df, turnaround=None, mode="linear", period=WEEK_MINUTES, origin=BASE_DATE,
+                      balance=0, buffer=60, progress=None):
+    """
+    스케줄 DataFrame의 Resource를 Lane 번호(#1, #2, ...)로 다시 배정.
+    turnaround: 스케줄별 최소 지상 시간(분) 배열 (df 행 순서 기준)
+    mode: "linear"  - 1주를 직선으로 보고 겹치지 않게 배정
+          "cyclic"  - 1주를 원형으로 보고 D7 -> D1 경계를 넘는 로테이션까지 포함해 최소 기재 수로 배정 (origin: D1 0000)
+          "station" - Label(ICN-LAX)의 도착 공항에서 다음 스케줄이 출발하도록 연결하여 배정
+    balance: linear 모드에서 최소 Lane 배정 후 부하 균형(LaneBalancer)에 쓸 시간 예산(초, 0이면 생략)
+             buffer: 목표 지상 여유(분), progress: LaneBalancer.run의 진행 콜백
+    반환: (정렬된 DataFrame, Lane 수, 순환 로테이션 목록[cyclic 모드만])
+    """
+    if turnaround is not None:
+        df = df.assign(_turnaround=turnaround)
+    # 1. 시작 시간(Start) 우선, 그 다음 종료 시간(End) 순으로 정렬
+    with stage('optimize.sort'):
+        df_opt = df.sort_values(by=['Start', 'End'])
+    # 시간 형식 오류 행(NaT)은 배정 대상에서 제외하고 기존 Resource 유지
+    valid = (df_opt['Start'].notna() & df_opt['End'].notna()).to_numpy()
+
+    # 2. 힙 기반 Lane 배정 (겹치지 않는 가장 앞 번호 Lane, 없으면 새 Lane 추가)
+    # (최소 지상 시간 지정 시 '도착 + 지상 시간' 이후에만 같은 Lane 재사용)
+    ground = df_opt.pop('_turnaround').to_numpy()[valid] if turnaround is not None else None
+    starts, ends = df_opt['Start'].to_numpy()[valid], df_opt['End'].to_numpy()[valid]
+    rotations = []
+    with stage(f'optimize.assign ({mode})'):
+        if mode == "cyclic":
+            lanes, lane_count, next_lane = assign_lanes_cyclic(starts, ends, period, ground, np.datetime64(origin, 'ns'))
+            rotations = [[f"#{j + 1}" for j in cycle] for cycle in rotation_cycles(next_lane)]
+        elif mode == "station":
+            origins, destinations = split_route(df_opt['Label'].to_numpy()[valid])
+            lanes, lane_count = assign_chains(starts, ends, origins, destinations, ground, period)
+        else:
+            lanes, lane_count = assign_lanes(starts, ends, ground)
+    # First-Fit은 앞 번호 Lane부터 채우므로, 남은 예산 동안 Lane 사이 이동/교환으로 블록 시간과 지상 여유를 고르게
+    # (cyclic/station은 주 경계 연결/공항 연결 조건이 있어 제외)
+    if balance > 0 and mode == "linear":
+        with stage('optimize.balance'):
+            lanes = LaneBalancer(starts, ends, lanes, ground, buffer).run(balance, progress).result()
+
+    # 3. Resource 이름 일괄 재할당 (#1, #2, ...) - Categorical이면 새 이름이 범주에 없으므로 일반 컬럼으로 변환
+    with stage('optimize.relabel'):
+        if isinstance(df_opt['Resource'].dtype, pd.CategoricalDtype):
+            df_opt['Resource'] = df_opt['Resource'].astype(object)
+        df_opt.loc[valid, 'Resource'] = '#' + pd.Series(lanes + 1, index=df_opt.index[valid]).astype(str)
+    return df_opt, lane_count, rotations
+
+# --- 최소 지상 시간(Turnaround) 규칙 ---
+def parse_turnaround_rules(text):
+    """
+    'LAX=90' (도착 공항별), 'ICN-LAX=120' (Label별) 형식의 줄/쉼표 구분 규칙 -> (공항별 dict, Label별 dict)
+    형식이 잘못된 항목은 ValueError
+    """
+    by_station, by_label = {}, {}
+    for entry in re.split(r'[,\n]', text or ""):
+        entry = entry.strip()
+        if not entry: continue
+        key, sep, value = entry.partition('=')
+        key = key.strip().upper()
+        try:
+            minutes = float(value)
+        except ValueError:
+            minutes = -1
+        if not sep or not key or minutes < 0:
+            raise ValueError(f"지상 시간 규칙 형식 오류: '{entry}' (예: LAX=90, ICN-LAX=120)")
+        (by_label if '-' in key else by_station)[key] = minutes
+    return by_station, by_label
+
+def turnaround_minutes(labels, default=0, by_station=None, by_label=None):
+    """
+    스케줄별 최소 지상 시간(분) 배열. 우선순위: Label 규칙 > 도착 공항 규칙 > 기본값
+    도착 공항은 Label('ICN-LAX')의 마지막 구간, '-'가 없으면 Label 전체('LAX')
+    """
+    labels = pd.Series(labels).astype(str).str.strip().str.upper()
+    out = pd.Series(float(default), index=labels.index)
+    if by_station:
+        station = labels.str.split('-').str[-1].str.strip()
+        out = station.map(by_station).fillna(out)
+    if by_label:
+        out = labels.map(by_label).fillna(out)
+    return out.to_numpy(dtype='float64')
@@ -0,0 +1,72 @@
+import json
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from time import perf_counter
+import pandas as pd
+
+# 단계별 실행 시간 기록 파일 (JSON Lines, 한 줄 = rerun 1회)
+PROFILE_LOG = os.environ.get('SCHEDULE_PROFILE_LOG', 'profile_log.jsonl')
+
+_active = ContextVar('profiler', default=None)
+
+# --- 단계별 실행 시간 측정 ---
+class Profiler:
+    """
+    스크립트 1회 실행(rerun)의 단계별 소요 시간.
+    activate() 후에는 어느 모듈에서든 stage('이름')으로 측정 (중첩 가능, 활성 Profiler가 없으면 측정하지 않음)
+    """
+    def __init__(self, label=None):
+        self.label = label or datetime.now().strftime('%H:%M:%S')
+        self.started = perf_counter()
+        self.total = None    # finish() 이후 전체 소요 시간(초)
+        self.records = []    # [이름, 깊이, 초] (시작 순서)
+        self._depth = 0
+
+    def activate(self):
+        _active.set(self)
+        return self
+
+    def elapsed(self):
+        return self.total if self.total is not None else perf_counter() - self.started
+
+    def finish(self, note=""):
+        """ 측정 종료 (note: 중간에 rerun으로 끝난 실행 등 표시용) """
+        self.total = perf_counter() - self.started
+        if note:
+            self.label += f" {note}"
+        return self
+
+    def frame(self):
+        """ 단계별 소요 시간 표 (하위 단계는 이름 앞 들여쓰기) """
+        return pd.DataFrame({
+            "단계": ["  " * depth + name for name, depth, _ in self.records],
+            "ms": [round(seconds * 1000, 1) for _, _, seconds in self.records],
+        })
+
+    def append_log(self, path=PROFILE_LOG, **meta):
+        """ 측정 결과를 JSON Lines 파일에 한 줄 추가 """
+        entry = {'timestamp': datetime.now().isoformat(timespec='seconds'), 'label': self.label,
+                 'total_s': round(self.elapsed(), 6), **meta,
+                 'stages': [{'stage': name, 'depth': depth, 'seconds': round(seconds, 6)}
+                            for name, depth, seconds in self.records]}
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+@contextmanager
+def stage(name):
+    """ 활성 Profiler에 name 단계 소요 시간 기록 """
+    profiler = _active.get()
+    if profiler is None:
+        yield
+        return
+    record = [name, profiler._depth, 0.0]
+    profiler.records.append(record)
+    profiler._depth += 1
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        record[2] = perf_counter() - start
+        profiler._depth -= 1
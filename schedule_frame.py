@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+from d_time import BASE_DATE, MINUTES_PER_DAY, parse_d_minutes, format_d_minutes
+
+# --- 압축(Compact) 스케줄 표현 ---
+# - Start/End      -> BASE_DATE 기준 분 오프셋 Start_Min/End_Min (Int32, 시간 형식 오류 행은 <NA>)
+# - Resource/Label/Color -> Categorical (문자열은 범주 목록에 한 번씩만 저장, 행에는 정수 코드)
+# - D-Time 문자열('D1 1320')과 datetime 컬럼은 저장하지 않고 표시/저장 시점에 expand_schedule로 생성
+#   (단, 시간 형식 오류 행의 원본 문자열은 Start_D/End_D에 남겨 엑셀 저장 시 그대로 기록)
+MINUTE_COLUMNS = ('Start_Min', 'End_Min')
+CATEGORY_COLUMNS = ('Resource', 'Label', 'Color')
+
+def to_minutes(values, base_date=BASE_DATE):
+    """ datetime 컬럼 -> BASE_DATE 기준 분 오프셋 (Int32, NaT는 <NA>) """
+    delta = pd.to_datetime(pd.Series(values)) - pd.Timestamp(base_date)
+    return (delta // pd.Timedelta(minutes=1)).astype('Int32')
+
+def is_compact(df):
+    return MINUTE_COLUMNS[0] in df.columns
+
+def compact_schedule(df, base_date=BASE_DATE):
+    """ 정규화된 스케줄(Start/End datetime 또는 Start_D/End_D 문자열) -> 압축 표현 """
+    if 'Start' in df.columns:
+        starts, ends = to_minutes(df['Start'], base_date), to_minutes(df['End'], base_date)
+    elif 'Start_D' in df.columns:
+        starts = parse_d_minutes(df['Start_D'])[0].astype('Int32')
+        ends = parse_d_minutes(df['End_D'])[0].astype('Int32')
+    else:
+        starts = ends = pd.Series(pd.NA, index=range(len(df)), dtype='Int32')
+    invalid = (starts.isna() | ends.isna()).to_numpy()
+
+    out = df.drop(columns=[c for c in ('Start', 'End', 'Start_D', 'End_D') if c in df.columns])
+    for col in CATEGORY_COLUMNS:
+        if col in out.columns:
+            out[col] = out[col].astype('category')
+    out['Start_Min'] = starts.array
+    out['End_Min'] = ends.array
+    if invalid.any() and 'Start_D' in df.columns:
+        # 시간 형식 오류 행만 원본 문자열 보관 (나머지는 <NA>)
+        for col in ('Start_D', 'End_D'):
+            out[col] = df[col].where(invalid).astype('category')
+    return out
+
+def expand_schedule(cdf, base_date=BASE_DATE, d_time=False, days=7):
+    """
+    압축 스케줄 -> Start/End(datetime) 컬럼이 있는 화면/계산용 DataFrame (index 동일)
+    d_time=True: 엑셀 저장용으로 Start_D/End_D 문자열도 생성 (Resource 바로 뒤, days: 계획 기간 일수)
+    """
+    base = pd.Timestamp(base_date)
+    starts = base + pd.to_timedelta(cdf['Start_Min'].to_numpy(dtype='float64', na_value=np.nan), unit='m')
+    ends = base + pd.to_timedelta(cdf['End_Min'].to_numpy(dtype='float64', na_value=np.nan), unit='m')
+    raw = [c for c in ('Start_D', 'End_D') if c in cdf.columns]
+    out = cdf.drop(columns=list(MINUTE_COLUMNS) + (raw if d_time else []))
+    if d_time:
+        for pos, (col, minutes) in enumerate(zip(('Start_D', 'End_D'), MINUTE_COLUMNS), start=1):
+            text = format_d_minutes(cdf[minutes], days)
+            if col in raw:
+                text = text.where(cdf[minutes].notna(), cdf[col].astype(object).fillna(""))
+            out.insert(min(pos, len(out.columns)), col, text.to_numpy())
+    out['Start'] = starts
+    out['End'] = ends
+    return out
+
+def _align_categories(cdf, col, values):
+    """ Categorical 컬럼에 없는 값을 범주에 추가 """
+    new = pd.Index(pd.unique(pd.Series(values, dtype=object).dropna())).difference(cdf[col].cat.categories)
+    if len(new):
+        cdf[col] = cdf[col].cat.add_categories(new)
+
+def set_rows(cdf, ids, values):
+    """ 압축 스케줄의 일부 행 값을 제자리에서 변경 (values: {컬럼: 값 배열}) """
+    for col, vals in values.items():
+        if isinstance(cdf[col].dtype, pd.CategoricalDtype):
+            _align_categories(cdf, col, vals)
+        cdf.loc[ids, col] = vals
+
+def concat_rows(cdf, rows):
+    """ 압축 스케줄 + 압축 스케줄 행 -> 새 압축 스케줄 (Categorical 범주 합침) """
+    cdf, rows = cdf.copy(), rows.copy()
+    for col in CATEGORY_COLUMNS + ('Start_D', 'End_D'):
+        if col in cdf.columns and col in rows.columns:
+            categories = cdf[col].cat.categories.union(rows[col].cat.categories, sort=False)
+            cdf[col] = cdf[col].cat.set_categories(categories)
+            rows[col] = rows[col].cat.set_categories(categories)
+    return pd.concat([cdf, rows])
+
+def append_rows(cdf, rows, base_date=BASE_DATE):
+    """ 압축 스케줄 + 새 스케줄 행(Start/End datetime, index 유지) -> 새 압축 스케줄 (범주 합침) """
+    return concat_rows(cdf, compact_schedule(rows, base_date))
+
+# --- 반복 스케줄 (운항 요일) 일괄 생성 ---
+# 편 정의 1행(기재, Label, 색상, 운항 요일, 출발 시각, 비행 시간, 운항 주기) -> 계획 기간 안의 모든 운항편.
+# (편 x 날짜) 격자에서 운항하는 칸만 골라 압축 스케줄 행을 한 번에 생성 -> concat_rows 1회로 추가
+RECURRING_COLUMNS = ('Resource', 'Label', 'Color', 'Days', 'Time', 'Duration', 'Every')
+HHMM_PATTERN = r'^\s*(\d{1,2}):?(\d{2})\s*$'
+
+def parse_hhmm(values, max_hours=24):
+    """ '1320', '13:20', '930' 컬럼 -> 분 (float, 오류 행은 NaN) """
+    parts = pd.Series(values).astype('string').str.extract(HHMM_PATTERN)
+    hours = pd.to_numeric(parts[0]).astype('float64')
+    minutes = pd.to_numeric(parts[1]).astype('float64')
+    return (hours * 60 + minutes).mask((hours >= max_hours) | (minutes >= 60)).to_numpy(dtype='float64', na_value=np.nan)
+
+def parse_days_of_operation(values):
+    """
+    운항 요일 컬럼 -> (행 수 x 7) bool 배열 (열 0~6 = 매주 D1~D7)
+    '1357', '1.3.5.7', 'D1,D3,D5', '매일'/'daily' 형식, 1~7 외 숫자가 있으면 오류 행 (모두 False)
+    """
+    s = pd.Series(values).astype('string').str.strip().str.lower()
+    daily = s.isin(['daily', '매일']).to_numpy(dtype=bool, na_value=False)
+    digits = s.str.replace(r'[\sd.,/]', '', regex=True)
+    valid = digits.str.fullmatch(r'[1-7]+').to_numpy(dtype=bool, na_value=False)
+    mask = np.column_stack([digits.str.contains(str(k), regex=False).to_numpy(dtype=bool, na_value=False)
+                            for k in range(1, 8)])
+    mask &= valid[:, None]
+    mask[daily] = True
+    return mask
+
+def recurring_rows(flights, days=7, start_id=0):
+    """
+    반복 스케줄 정의(RECURRING_COLUMNS) -> 계획 기간(days일) 안의 모든 운항편 압축 스케줄 행 (index: start_id부터)
+    Every: 운항 주기(주, 1 = 매주, 2 = 격주, 생략 시 매주) - 첫 주부터 셈
+    반환: (압축 스케줄 행 - 편 정의 순서 x 날짜 순, 오류 정의 행 마스크)
+    """
+    flights = flights.reset_index(drop=True)
+    dow = parse_days_of_operation(flights['Days'])
+    start = parse_hhmm(flights['Time'])
+    duration = parse_hhmm(flights['Duration'], max_hours=100)
+    every = (pd.to_numeric(flights['Every'], errors='coerce').to_numpy(dtype='float64', na_value=1.0)
+             if 'Every' in flights.columns else np.ones(len(flights)))
+    invalid = ~dow.any(axis=1) | np.isnan(start) | ~(duration > 0) | ~(every >= 1)
+
+    day = np.arange(days)
+    period = np.where(invalid, 1, every).astype('int64')
+    runs = dow[:, day % 7] & ((day // 7)[None, :] % period[:, None] == 0) & ~invalid[:, None]
+    flight_idx, day_idx = np.nonzero(runs)
+    starts = day_idx * MINUTES_PER_DAY + start[flight_idx]
+
+    rows = pd.DataFrame(index=pd.RangeIndex(start_id, start_id + len(flight_idx)))
+    for col in CATEGORY_COLUMNS:
+        if col in flights.columns:
+            # 편 정의의 범주 코드만 복제 (문자열 복사 없음)
+            values = flights[col].astype('category')
+            rows[col] = pd.Categorical.from_codes(values.cat.codes.to_numpy()[flight_idx], dtype=values.dtype)
+    rows['Start_Min'] = pd.array(starts, dtype='Int32')
+    rows['End_Min'] = pd.array(starts + duration[flight_idx], dtype='Int32')
+    return rows, invalid
@@ -0,0 +1,126 @@
+from collections import deque
+import numpy as np
+import pandas as pd
+from schedule_frame import set_rows, concat_rows
+
+# --- 되돌리기/다시 실행 (Undo/Redo) ---
+# 스케줄 전체 사본 대신 바뀐 행만 기록 (추가/삭제된 행, 값이 바뀐 행의 바뀐 컬럼 전/후 값).
+# - 이동/복제/삭제: 해당 행 몇 개만 저장
+# - 최적화(Resource 재배정): 기재가 바뀐 행의 Resource 컬럼(Categorical 코드)과 행 순서만 저장
+# - 기록 개수는 limit개로 제한 (오래된 것부터 버림)
+HISTORY_LIMIT = 50
+
+def _differs(before, after):
+    """ 같은 index의 두 컬럼 값이 다른 행 마스크 (둘 다 결측이면 같음) """
+    b, a = before.astype(object).to_numpy(), after.astype(object).to_numpy()
+    b_na, a_na = pd.isna(b), pd.isna(a)
+    # <NA>(Int32 분 오프셋 결측)끼리 != 비교는 TypeError이므로 둘 다 값이 있는 칸만 비교
+    ne = b_na != a_na
+    both = ~(b_na | a_na)
+    ne[both] = b[both] != a[both]
+    return ne
+
+class ScheduleEdit:
+    """ 스케줄 변경 1건 (apply(df) = 다시 실행, apply(df, undo=True) = 되돌리기) """
+    def __init__(self, label, removed, before, after, added, order=None, state=None, removed_at=None):
+        self.label = label
+        self.removed, self.added = removed, added    # 삭제/추가된 행 (압축 스케줄 행)
+        self.removed_at = removed_at                 # 삭제된 행의 변경 전 위치 (되돌릴 때 같은 자리에 다시 넣음)
+        self.before, self.after = before, after      # 값이 바뀐 행의 바뀐 컬럼 (변경 전/후)
+        self.order = order                           # 행 순서가 바뀐 경우 (변경 전 index, 변경 후 index)
+        self.state = state or {}                     # 스케줄 외 세션 값 {이름: (변경 전, 변경 후)}
+
+    def is_empty(self):
+        return not (len(self.removed) or len(self.added) or len(self.before) or self.order or
+                    any(b != a for b, a in self.state.values()))
+
+    def apply(self, df, undo=False):
+        """ 압축 스케줄에 변경을 (다시) 적용하거나 되돌린 새 DataFrame과 세션 값 {이름: 값} 반환 """
+        rows_out, rows_in = (self.added, self.removed) if undo else (self.removed, self.added)
+        values = self.before if undo else self.after
+        df = df.drop(index=rows_out.index.intersection(df.index))
+        if len(values):
+            set_rows(df, values.index, {col: values[col].astype(object).to_numpy() if
+                                        isinstance(values[col].dtype, pd.CategoricalDtype) else values[col].array
+                                        for col in values.columns})
+        if len(rows_in):
+            df = concat_rows(df, rows_in)
+        if undo and len(self.removed):
+            rest = df.index[:len(df) - len(self.removed)].to_numpy()
+            df = df.loc[np.insert(rest, self.removed_at - np.arange(len(self.removed_at)), self.removed.index.to_numpy())]
+        if self.order is not None:
+            df = df.loc[self.order[0] if undo else self.order[1]]
+        return df, {name: pair[0] if undo else pair[1] for name, pair in self.state.items()}
+
+    def rename(self, id_map):
+        """ 행 index 변경 반영 (공유 편집에서 새 행의 id를 저장소가 다시 발급한 경우) """
+        self.removed, self.added = self.removed.rename(index=id_map), self.added.rename(index=id_map)
+        self.before, self.after = self.before.rename(index=id_map), self.after.rename(index=id_map)
+        if self.order is not None:
+            self.order = tuple(pd.Index(ids).map(lambda i: id_map.get(i, i)).to_numpy() for ids in self.order)
+
+class ScheduleSnapshot:
+    """
+    변경 직전 상태. diff()로 변경 후 스케줄과 비교해 ScheduleEdit 생성.
+    - ids 지정: 해당 행만 복사해 둠 (apply_timeline_delta처럼 제자리 변경하는 작업용)
+    - ids 생략: df를 그대로 참조 (최적화/기재 제거처럼 새 DataFrame을 만드는 작업용)
+    - state: 함께 되돌릴 세션 값 {이름: 값} (기재 목록, 순환 로테이션 등)
+    """
+    def __init__(self, df, ids=None, state=None):
+        self.index = df.index    # 제자리 변경(drop inplace 등) 시 새 Index 객체가 생기므로 참조로 충분
+        self.full = ids is None
+        self.rows = df if self.full else df.loc[df.index.intersection(ids)].copy()
+        self.state = {k: list(v) for k, v in (state or {}).items()}
+
+    def diff(self, label, df, state=None):
+        rows = self.rows
+        kept = rows.index.isin(df.index)
+        removed = rows[~kept]
+        removed_at = self.index.get_indexer(removed.index)
+        removed, removed_at = removed.iloc[np.argsort(removed_at)], np.sort(removed_at)
+        added = df[~df.index.isin(self.index)]
+
+        kept_ids = rows.index[kept]
+        columns = [c for c in rows.columns if c in df.columns]
+        masks = {c: _differs(rows.loc[kept_ids, c], df.loc[kept_ids, c]) for c in columns}
+        changed_cols = [c for c in columns if masks[c].any()]
+        changed = np.logical_or.reduce([masks[c] for c in changed_cols]) if changed_cols else np.zeros(len(kept_ids), bool)
+        changed_ids = kept_ids[changed]
+
+        order = None
+        if self.full and removed.empty and added.empty and not self.index.equals(df.index):
+            order = (self.index.to_numpy(), df.index.to_numpy())
+        state = {k: (self.state[k], list(v)) for k, v in (state or {}).items() if k in self.state}
+        return ScheduleEdit(label, removed, rows.loc[changed_ids, changed_cols], df.loc[changed_ids, changed_cols],
+                            added, order, state, removed_at)
+
+class ScheduleHistory:
+    """ 되돌리기/다시 실행 목록 (새 변경을 기록하면 다시 실행 목록은 비움) """
+    def __init__(self, limit=HISTORY_LIMIT):
+        self.undo_stack = deque(maxlen=limit)
+        self.redo_stack = deque(maxlen=limit)
+
+    def record(self, edit):
+        if edit.is_empty():
+            return
+        self.undo_stack.append(edit)
+        self.redo_stack.clear()
+
+    def rename(self, id_map):
+        for edit in list(self.undo_stack) + list(self.redo_stack):
+            edit.rename(id_map)
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+
+    def undo(self, df):
+        """ 반환: (새 스케줄, 세션 값, 되돌린 변경 이름) """
+        edit = self.undo_stack.pop()
+        self.redo_stack.append(edit)
+        return edit.apply(df, undo=True) + (edit.label,)
+
+    def redo(self, df):
+        edit = self.redo_stack.pop()
+        self.undo_stack.append(edit)
+        return edit.apply(df) + (edit.label,)
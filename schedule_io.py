@@ -0,0 +1,149 @@
+import hashlib
+import os
+import re
+from collections import OrderedDict
+from io import BytesIO
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from d_time import BASE_DATE, WEEK_MINUTES, parse_d_time_series
+
+# 업로드 파일 캐시 설정 (메모리 LRU 개수, Parquet 보조 파일 저장 폴더)
+CACHE_SIZE = 8
+CACHE_DIR = os.environ.get('SCHEDULE_CACHE_DIR')
+
+_cache = OrderedDict()
+
+# --- 스케줄 정규화 ---
+def normalize_schedule(df, base_date=BASE_DATE):
+    """ 필수 컬럼 보정 + Start/End 계산. 반환: (DataFrame, 시간 형식 오류 행 마스크) """
+    for col, default in [('Color', '#ADD8E6'), ('Resource', 'Unassigned'), ('Label', 'Flight')]:
+        if col not in df.columns: df[col] = default
+    invalid = np.zeros(len(df), dtype=bool)
+    if 'Start_D' in df.columns:
+        df['Start'], bad_start = parse_d_time_series(df['Start_D'], base_date)
+        df['End'], bad_end = parse_d_time_series(df['End_D'], base_date)
+        invalid = bad_start | bad_end
+    return df, invalid
+
+# --- 엑셀 로드 (내용 해시 캐시) ---
+def file_digest(data):
+    """ 업로드 파일 내용(bytes) -> SHA-256 해시 """
+    return hashlib.sha256(data).hexdigest()
+
+def _invalid_mask(df):
+    if 'Start' not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    return (df['Start'].isna() | df['End'].isna()).to_numpy()
+
+def _read_parquet(path):
+    try:
+        return pd.read_parquet(path)
+    except (ImportError, OSError, ValueError):
+        return None
+
+def _write_parquet(df, path):
+    # Parquet 엔진(pyarrow 등)이 없거나 저장에 실패해도 메모리 캐시는 그대로 사용
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        df.to_parquet(path, index=False)
+    except (ImportError, OSError, ValueError, TypeError):
+        pass
+
+def load_schedule_excel(data, base_date=BASE_DATE, cache_dir=CACHE_DIR):
+    """
+    엑셀 파일 내용(bytes) -> 정규화된 스케줄. 반환: (DataFrame, 시간 형식 오류 행 마스크)
+    - 같은 내용의 파일은 해시로 찾아 read_excel/D-Time 파싱을 건너뜀 (메모리 LRU)
+    - cache_dir 지정 시 '<해시>_<기준일>.parquet' 보조 파일도 사용 (서버 재시작 후에도 유지)
+    - 호출 측에서 수정해도 캐시가 바뀌지 않도록 항상 복사본을 반환
+    """
+    key = (file_digest(data), pd.Timestamp(base_date).isoformat())
+    if key in _cache:
+        _cache.move_to_end(key)
+        df = _cache[key]
+        return df.copy(), _invalid_mask(df)
+
+    base_tag = pd.Timestamp(base_date).strftime('%Y%m%d')
+    path = os.path.join(cache_dir, f"{key[0]}_{base_tag}.parquet") if cache_dir else None
+    df = _read_parquet(path) if path and os.path.exists(path) else None
+    if df is None:
+        df, _ = normalize_schedule(pd.read_excel(BytesIO(data)), base_date)
+        if path:
+            _write_parquet(df, path)
+
+    _cache[key] = df
+    while len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return df.copy(), _invalid_mask(df)
+
+# --- 엑셀 저장 ---
+def natural_sort_key(s):
+    return [int(text) if text.isdigit() else text.lower() for text in re.split(r'(\d+)', str(s))]
+
+EXPORT_CHUNK_ROWS = 5000
+_SHEET_NAME_INVALID = re.compile(r'[\[\]:*?/\\]')
+
+def _sheet_name(name, used):
+    """ 엑셀 시트 이름 규칙(31자, []:*?/\ 금지, 중복 불가)에 맞게 변환 """
+    base = _SHEET_NAME_INVALID.sub('_', str(name)).strip("'")[:31] or 'Sheet'
+    title, k = base, 1
+    while title.lower() in used:
+        k += 1
+        title = f"{base[:31 - len(str(k)) - 1]}~{k}"
+    used.add(title.lower())
+    return title
+
+def _append_rows(ws, df):
+    """ DataFrame 행을 일정 개수씩 잘라 시트에 순서대로 추가 (NaN/NaT는 빈 셀) """
+    for begin in range(0, len(df), EXPORT_CHUNK_ROWS):
+        chunk = df.iloc[begin:begin + EXPORT_CHUNK_ROWS].astype(object)
+        for row in chunk.where(chunk.notna(), None).itertuples(index=False, name=None):
+            ws.append(row)
+
+def rotation_summary(df, rotations=None, period=WEEK_MINUTES):
+    """ 기재별 요약: 편수, 첫 출발, 마지막 도착, 총 운항 시간, (주간 순환 시) 로테이션 (period: 계획 기간, 분) """
+    valid = df[df['Start'].notna() & df['End'].notna()] if 'Start' in df.columns else df.iloc[:0]
+    # 계획 기간 끝 -> 처음(D7 -> D1)을 넘는 스케줄(End < Start)도 기간 단위로 계산
+    block = ((valid['End'] - valid['Start']) % pd.Timedelta(minutes=period)).dt.total_seconds() / 3600
+    grouped = valid.assign(_block=block).groupby('Resource', sort=False)
+    summary = pd.DataFrame({
+        'Legs': df.groupby('Resource', sort=False).size(),
+        'First_Start': grouped['Start'].min(),
+        'Last_End': grouped['End'].max(),
+        'Block_Hours': grouped['_block'].sum().round(1),
+    })
+    summary = summary.reindex(sorted(summary.index, key=natural_sort_key))
+    summary.index.name = 'Resource'
+    if rotations:
+        cycle_of = {res: cycle for cycle in rotations for res in cycle}
+        summary['Rotation'] = [" -> ".join(cycle_of[r] + cycle_of[r][:1]) if r in cycle_of else "" for r in summary.index]
+        summary['Rotation_Weeks'] = [len(cycle_of.get(r, [])) or None for r in summary.index]
+    return summary.reset_index()
+
+def write_schedule_excel(df, target, per_resource=False, rotations=None, period=WEEK_MINUTES):
+    """
+    스케줄을 기재(Natural Sort) -> 출발 시각 순으로 정렬해 엑셀로 저장 (target: 경로 또는 BytesIO)
+    - openpyxl write-only 모드로 행을 순서대로 흘려 쓰므로 전체 Workbook을 메모리에 만들지 않음
+    - per_resource: 기재별 시트 + 요약(Summary) 시트 추가 (rotations: 주간 순환 로테이션 목록, period: 계획 기간)
+    """
+    resources = sorted(df['Resource'].astype(str).unique(), key=natural_sort_key)
+    export_df = df.copy()
+    export_df['Resource'] = pd.Categorical(export_df['Resource'].astype(str), categories=resources, ordered=True)
+    export_df = export_df.sort_values(['Resource', 'Start'] if 'Start' in export_df.columns else ['Resource'])
+    export_df['Resource'] = export_df['Resource'].astype(str)
+
+    wb = Workbook(write_only=True)
+    used = set()
+    ws = wb.create_sheet(_sheet_name('Schedule', used))
+    ws.append(list(export_df.columns))
+    _append_rows(ws, export_df)
+    if per_resource:
+        summary = rotation_summary(export_df, rotations, period)
+        ws = wb.create_sheet(_sheet_name('Summary', used))
+        ws.append(list(summary.columns))
+        _append_rows(ws, summary)
+        for resource, part in export_df.groupby('Resource', sort=False):
+            ws = wb.create_sheet(_sheet_name(resource, used))
+            ws.append(list(part.columns))
+            _append_rows(ws, part)
+    wb.save(target)
@@ -0,0 +1,411 @@
+import os
+import sqlite3
+from datetime import datetime
+import pandas as pd
+from d_time import BASE_DATE
+from schedule_frame import set_rows, concat_rows
+
+# 스케줄 저장소 (SQLite) 파일 경로
+SCHEDULE_DB = os.environ.get('SCHEDULE_DB', 'schedules.db')
+
+# --- 스키마 ---
+# legs: 스케줄 행 (version_id 0 = 작업본, 그 외 = 이름 붙인 버전의 사본)
+#   - 압축 스케줄(schedule_frame)과 같은 분 오프셋으로 저장 -> 불러올 때 D-Time 파싱 없음
+#   - (기재, 출발) / (출발) 인덱스로 기재/구간 단위 부분 조회
+#   - rev: 해당 행을 마지막으로 저장한 스케줄 revision (공유 편집 시 행 단위 낙관적 잠금에 사용)
+# tombstones: 작업본에서 삭제된 행 (다른 세션이 삭제를 revision 기준으로 가져가기 위함)
+# Resource/Label/Color/시간 외의 컬럼은 저장하지 않음
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS schedules (
+    schedule_id INTEGER PRIMARY KEY,
+    name        TEXT NOT NULL UNIQUE,
+    base_date   TEXT NOT NULL,
+    revision    INTEGER NOT NULL DEFAULT 0,
+    updated_at  TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS versions (
+    version_id  INTEGER PRIMARY KEY,
+    schedule_id INTEGER NOT NULL REFERENCES schedules(schedule_id),
+    name        TEXT NOT NULL,
+    revision    INTEGER NOT NULL,
+    created_at  TEXT NOT NULL,
+    UNIQUE (schedule_id, name)
+);
+CREATE TABLE IF NOT EXISTS legs (
+    schedule_id INTEGER NOT NULL,
+    version_id  INTEGER NOT NULL,
+    leg_id      INTEGER NOT NULL,
+    resource    TEXT,
+    start_min   INTEGER,
+    end_min     INTEGER,
+    label       TEXT,
+    color       TEXT,
+    start_d     TEXT,
+    end_d       TEXT,
+    rev         INTEGER NOT NULL,
+    PRIMARY KEY (schedule_id, version_id, leg_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS legs_resource_start ON legs (schedule_id, version_id, resource, start_min);
+CREATE INDEX IF NOT EXISTS legs_start ON legs (schedule_id, version_id, start_min);
+CREATE INDEX IF NOT EXISTS legs_rev ON legs (schedule_id, version_id, rev);
+CREATE TABLE IF NOT EXISTS tombstones (
+    schedule_id INTEGER NOT NULL,
+    leg_id      INTEGER NOT NULL,
+    rev         INTEGER NOT NULL,
+    PRIMARY KEY (schedule_id, leg_id)
+) WITHOUT ROWID;
+"""
+
+# 압축 스케줄 컬럼 <-> legs 컬럼
+_COLUMNS = {'Resource': 'resource', 'Start_Min': 'start_min', 'End_Min': 'end_min',
+            'Label': 'label', 'Color': 'color', 'Start_D': 'start_d', 'End_D': 'end_d'}
+_WORKING = 0
+_SELECT = f"SELECT leg_id, {', '.join(_COLUMNS.values())}, rev FROM legs"
+_UPSERT = (f"INSERT OR REPLACE INTO legs (schedule_id, version_id, leg_id, {', '.join(_COLUMNS.values())}, rev) "
+           f"VALUES (?, 0, ?, {', '.join('?' * len(_COLUMNS))}, ?)")
+
+def _now():
+    return datetime.now().isoformat(timespec='seconds')
+
+def _to_rows(cdf):
+    """ 압축 스케줄 -> legs 컬럼 DataFrame (index = leg_id, 결측은 None) """
+    rows = pd.DataFrame(index=cdf.index.astype('int64'))
+    for col, db_col in _COLUMNS.items():
+        values = cdf[col].astype(object) if col in cdf.columns else pd.Series(None, index=cdf.index, dtype=object)
+        rows[db_col] = values.where(values.notna(), None).to_numpy()
+    return rows
+
+def _from_rows(rows):
+    """ legs 조회 결과 -> 압축 스케줄 (index = leg_id) """
+    cdf = pd.DataFrame(index=pd.Index(rows['leg_id'].to_numpy(dtype='int64')))
+    for col in ('Resource', 'Label', 'Color'):
+        cdf[col] = pd.Categorical(rows[_COLUMNS[col]].to_numpy(dtype=object))
+    for col in ('Start_Min', 'End_Min'):
+        cdf[col] = pd.array(rows[_COLUMNS[col]].to_numpy(dtype=object), dtype='Int32')
+    for col in ('Start_D', 'End_D'):
+        # 시간 형식 오류 행의 원본 문자열 (있는 경우만 컬럼 생성)
+        if rows[_COLUMNS[col]].notna().any():
+            cdf[col] = pd.Categorical(rows[_COLUMNS[col]].to_numpy(dtype=object))
+    return cdf
+
+def _write_rows(conn, schedule_id, rows, revision):
+    """ legs 컬럼 DataFrame(index = leg_id)을 작업본에 기록 (같은 leg_id의 삭제 기록은 지움) """
+    conn.executemany(_UPSERT, [(schedule_id, int(i), *values, revision)
+                               for i, values in zip(rows.index, rows.itertuples(index=False))])
+    conn.executemany("DELETE FROM tombstones WHERE schedule_id = ? AND leg_id = ?",
+                     [(schedule_id, int(i)) for i in rows.index])
+
+def _delete_rows(conn, schedule_id, ids, revision):
+    """ 작업본에서 행 삭제 + 삭제 기록 """
+    conn.executemany("DELETE FROM legs WHERE schedule_id = ? AND version_id = 0 AND leg_id = ?",
+                     [(schedule_id, int(i)) for i in ids])
+    conn.executemany("INSERT OR REPLACE INTO tombstones (schedule_id, leg_id, rev) VALUES (?, ?, ?)",
+                     [(schedule_id, int(i), revision) for i in ids])
+
+def _revs(rows):
+    """ legs 조회 결과 -> 행별 rev Series (index = leg_id) """
+    return pd.Series(rows['rev'].to_numpy(dtype='int64'), index=pd.Index(rows['leg_id'].to_numpy(dtype='int64')))
+
+def _changed(current, stored):
+    """ 같은 leg_id의 두 legs DataFrame에서 값이 다른 행 마스크 (둘 다 결측이면 같음) """
+    both_na = current.isna().to_numpy() & stored.isna().to_numpy()
+    return ((current.to_numpy() != stored.to_numpy()) & ~both_na).any(axis=1)
+
+class ScheduleStore:
+    """
+    SQLite 스케줄 저장소.
+    - save(): 저장된 작업본과 비교해 추가/변경/삭제된 행만 기록
+    - load(): 작업본 또는 버전을 압축 스케줄로 조회 (기재/구간 지정 시 인덱스로 해당 행만)
+    - save_version(): 현재 작업본을 이름 붙인 버전으로 복사 (SQLite 안에서 INSERT ... SELECT)
+    """
+    def __init__(self, path=SCHEDULE_DB):
+        self.path = path
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _schedule(self, conn, name):
+        row = conn.execute("SELECT schedule_id, revision FROM schedules WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            raise KeyError(f"저장된 스케줄 없음: {name}")
+        return row
+
+    def list_schedules(self):
+        """ 저장된 스케줄 목록 (행은 읽지 않음) """
+        with self._connect() as conn:
+            return pd.read_sql_query(
+                "SELECT s.name, s.revision, s.updated_at, "
+                "(SELECT COUNT(*) FROM legs l WHERE l.schedule_id = s.schedule_id AND l.version_id = 0) AS legs "
+                "FROM schedules s ORDER BY s.updated_at DESC", conn)
+
+    def list_versions(self, name):
+        with self._connect() as conn:
+            return pd.read_sql_query(
+                "SELECT v.name, v.revision, v.created_at FROM versions v JOIN schedules s USING (schedule_id) "
+                "WHERE s.name = ? ORDER BY v.version_id DESC", conn, params=(name,))
+
+    def save(self, name, cdf, base_date=BASE_DATE):
+        """ 압축 스케줄을 작업본으로 저장 (바뀐 행만). 반환: {'added', 'updated', 'deleted', 'revision'} """
+        rows = _to_rows(cdf)
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("INSERT OR IGNORE INTO schedules (name, base_date, updated_at) VALUES (?, ?, ?)",
+                         (name, pd.Timestamp(base_date).isoformat(), _now()))
+            schedule_id, revision = self._schedule(conn, name)
+            stored = pd.read_sql_query(
+                f"SELECT leg_id, {', '.join(_COLUMNS.values())} FROM legs WHERE schedule_id = ? AND version_id = 0",
+                conn, params=(schedule_id,), index_col='leg_id')
+
+            common = rows.index.intersection(stored.index)
+            changed = common[_changed(rows.loc[common], stored.loc[common, rows.columns].astype(object))]
+            added = rows.index.difference(stored.index)
+            deleted = stored.index.difference(rows.index)
+            if len(changed) or len(added) or len(deleted):
+                revision += 1
+                _delete_rows(conn, schedule_id, deleted, revision)
+                _write_rows(conn, schedule_id, rows.loc[changed.append(added)], revision)
+                conn.execute("UPDATE schedules SET revision = ?, updated_at = ? WHERE schedule_id = ?",
+                             (revision, _now(), schedule_id))
+        return {'added': len(added), 'updated': len(changed), 'deleted': len(deleted), 'revision': revision}
+
+    def load(self, name, version=None, resources=None, start_min=None, end_min=None):
+        """
+        저장된 스케줄 -> 압축 스케줄 (leg_id 순)
+        version: 버전 이름 (생략 시 작업본), resources / start_min~end_min: 해당 기재 / 구간에 걸치는 행만 조회
+        """
+        with self._connect() as conn:
+            schedule_id, _ = self._schedule(conn, name)
+            version_id = _WORKING
+            if version is not None:
+                row = conn.execute("SELECT version_id FROM versions WHERE schedule_id = ? AND name = ?",
+                                   (schedule_id, version)).fetchone()
+                if row is None:
+                    raise KeyError(f"저장된 버전 없음: {name} / {version}")
+                version_id = row[0]
+            where, params = ["schedule_id = ?", "version_id = ?"], [schedule_id, version_id]
+            if resources is not None:
+                resources = list(resources)
+                where.append(f"resource IN ({', '.join('?' * len(resources))})")
+                params += resources
+            if start_min is not None:
+                where.append("end_min > ?")
+                params.append(int(start_min))
+            if end_min is not None:
+                where.append("start_min < ?")
+                params.append(int(end_min))
+            rows = pd.read_sql_query(f"{_SELECT} WHERE {' AND '.join(where)} ORDER BY leg_id", conn, params=params)
+        return _from_rows(rows)
+
+    def save_version(self, name, version_name):
+        """ 현재 작업본을 version_name 버전으로 복사 (같은 이름이 있으면 덮어씀). 반환: 복사한 행 수 """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            schedule_id, revision = self._schedule(conn, name)
+            old = conn.execute("SELECT version_id FROM versions WHERE schedule_id = ? AND name = ?",
+                               (schedule_id, version_name)).fetchone()
+            if old is not None:
+                conn.execute("DELETE FROM legs WHERE schedule_id = ? AND version_id = ?", (schedule_id, old[0]))
+                conn.execute("DELETE FROM versions WHERE version_id = ?", (old[0],))
+            version_id = conn.execute(
+                "INSERT INTO versions (schedule_id, name, revision, created_at) VALUES (?, ?, ?, ?)",
+                (schedule_id, version_name, revision, _now())).lastrowid
+            columns = ', '.join(list(_COLUMNS.values()) + ['rev'])
+            return conn.execute(
+                f"INSERT INTO legs (schedule_id, version_id, leg_id, {columns}) "
+                f"SELECT schedule_id, ?, leg_id, {columns} FROM legs WHERE schedule_id = ? AND version_id = 0",
+                (version_id, schedule_id)).rowcount
+
+    # --- 공유 편집 (행 단위 낙관적 잠금) ---
+    def revision(self, name):
+        with self._connect() as conn:
+            return self._schedule(conn, name)[1]
+
+    def checkout(self, name):
+        """ 작업본 전체 + 행별 rev + 현재 revision (한 번의 읽기 트랜잭션). 반환: (압축 스케줄, rev Series, revision) """
+        with self._connect() as conn:
+            conn.execute("BEGIN")
+            schedule_id, revision = self._schedule(conn, name)
+            rows = pd.read_sql_query(f"{_SELECT} WHERE schedule_id = ? AND version_id = 0 ORDER BY leg_id",
+                                     conn, params=(schedule_id,))
+        return _from_rows(rows), _revs(rows), revision
+
+    def changes_since(self, name, revision):
+        """
+        revision 이후 바뀐 작업본 행 (rev 인덱스 조회).
+        반환: (변경/추가 행 압축 스케줄, 해당 행 rev Series, 삭제된 leg_id별 rev Series, 현재 revision)
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN")
+            schedule_id, current = self._schedule(conn, name)
+            rows = pd.read_sql_query(f"{_SELECT} WHERE schedule_id = ? AND version_id = 0 AND rev > ? ORDER BY leg_id",
+                                     conn, params=(schedule_id, revision))
+            tombs = pd.read_sql_query("SELECT leg_id, rev FROM tombstones WHERE schedule_id = ? AND rev > ?",
+                                      conn, params=(schedule_id, revision))
+        return _from_rows(rows), _revs(rows), _revs(tombs), current
+
+    def fetch(self, name, ids):
+        """ 작업본의 지정 행과 rev (없는 leg_id는 삭제된 행). 반환: (압축 스케줄, rev Series) """
+        ids = [int(i) for i in ids]
+        with self._connect() as conn:
+            conn.execute("BEGIN")
+            schedule_id, _ = self._schedule(conn, name)
+            rows = pd.concat([pd.read_sql_query(
+                f"{_SELECT} WHERE schedule_id = ? AND version_id = 0 AND leg_id IN ({', '.join('?' * len(chunk))})",
+                conn, params=[schedule_id] + chunk) for chunk in
+                (ids[k:k + 500] for k in range(0, len(ids), 500))] or [pd.read_sql_query(f"{_SELECT} LIMIT 0", conn)])
+        return _from_rows(rows), _revs(rows)
+
+    def commit(self, name, rows, deleted, base_revs):
+        """
+        공유 편집 변경분 기록.
+        rows: 변경/추가 행 (legs 컬럼, index = 세션의 leg_id), deleted: 삭제할 leg_id
+        base_revs: 세션이 마지막으로 동기화한 행별 rev Series - 여기 없는 행은 새 행으로 보고 새 leg_id 발급
+        저장소의 rev가 base_revs와 다른 행(다른 세션이 먼저 변경/삭제)은 기록하지 않고 conflicts로 반환
+        반환: {'revision', 'written': [leg_id], 'deleted': [leg_id], 'id_map': {세션 id: 새 leg_id}, 'conflicts': [leg_id]}
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            schedule_id, revision = self._schedule(conn, name)
+            current = pd.read_sql_query("SELECT leg_id, rev FROM legs WHERE schedule_id = ? AND version_id = 0",
+                                        conn, params=(schedule_id,), index_col='leg_id')['rev']
+
+            def unchanged(ids):
+                ids = pd.Index(ids, dtype='int64')
+                return ids, (current.reindex(ids).to_numpy() == base_revs.reindex(ids).to_numpy())
+
+            existing, ok = unchanged(rows.index[rows.index.isin(base_revs.index)])
+            gone, gone_ok = unchanged(deleted)
+            new = rows.index[~rows.index.isin(base_revs.index)]
+            write, remove = existing[ok], gone[gone_ok]
+            conflicts = existing[~ok].append(gone[~gone_ok]).tolist()
+
+            id_map = {}
+            if len(write) or len(remove) or len(new):
+                revision += 1
+                last_tomb = conn.execute("SELECT MAX(leg_id) FROM tombstones WHERE schedule_id = ?", (schedule_id,)).fetchone()[0]
+                next_id = max(int(current.index.max()) if len(current) else -1, -1 if last_tomb is None else last_tomb) + 1
+                id_map = {int(i): next_id + k for k, i in enumerate(new)}
+                _delete_rows(conn, schedule_id, remove, revision)
+                _write_rows(conn, schedule_id, rows.loc[write.append(new)].rename(index=id_map), revision)
+                conn.execute("UPDATE schedules SET revision = ?, updated_at = ? WHERE schedule_id = ?",
+                             (revision, _now(), schedule_id))
+        return {'revision': revision, 'written': write.tolist(), 'deleted': remove.tolist(),
+                'id_map': id_map, 'conflicts': conflicts}
+
+def _row_hash(cdf):
+    """ 압축 스케줄 행별 값 해시 (index = leg_id) """
+    return pd.util.hash_pandas_object(_to_rows(cdf), index=False)
+
+def _upsert(cdf, rows):
+    """ 압축 스케줄에 다른 세션의 행(압축 스케줄) 반영: 있는 행은 값 변경, 없는 행은 추가 """
+    for col in ('Start_D', 'End_D'):
+        # 시간 형식 오류 원본 컬럼은 한쪽에만 있을 수 있음
+        if col in rows.columns and col not in cdf.columns:
+            cdf = cdf.assign(**{col: pd.Categorical([None] * len(cdf))})
+        if col in cdf.columns and col not in rows.columns:
+            rows = rows.assign(**{col: pd.Categorical([None] * len(rows))})
+    present = rows.index.isin(cdf.index)
+    update = rows[present]
+    if len(update):
+        set_rows(cdf, update.index, {col: update[col].astype(object).to_numpy() for col in update.columns})
+    if not present.all():
+        cdf = concat_rows(cdf, rows[~present])
+    return cdf
+
+class SharedSchedule:
+    """
+    여러 세션이 함께 편집하는 작업본의 세션 쪽 상태 (낙관적 잠금).
+    - base_rev / base_hash: 마지막으로 동기화한 행별 rev / 값 해시
+      -> 로컬 변경 행 = 해시가 달라진 행 (기준 사본 전체를 들고 있지 않음)
+    - sync(): 로컬 변경 push (다른 세션이 먼저 바꾼 행만 충돌) 후 다른 세션의 변경을 revision 이후 행만 pull
+    - 충돌 행은 로컬 값을 유지하고 conflicts에 남김 -> resolve()로 저장소 값 또는 로컬 값 선택
+    """
+    def __init__(self, store, name):
+        self.store, self.name = store, name
+        self.revision = 0
+        self.base_rev = pd.Series(dtype='int64')
+        self.base_hash = pd.Series(dtype='uint64')
+        self.conflicts = []
+
+    def checkout(self):
+        cdf, self.base_rev, self.revision = self.store.checkout(self.name)
+        self.base_hash = _row_hash(cdf)
+        self.conflicts = []
+        return cdf
+
+    def _local_changes(self, hashes):
+        """ (값이 바뀐 행, 추가된 행, 삭제된 행) index """
+        common = hashes.index.intersection(self.base_hash.index)
+        changed = common[hashes.loc[common].to_numpy() != self.base_hash.loc[common].to_numpy()]
+        return changed, hashes.index.difference(self.base_hash.index), self.base_hash.index.difference(hashes.index)
+
+    def _set_base(self, ids, revs, hashes):
+        """ 지정 행의 기준 rev/해시 갱신 (로컬에 없는 행은 기준에서 제거) """
+        ids = pd.Index(ids)
+        present = ids.intersection(hashes.index)
+        self.base_rev = pd.concat([self.base_rev[~self.base_rev.index.isin(ids)], revs.reindex(present).astype('int64')])
+        self.base_hash = pd.concat([self.base_hash[~self.base_hash.index.isin(ids)], hashes.loc[present]])
+
+    def has_remote_changes(self):
+        return self.store.revision(self.name) > self.revision
+
+    def sync(self, cdf, push=True):
+        """
+        로컬 변경 push + 다른 세션 변경 pull.
+        반환: (새 압축 스케줄, {'pushed', 'pulled', 'conflicts', 'id_map': 새 행 id 변경 {로컬 id: 저장소 id}})
+        """
+        hashes = _row_hash(cdf)
+        changed, added, deleted = self._local_changes(hashes)
+        pushed, id_map = 0, {}
+        if push and (len(changed) or len(added) or len(deleted)):
+            result = self.store.commit(self.name, _to_rows(cdf.loc[changed.append(added)]), deleted, self.base_rev)
+            id_map = result['id_map']
+            if id_map:
+                # 새 행은 저장소가 발급한 leg_id로 교체 (세션끼리 같은 id를 만들어도 겹치지 않게)
+                cdf, hashes = cdf.rename(index=id_map), hashes.rename(index=id_map)
+            written = result['written'] + list(id_map.values())
+            self._set_base(written + result['deleted'], pd.Series(result['revision'], index=written, dtype='int64'), hashes)
+            self.conflicts = sorted(set(self.conflicts) | set(result['conflicts']))
+            pushed = len(written) + len(result['deleted'])
+
+        # pull: 이미 가진 rev의 행(방금 push한 행 등)은 건너뛰고, 로컬에서 바뀐 행은 덮어쓰지 않고 충돌로 표시
+        rows, revs, tombs, revision = self.store.changes_since(self.name, self.revision)
+        dirty = pd.Index([]).append(list(self._local_changes(hashes)))
+        tombs = tombs[tombs.index.isin(self.base_rev.index) | tombs.index.isin(cdf.index)]
+        remote = pd.concat([revs, tombs])
+        fresh = remote.index[self.base_rev.reindex(remote.index).to_numpy() != remote.to_numpy()]
+        clash, take = fresh[fresh.isin(dirty)], fresh[~fresh.isin(dirty)]
+        cdf = self._take_remote(cdf, rows, revs, take)
+        self.conflicts = sorted(set(self.conflicts) | set(clash.tolist()))
+        self.revision = revision
+        return cdf, {'pushed': pushed, 'pulled': len(take), 'conflicts': len(self.conflicts), 'id_map': id_map}
+
+    def _take_remote(self, cdf, rows, revs, ids):
+        """ 저장소 값으로 로컬 행 교체 (rows에 없는 id = 저장소에서 삭제된 행 -> 로컬에서도 삭제) """
+        upsert = rows.index.intersection(ids)
+        gone = pd.Index(ids).difference(rows.index)
+        cdf = cdf.drop(index=gone.intersection(cdf.index))
+        if len(upsert):
+            cdf = _upsert(cdf, rows.loc[upsert])
+        self._set_base(pd.Index(ids), revs, _row_hash(cdf.loc[upsert]))
+        return cdf
+
+    def resolve(self, cdf, keep_local):
+        """
+        충돌 행 해결. keep_local=False: 저장소 값으로 교체, True: 저장소의 현재 rev를 기준으로 삼아 로컬 값을 다시 push
+        (저장소에서 삭제된 행을 로컬에서 고친 경우 새 행으로 추가)
+        반환: sync()와 같음
+        """
+        ids = pd.Index(self.conflicts, dtype='int64')
+        rows, revs = self.store.fetch(self.name, ids)
+        self.conflicts = []
+        if keep_local:
+            self.base_rev = pd.concat([self.base_rev[~self.base_rev.index.isin(ids)], revs])
+            self.base_hash = self.base_hash[self.base_hash.index.isin(self.base_rev.index)]
+        else:
+            cdf = self._take_remote(cdf, rows, revs, ids)
+        return self.sync(cdf)
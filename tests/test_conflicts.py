@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+from conflicts import ResourceIntervals, find_conflicts
+
+BASE = pd.Timestamp("2024-01-01")
+
+def _frame(rows):
+    return pd.DataFrame([{"Resource": r, "Start": BASE + pd.Timedelta(minutes=s), "End": BASE + pd.Timedelta(minutes=e)}
+                         for r, s, e in rows])
+
+def _pairs(conflicts):
+    return sorted(tuple(sorted(p)) for p in zip(conflicts['id'], conflicts['other_id']))
+
+def test_reports_every_overlapping_pair():
+    # A가 B, C 모두와 겹침 (B-C는 안 겹침) -> 2쌍 모두 보고
+    df = _frame([("#1", 0, 600), ("#1", 60, 120), ("#1", 180, 240), ("#2", 0, 600)])
+    assert _pairs(find_conflicts(df)) == [(0, 1), (0, 2)]
+
+def test_touching_legs_do_not_conflict():
+    df = _frame([("#1", 0, 60), ("#1", 60, 120)])
+    assert find_conflicts(df).empty
+
+def test_matches_brute_force():
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        n = int(rng.integers(1, 40))
+        s = rng.integers(0, 2000, n)
+        rows = list(zip(rng.choice(["#1", "#2", "#3"], n), s, s + rng.integers(1, 300, n)))
+        expected = sorted((i, j) for i in range(n) for j in range(i + 1, n)
+                          if rows[i][0] == rows[j][0] and rows[i][1] < rows[j][2] and rows[j][1] < rows[i][2])
+        assert _pairs(find_conflicts(_frame(rows))) == expected
+
+def test_insert_keeps_index_in_sync():
+    df = _frame([("#1", 0, 60), ("#1", 300, 360)])
+    index = ResourceIntervals.from_frame(df)
+    index.insert("#1", BASE + pd.Timedelta(minutes=100), BASE + pd.Timedelta(minutes=200), 2)
+    index.insert("#3", BASE, BASE + pd.Timedelta(minutes=30), 3)
+    assert index.conflicts("#1", BASE + pd.Timedelta(minutes=150), BASE + pd.Timedelta(minutes=320)) == [2, 1]
+    assert index.overlaps("#3", BASE + pd.Timedelta(minutes=10), BASE + pd.Timedelta(minutes=20))
+    assert not index.overlaps("#1", BASE + pd.Timedelta(minutes=60), BASE + pd.Timedelta(minutes=100))
+
+def test_period_checks_week_seam():
+    week = pd.Timedelta(days=7)
+    # 0: D7 2200 -> D1 0300 (주 경계를 넘음), 1: D1 0100 -> 0500, 2: D7 2300 -> D7 2330, 3: D7 2330 -> D1 0200
+    df = _frame([("#1", 6 * 1440 + 1320, 180), ("#1", 60, 300), ("#1", 6 * 1440 + 1380, 6 * 1440 + 1410),
+                 ("#1", 6 * 1440 + 1410, 120), ("#2", 60, 300)])
+    assert find_conflicts(df).empty
+    assert _pairs(find_conflicts(df, week)) == [(0, 1), (0, 2), (0, 3), (1, 3)]
+    assert _pairs(find_conflicts(df.drop(index=[0, 3]), week)) == []
+
+def test_next_resource_moves_seam_tail():
+    week = pd.Timedelta(days=7)
+    # #1이 D7 2200 -> D1 0300을 맡고 다음 주에는 #2로 이어짐 -> 꼬리는 #1이 아니라 #2의 D1과 비교
+    df = _frame([("#1", 6 * 1440 + 1320, 180), ("#1", 60, 300), ("#2", 120, 400)])
+    assert _pairs(find_conflicts(df, week)) == [(0, 1)]
+    assert _pairs(find_conflicts(df, week, {"#1": "#2", "#2": "#1"})) == [(0, 2)]
@@ -0,0 +1,21 @@
+import numpy as np
+from optimizer import assign_chains
+
+WEEK = 7 * 1440
+
+def test_chains_do_not_reuse_lane_during_week_crossing_leg():
+    # 0: ICN-LAX D7 2300 -> D1 0600 (주 경계를 넘음), 1: LAX-ICN D7 2330 출발 -> 0번이 아직 비행 중이므로 연결 불가
+    starts = np.array([6 * 1440 + 1380, 6 * 1440 + 1410])
+    ends = np.array([360, 6 * 1440 + 1430])
+    origins = np.array(["ICN", "LAX"], dtype=object)
+    destinations = np.array(["LAX", "ICN"], dtype=object)
+    lanes, lane_count = assign_chains(starts, ends, origins, destinations, period=WEEK)
+    assert lane_count == 2 and lanes[0] != lanes[1]
+
+def test_chains_connect_after_arrival():
+    starts = np.array([0, 700])
+    ends = np.array([600, 1300])
+    origins = np.array(["ICN", "LAX"], dtype=object)
+    destinations = np.array(["LAX", "ICN"], dtype=object)
+    lanes, lane_count = assign_chains(starts, ends, origins, destinations, turnaround=60, period=WEEK)
+    assert lane_count == 1 and lanes.tolist() == [0, 0]
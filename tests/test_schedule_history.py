@@ -0,0 +1,35 @@
+import pandas as pd
+from schedule_frame import compact_schedule
+from schedule_history import ScheduleHistory, ScheduleSnapshot, _differs
+
+def _schedule():
+    """ 시간 형식 오류 행(Start_Min/End_Min = <NA>)이 섞인 압축 스케줄 """
+    return compact_schedule(pd.DataFrame({
+        "Resource": ["#1", "#2", "#1"],
+        "Start_D": ["D1 1320", "D1 25:00", "D3 0100"],
+        "End_D": ["D2 1620", "D2 0540", "bad"],
+        "Label": ["LAX", "EWR", "NRT"],
+        "Color": ["#FFB6C1", "#ADD8E6", "#90EE90"],
+    }))
+
+def test_differs_with_na_minutes():
+    before = pd.Series([1, pd.NA, pd.NA, 4], dtype='Int32')
+    after = pd.Series([1, pd.NA, 3, pd.NA], dtype='Int32')
+    assert _differs(before, after).tolist() == [False, False, True, True]
+
+def test_diff_and_undo_with_na_minutes():
+    df = _schedule()
+    assert df['Start_Min'].isna().any() and df['End_Min'].isna().any()
+    snapshot = ScheduleSnapshot(df)
+    # 최적화처럼 새 DataFrame으로 Resource만 바꿈 (<NA> 분 오프셋 행 포함)
+    changed = df.copy()
+    changed['Resource'] = pd.Categorical(["#2", "#2", "#1"])
+    edit = snapshot.diff("최적화", changed)
+    assert list(edit.before.index) == [0] and list(edit.before.columns) == ['Resource']
+
+    history = ScheduleHistory()
+    history.record(edit)
+    undone, _, label = history.undo(changed)
+    assert label == "최적화"
+    assert undone['Resource'].astype(str).tolist() == ["#1", "#2", "#1"]
+    assert undone['End_Min'].isna().tolist() == df['End_Min'].isna().tolist()
@@ -0,0 +1,209 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from d_time import BASE_DATE, format_d_time_series
+from schedule_frame import is_compact, to_minutes, set_rows, append_rows
+
+DEFAULT_COLOR = '#ADD8E6'
+_COLOR_PATTERN = r'^#?[0-9A-Za-z]{1,20}$'
+
+# --- vis-timeline 데이터(Payload) 생성 ---
+def _epoch_ms(values):
+    """ datetime 컬럼 -> epoch 밀리초 (naive 시각을 UTC로 간주) """
+    return pd.to_datetime(values).to_numpy().astype('datetime64[ms]').astype('int64')
+
+def build_timeline_payload(df, resources, conflict_ids=None, palette=None):
+    """
+    스케줄 DataFrame -> (payload JSON 문자열, 색상 CSS)
+    - 행 단위 dict 대신 컬럼 배열로 생성 (start/end는 ISO 문자열 대신 epoch ms 정수)
+    - 색상은 행마다 style 문자열을 만들지 않고 색상표 인덱스(CSS class 'c0', 'c1', ...)로 전달
+    - Resource 목록에 없거나 시간이 비어 있는 행은 제외
+    - conflict_ids 지정 시 해당 행에 겹침 표시('conflict' class) 플래그 추가
+    - palette 지정 시 기존 색상표 뒤에 새 색상만 추가 (이미 그린 차트에 일부 행만 보낼 때 class 번호 유지)
+    """
+    group_codes = pd.Categorical(df['Resource'], categories=resources).codes
+    valid = (group_codes >= 0) & df['Start'].notna().to_numpy() & df['End'].notna().to_numpy()
+    sub = df[valid]
+
+    colors = sub['Color'].astype('string').fillna(DEFAULT_COLOR).str.strip()
+    colors = colors.where(colors.str.match(_COLOR_PATTERN).fillna(False), DEFAULT_COLOR)
+    if palette is None:
+        color_codes, palette = pd.factorize(colors)
+    else:
+        palette = pd.Index(palette, dtype=object)
+        palette = palette.append(pd.Index(colors.unique(), dtype=object).difference(palette, sort=False))
+        color_codes = palette.get_indexer(colors)
+
+    payload = {
+        "groups": list(resources),
+        "id": sub.index.tolist(),
+        "group": group_codes[valid].tolist(),
+        "content": sub['Label'].astype(str).tolist(),
+        "start": _epoch_ms(sub['Start']).tolist(),
+        "end": _epoch_ms(sub['End']).tolist(),
+        "color": np.asarray(color_codes).tolist(),
+        "colors": list(palette),
+    }
+    if conflict_ids is not None:
+        payload["conflict"] = np.isin(sub.index.to_numpy(), np.asarray(list(conflict_ids))).astype(int).tolist()
+    css = "\n".join(
+        f".vis-item.c{i} {{ background-color: {c}; border-color: black; }}" for i, c in enumerate(palette)
+    )
+    # <script> 안에 그대로 삽입되므로 '</' 는 이스케이프
+    return json.dumps(payload, separators=(',', ':')).replace('</', '<\\/'), css
+
+# --- 화면 구간(Window) 조회 ---
+class TimelineWindowIndex:
+    """
+    시간 순 정렬 인덱스 (대용량 모드에서 화면에 보이는 구간의 스케줄만 보내기 위함).
+    - 출발 시각(epoch ms) 순으로 정렬하고 도착 시각 누적 최대값(max_ends)을 함께 보관
+    - query(): 누적 최대값 <= 구간 시작인 앞부분과 구간 끝 이후 출발은 이분 탐색으로 제외 -> O(log n + 후보 수)
+    """
+    def __init__(self, df):
+        valid = (df['Start'].notna() & df['End'].notna()).to_numpy()
+        sub = df[valid]
+        starts, ends = _epoch_ms(sub['Start']), _epoch_ms(sub['End'])
+        order = np.argsort(starts, kind='stable')
+        self._starts, self._ends = starts[order], ends[order]
+        self._ids = sub.index.to_numpy()[order]
+        self._resources = sub['Resource'].astype(str).to_numpy()[order]
+        self._max_ends = np.maximum.accumulate(self._ends) if len(order) else self._ends
+
+    def query(self, start_ms, end_ms, resources=None):
+        """ [start_ms, end_ms) 구간에 걸치는 스케줄 index 목록 (resources 지정 시 해당 기재만) """
+        lo = int(np.searchsorted(self._max_ends, start_ms, side='right'))
+        hi = int(np.searchsorted(self._starts, end_ms, side='left'))
+        if hi <= lo:
+            return self._ids[:0]
+        mask = self._ends[lo:hi] > start_ms
+        if resources is not None:
+            mask &= np.isin(self._resources[lo:hi], np.asarray(list(resources), dtype=str))
+        return self._ids[lo:hi][mask]
+
+def window_range(view, margin=0.5):
+    """ 화면 구간 {start, end}(epoch ms) -> 미리 보낼 구간 (앞뒤로 화면 폭 x margin 만큼 여유) """
+    width = view['end'] - view['start']
+    return int(view['start'] - width * margin), int(view['end'] + width * margin)
+
+# --- 컴포넌트 변경분(Delta) 반영 ---
+def _from_epoch_ms(values):
+    return pd.to_datetime(np.asarray(values, dtype='int64'), unit='ms')
+
+def _update_rows(df, ids, updated, starts, ends, base_date):
+    """ 일반 스케줄: 변경된 행의 Start/End와 D-Time 문자열 갱신 """
+    df.loc[ids, 'Resource'] = [u['group'] for u in updated]
+    df.loc[ids, 'Start'] = starts
+    df.loc[ids, 'End'] = ends
+    df.loc[ids, 'Start_D'] = format_d_time_series(starts, base_date).to_numpy()
+    df.loc[ids, 'End_D'] = format_d_time_series(ends, base_date).to_numpy()
+
+def _add_rows(df, added, next_id, starts, ends, base_date):
+    """ 일반 스케줄: 추가된 행을 next_id부터 제자리 추가 """
+    start_d = format_d_time_series(starts, base_date).tolist()
+    end_d = format_d_time_series(ends, base_date).tolist()
+    for k, a in enumerate(added):
+        df.loc[next_id + k] = pd.Series({
+            "Resource": a['group'], "Label": a['content'], "Color": a.get('color', DEFAULT_COLOR),
+            "Start_D": start_d[k], "End_D": end_d[k], "Start": starts[k], "End": ends[k]
+        })
+
+def apply_timeline_delta(df, delta, base_date=BASE_DATE, id_map=None):
+    """
+    타임라인 컴포넌트가 보낸 변경분을 스케줄 DataFrame에 제자리(in place)로 반영.
+    delta = {"removed": [id, ...],
+             "updated": [{"id", "group", "start", "end"}, ...],
+             "added":   [{"id", "group", "content", "start", "end", "color"}, ...]}  (start/end: epoch ms)
+    - 변경된 행만 D-Time 문자열을 다시 계산하고, 이미 없어진 id는 무시
+    - id_map: 브라우저 임시 id -> 추가된 행 index (추가 직후 이어지는 이동/삭제 Delta 처리용, 갱신됨)
+    - 압축 스케줄(schedule_frame)이면 Start_Min/End_Min만 갱신. 행 추가 시 새 DataFrame이 되므로 반환값을 사용
+    """
+    id_map = {} if id_map is None else id_map
+    compact = is_compact(df)
+    removed = [id_map.get(i, i) for i in delta.get('removed', [])]
+    removed = [i for i in removed if i in df.index]
+    if removed:
+        df.drop(index=removed, inplace=True)
+
+    updated = [dict(u, id=id_map.get(u['id'], u['id'])) for u in delta.get('updated', [])]
+    updated = [u for u in updated if u['id'] in df.index]
+    if updated:
+        ids = [u['id'] for u in updated]
+        starts = _from_epoch_ms([u['start'] for u in updated])
+        ends = _from_epoch_ms([u['end'] for u in updated])
+        if compact:
+            set_rows(df, ids, {
+                'Resource': [u['group'] for u in updated],
+                'Start_Min': to_minutes(starts, base_date).array, 'End_Min': to_minutes(ends, base_date).array,
+            })
+        else:
+            _update_rows(df, ids, updated, starts, ends, base_date)
+
+    added = delta.get('added', [])
+    if added:
+        starts = _from_epoch_ms([a['start'] for a in added])
+        ends = _from_epoch_ms([a['end'] for a in added])
+        next_id = int(df.index.max()) + 1 if len(df) else 0
+        for k, a in enumerate(added):
+            id_map[a['id']] = next_id + k
+        if compact:
+            df = append_rows(df, pd.DataFrame({
+                "Resource": [a['group'] for a in added], "Label": [a['content'] for a in added],
+                "Color": [a.get('color', DEFAULT_COLOR) for a in added], "Start": starts, "End": ends,
+            }, index=range(next_id, next_id + len(added))), base_date)
+        else:
+            _add_rows(df, added, next_id, starts, ends, base_date)
+    return df
+
+# --- '차트 데이터 복사' JSON 붙여넣기 ---
+PASTE_COLUMNS = ['Resource', 'Start_ISO', 'End_ISO', 'Label', 'Color']
+
+def parse_pasted_schedule(json_text, base_date=BASE_DATE):
+    """
+    exportData()로 복사한 JSON 문자열 -> 저장용 DataFrame (Resource, Start_D, End_D, Label, Color)
+    - 행마다 pd.to_datetime / format_d_time을 부르지 않고 컬럼 단위로 한 번에 변환
+    """
+    rows = pd.DataFrame(json.loads(json_text), columns=PASTE_COLUMNS)
+    starts = pd.to_datetime(rows['Start_ISO'], format='ISO8601')
+    ends = pd.to_datetime(rows['End_ISO'], format='ISO8601')
+    return pd.DataFrame({
+        "Resource": rows['Resource'],
+        "Start_D": format_d_time_series(starts, base_date).to_numpy(),
+        "End_D": format_d_time_series(ends, base_date).to_numpy(),
+        "Label": rows['Label'], "Color": rows['Color'],
+    })
+
+# --- 프론트엔드 라이브러리 (자체 호스팅) ---
+# static/vendor/ 아래 파일을 Streamlit 정적 파일(/app/static/, .streamlit/config.toml)로 제공.
+# 파일은 fetch_assets.py로 받아 두고, 없으면 브라우저가 CDN 주소로 대신 읽음 (인터넷이 안 되는 서버에서는 차트가 안 그려짐).
+VENDOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'vendor')
+VENDOR_URL = 'app/static/vendor/'
+VENDOR_ASSETS = {
+    # 파일 이름: (버전, CDN 주소)
+    'vis-timeline-graph2d.min.js': ('7.7.2', 'https://cdnjs.cloudflare.com/ajax/libs/vis-timeline/7.7.2/vis-timeline-graph2d.min.js'),
+    'vis-timeline-graph2d.min.css': ('7.7.2', 'https://cdnjs.cloudflare.com/ajax/libs/vis-timeline/7.7.2/vis-timeline-graph2d.min.css'),
+    'html2canvas.min.js': ('1.4.1', 'https://cdnjs.cloudflare.com/ajax/libs/html2canvas/1.4.1/html2canvas.min.js'),
+}
+
+def missing_vendor_assets(vendor_dir=VENDOR_DIR):
+    """ static/vendor/ 에 없는 라이브러리 파일 이름 목록 (앱에서 CDN 대체 전에 경고 표시용) """
+    return [name for name in VENDOR_ASSETS if not os.path.exists(os.path.join(vendor_dir, name))]
+
+def vendor_tags(base_url=VENDOR_URL):
+    """ vis-timeline <script>/<link> 태그 (자체 호스팅 주소를 먼저 읽고, 실패하면 CDN 주소로 다시 읽음) """
+    vis_js, vis_css = VENDOR_ASSETS['vis-timeline-graph2d.min.js'][1], VENDOR_ASSETS['vis-timeline-graph2d.min.css'][1]
+    return "\n  ".join([
+        f'<script type="text/javascript" src="{base_url}vis-timeline-graph2d.min.js"></script>',
+        f'<script>window.vis || document.write(\'<script src="{vis_js}"><\\/script>\');</script>',
+        f'<link href="{base_url}vis-timeline-graph2d.min.css" rel="stylesheet" type="text/css" '
+        f'onerror="this.onerror=null; this.href=\'{vis_css}\';" />',
+    ])
+
+# components.html(srcdoc iframe)용: 상대 주소가 앱 페이지 주소 기준으로 해석됨
+TIMELINE_ASSET_TAGS = vendor_tags()
+
+# 브라우저 측 Payload 복원/역변환 함수 (HTML <script> 안에 삽입, 컴포넌트와 같은 파일 사용)
+# - 타임라인은 UTC 기준(moment: utc)으로 표시하므로 epoch ms 가 BASE_DATE 기준 시각 그대로 보임
+_HELPERS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'timeline_component', 'frontend', 'timeline_helpers.js')
+with open(_HELPERS_PATH, encoding='utf-8') as f:
+    TIMELINE_JS_HELPERS = f.read()
@@ -0,0 +1,31 @@
+import os
+import streamlit.components.v1 as components
+
+# 양방향 vis-timeline 컴포넌트 (frontend/index.html)
+# - Python -> 브라우저: 컬럼 단위 Payload, 그룹 목록, 색상 CSS, 마지막으로 반영한 Delta 번호(ack)
+# - 브라우저 -> Python: 반영되지 않은 변경분 목록 {"deltas": [{"seq", "added", "updated", "removed"}, ...]}
+# - 대용량 모드(window 지정): Python은 화면 구간의 기재/스케줄만 보내고, 브라우저는 이동/확대/페이지 이동 시
+#   필요한 구간을 {"view": {"start", "end", "row"}} 로 요청
+_FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend")
+_component = components.declare_component("rotation_timeline", path=_FRONTEND_DIR)
+
+def timeline_editor(payload_json, groups_json, color_css, ack=0, key=None, window=None, horizon=None, patch=None):
+    """
+    타임라인을 그리고, 사용자가 이동/삭제/복제한 변경분(Delta) 목록을 반환 (없으면 None)
+    window: 대용량 모드 화면 정보 {"start", "end", "row", "rows", "total_rows", "loaded": [from, to]} (epoch ms)
+    horizon: 계획 기간 {"start", "end"(epoch ms), "dated": 축에 날짜 표시 여부} (생략 시 2024-01-01부터 1주)
+    patch: payload_json에 덧붙일 일부 행 {"seq", "payload", "css", "removed": [id, ...]}
+           (payload_json 이후 누적 변경분, seq가 바뀌면 해당 행만 갱신/삭제 - 전체를 다시 그리지 않음)
+    """
+    return _component(payload=payload_json, groups=groups_json, css=color_css, ack=ack, window=window,
+                      horizon=horizon, patch=patch, key=key, default=None)
+
+def pending_deltas(result, ack):
+    """ 컴포넌트 반환값에서 아직 반영하지 않은(seq > ack) Delta만 순서대로 반환 """
+    if not result:
+        return []
+    return sorted((d for d in result.get('deltas', []) if d.get('seq', 0) > ack), key=lambda d: d['seq'])
+
+def requested_view(result):
+    """ 대용량 모드에서 브라우저가 요청한 화면 구간 {"start", "end", "row"} (없으면 None) """
+    return (result or {}).get('view')
@@ -0,0 +1,19 @@
+  // 컬럼 단위 Payload -> vis DataSet 항목
+  function decodeItems(p) {
+    var out = new Array(p.id.length);
+    for (var i = 0; i < p.id.length; i++) {
+      out[i] = { id: p.id[i], group: p.groups[p.group[i]], content: p.content[i],
+                 start: p.start[i], end: p.end[i],
+                 className: 'c' + p.color[i] + (p.conflict && p.conflict[i] ? ' conflict' : '') };
+    }
+    return out;
+  }
+  // 색상 class('c3') -> 색상값
+  function itemColor(p, item) {
+    var m = /(?:^|\s)c(\d+)(?:\s|$)/.exec(item.className || '');
+    return m ? p.colors[parseInt(m[1])] : '#ADD8E6';
+  }
+  // UTC 기준 시각 -> 'YYYY-MM-DDTHH:MM:SS' (타임존 없는 BASE_DATE 기준 시각)
+  function toNaiveIso(date) {
+    return new Date(date).toISOString().slice(0, 19);
+  }